@@ -0,0 +1,41 @@
+"""Per-user active penalties, cached until a penalty change event for the user."""
+
+import threading
+from collections.abc import Callable
+
+from app.core.cache import LRUCache
+
+
+class ActivePenalties:
+    """
+    Active penalties of each user, read from the penalties store once.
+
+    Every authenticated write checks the user's penalties, so they are kept
+    in an LRU cache and dropped by ``handle`` when a penalty_changed event
+    names the user (or names none, after a bulk save).
+    """
+
+    def __init__(self, load: Callable[[str], list[dict]], maxsize: int):
+        self._load = load
+        self._cache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> list[dict]:
+        """Active penalties of a user."""
+        penalties = self._cache.get(user_id)
+        if penalties is not None:
+            return penalties
+        # Held across the read and the put, so an event for this user is applied after a stale read, not before
+        with self._lock:
+            penalties = self._load(user_id)
+            self._cache.put(user_id, penalties)
+        return penalties
+
+    def handle(self, _event_type: str, payload: dict):
+        """Drop the cached penalties of the user a penalty event is about."""
+        user_id = payload.get("user_id")
+        with self._lock:
+            if user_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(user_id)
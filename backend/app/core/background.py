@@ -0,0 +1,65 @@
+"""Background worker for jobs that should not block a request."""
+
+import logging
+import threading
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundRunner:
+    """
+    Run jobs on a small thread pool, at most one in flight per key.
+
+    Submitting a job under a key that already has a queued or running job
+    is a no-op, so e.g. a burst of requests for the same user schedules
+    a single refresh.
+    """
+
+    def __init__(self, max_workers: int = 2, name: str = "background"):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._in_flight: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def submit(self, key: Hashable, func: Callable, *args, **kwargs) -> bool:
+        """
+        Schedule ``func(*args, **kwargs)`` unless a job with the same key is in flight.
+
+        Returns:
+            True if the job was scheduled, False if it was deduplicated or the runner is shut down.
+        """
+        with self._lock:
+            if self._closed or key in self._in_flight:
+                return False
+            future = self._executor.submit(self._run, key, func, *args, **kwargs)
+            self._in_flight[key] = future
+        return True
+
+    def is_pending(self, key: Hashable) -> bool:
+        """Whether a job with this key is queued or running."""
+        with self._lock:
+            return key in self._in_flight
+
+    def wait(self, key: Hashable, timeout: float | None = None):
+        """Block until the job with this key, if any, has finished."""
+        with self._lock:
+            future = self._in_flight.get(key)
+        if future is not None:
+            future.exception(timeout)
+
+    def shutdown(self, *, wait: bool = True):
+        """Stop accepting jobs and, by default, wait for the scheduled ones to finish."""
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, key: Hashable, func: Callable, *args, **kwargs):
+        try:
+            func(*args, **kwargs)
+        except Exception:
+            logger.exception("Background job %r failed", key)
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
@@ -17,7 +17,7 @@ class Settings(BaseSettings):
     # User Data Files
     USERS_FILE: str = str(DATA_DIR / "users.csv")
     RATINGS_FILE: str = str(DATA_DIR / "ratings.json")
-    RECOMMENDATIONS_FILE: str = str(DATA_DIR / "recommendations.json")
+    RECOMMENDATIONS_FILE: str = str(DATA_DIR / "recommendations.db")
     PENALTIES_FILE: str = str(DATA_DIR / "penalties.json")
     WATCHLIST_FILE: str = str(DATA_DIR / "watchlist.json")
 
@@ -29,6 +29,49 @@ class Settings(BaseSettings):
     MOVIE_INDEX_FILE: str = str(ML_DIR / "movie_id_to_idx.json")
     TFIDF_VECTORIZER_FILE: str = str(ML_DIR / "tfidf_vectorizer.pkl")
 
+    # Recommender engine: "exact" (similarity matrix), "ann" (IVF index over movie features)
+    # or "int8" (features stored as int8, a quarter of the memory, scored in float32 block by block)
+    RECOMMENDER_ENGINE: str = "exact"
+    ANN_PROBES: int = 8
+    # Feature set: "combined" or "reduced" (requires setup_ml_data.py --reduced-dims)
+    RECOMMENDER_FEATURE_SET: str = "combined"
+    # A/B variants of the genre vs. genome weighting: variant name -> genre weight (0-1).
+    # Users are assigned to a variant by a hash of their ID; empty uses the precomputed blend.
+    RECOMMENDER_WEIGHT_VARIANTS: dict[str, float] = {}
+    # Weight of item-item collaborative filtering in personalized recommendations (0 = content only).
+    # Takes effect once scripts/build_cf_neighbors.py has produced the neighbor artifacts.
+    CF_BLEND_WEIGHT: float = 0.0
+    # Personalized recommendations: "content" (similarity to rated movies) or "als"
+    # (matrix factorization, requires scripts/train_als.py; falls back to content until trained)
+    PERSONALIZED_ENGINE: str = "content"
+    # Seconds between checks for new ML artifacts to hot-reload (0 disables the watcher).
+    # Each worker process watches on its own; required for hot reloads with WEB_CONCURRENCY > 1.
+    RECOMMENDER_WATCH_INTERVAL: float = 0
+    # Milliseconds to collect concurrent recommendation queries into one batch (0 disables batching)
+    RECOMMENDER_BATCH_WINDOW_MS: float = 0
+    # Maximum number of queries run together in one batch
+    RECOMMENDER_BATCH_SIZE: int = 64
+    # Threads for background jobs such as refreshing expired recommendation caches
+    BACKGROUND_WORKERS: int = 2
+    # Users whose running profile scores are kept in memory for incremental updates on new ratings
+    # (8 bytes per candidate, about RECOMMENDATIONS_CACHE_DEPTH + 100 each; 0 disables incremental updates)
+    PROFILE_STATE_CACHE_SIZE: int = 256
+    # Number of recommendations cached per user; requests for up to this many are served as a slice
+    RECOMMENDATIONS_CACHE_DEPTH: int = 1000
+    # Batch precompute (scripts/precompute_recommendations.py): worker processes (0 = one per CPU)
+    # and users scored per partition
+    PRECOMPUTE_WORKERS: int = 0
+    PRECOMPUTE_PARTITION_SIZE: int = 500
+    # Maximal Marginal Relevance re-ranking: default weight of novelty vs. relevance (0-1; 0 keeps the
+    # relevance order) and number of top recommendations re-ranked
+    MMR_DIVERSITY: float = 0.0
+    MMR_CANDIDATE_POOL: int = 300
+    # Anonymous session recommendations (POST /recommendations/session) kept in memory, keyed by a
+    # hash of the normalized movie set (0 disables the cache)
+    SESSION_RECOMMENDATIONS_CACHE_SIZE: int = 1024
+    # Users whose active penalties are kept in memory until a penalty of theirs changes (0 disables the cache)
+    ACTIVE_PENALTIES_CACHE_SIZE: int = 4096
+
     # Static Movie Data Files
     MOVIES_CSV: str = str(STATIC_DIR / "movies" / "movies.csv")
     GENOME_SCORES_CSV: str = str(STATIC_DIR / "movies" / "genome-scores.csv")
@@ -10,6 +10,7 @@ from jwt.exceptions import InvalidTokenError
 from app.core.config import settings
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
 
 
 def get_resources(request: Request):
@@ -71,6 +72,29 @@ async def get_current_user(token: str = Depends(oauth2_scheme), resources=Depend
     return {"id": user["id"], "username": username, "role": user["role"]}
 
 
+async def get_optional_current_user(
+    token: str | None = Depends(optional_oauth2_scheme), resources=Depends(get_resources)
+) -> dict | None:
+    """
+    Dependency for endpoints that also serve anonymous users.
+
+    An expired or invalid token, or one for a user that no longer exists, is
+    treated like no token: clients attach whatever token they have stored,
+    and a stale one must not lock a logged-out user out of a public endpoint.
+    Endpoints that need the user for part of a request raise 401 themselves.
+
+    Returns:
+        User dictionary, or None if no valid token was sent
+
+    """
+    if token is None:
+        return None
+    try:
+        return await get_current_user(token, resources)
+    except HTTPException:
+        return None
+
+
 async def get_current_active_user(
     current_user: dict = Depends(get_current_user),
     resources=Depends(get_resources),
@@ -89,7 +113,7 @@ async def get_current_active_user(
         HTTPException: If user has blocking penalties
 
     """
-    active_penalties = resources.penalties_repo.get_active_by_user(current_user["id"])
+    active_penalties = resources.active_penalties.get(current_user["id"])
 
     if active_penalties:
         penalty_reasons = [p["reason"] for p in active_penalties]
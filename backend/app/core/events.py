@@ -0,0 +1,73 @@
+"""
+In-process change events.
+
+Repositories publish an event after each write, and derived data (cached
+recommendations, rating aggregates, insights) subscribes to the events it
+depends on, so it is invalidated or updated when the data changes rather
+than when a TTL runs out.
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+RATING_CREATED = "rating_created"
+RATING_UPDATED = "rating_updated"
+RATING_DELETED = "rating_deleted"
+# All ratings were replaced at once (e.g. by save_data); aggregates must be rebuilt
+RATINGS_RESET = "ratings_reset"
+WATCHLIST_ADDED = "watchlist_added"
+WATCHLIST_REMOVED = "watchlist_removed"
+# Payload is the penalty, or empty when all penalties were replaced at once
+PENALTY_CHANGED = "penalty_changed"
+
+RATING_EVENTS = (RATING_CREATED, RATING_UPDATED, RATING_DELETED, RATINGS_RESET)
+WATCHLIST_EVENTS = (WATCHLIST_ADDED, WATCHLIST_REMOVED)
+
+EventHandler = Callable[[str, dict], None]
+
+
+class EventBus:
+    """
+    Synchronous publish/subscribe of change events.
+
+    Handlers run in the publishing thread, right after the write, and are
+    called as ``handler(event_type, payload)``. The payload is the record
+    that changed. A failing handler is logged and does not affect the
+    write or the other handlers.
+    """
+
+    def __init__(self):
+        self._handlers: dict[str, list[EventHandler]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def subscribe(self, event_types: str | Iterable[str], handler: EventHandler):
+        """Call ``handler`` for every event of the given type or types."""
+        if isinstance(event_types, str):
+            event_types = [event_types]
+        with self._lock:
+            for event_type in event_types:
+                self._handlers[event_type].append(handler)
+
+    def unsubscribe(self, event_types: str | Iterable[str], handler: EventHandler):
+        """Stop calling ``handler`` for the given event type or types."""
+        if isinstance(event_types, str):
+            event_types = [event_types]
+        with self._lock:
+            for event_type in event_types:
+                if handler in self._handlers[event_type]:
+                    self._handlers[event_type].remove(handler)
+
+    def publish(self, event_type: str, payload: dict | None = None):
+        """Deliver an event to its subscribers."""
+        with self._lock:
+            handlers = list(self._handlers.get(event_type, ()))
+
+        for handler in handlers:
+            try:
+                handler(event_type, payload or {})
+            except Exception:
+                logger.exception("Handler %r failed for %s event", handler, event_type)
@@ -0,0 +1,98 @@
+"""Per-genre, per-user rating aggregates kept up to date from rating change events."""
+
+import itertools
+import threading
+from collections.abc import Callable
+
+from app.core.events import RATING_CREATED, RATING_DELETED, RATING_UPDATED, RATINGS_RESET
+
+# Process-wide, so a version is never reused by another GenreStats instance
+_versions = itertools.count(1)
+
+
+class GenreStats:
+    """
+    Rating sum and count of every user in every genre.
+
+    Like ``RatingStats``, the aggregates are built from all ratings on first
+    use and then updated incrementally by ``handle``, so the genre
+    leaderboard never re-reads the ratings store. Ratings of movies without
+    genres are left out. ``version`` changes whenever the aggregates do.
+    """
+
+    def __init__(self, load_ratings: Callable[[], list[dict]], load_movie_genres: Callable[[], dict[int, list[str]]]):
+        self._load_ratings = load_ratings
+        self._load_movie_genres = load_movie_genres
+        self._lock = threading.Lock()
+        self._movie_genres: dict[int, list[str]] | None = None
+        self._genres: dict[str, dict[str, list]] | None = None
+        self._user_counts: dict[str, int] = {}
+        self.version = next(_versions)
+
+    def _genres_of(self, movie_id: int) -> list[str]:
+        if self._movie_genres is None:
+            self._movie_genres = {
+                int(movie_id): [genre for genre in genres if genre]
+                for movie_id, genres in self._load_movie_genres().items()
+            }
+        return self._movie_genres.get(int(movie_id), [])
+
+    def _ensure_loaded(self):
+        if self._genres is not None:
+            return
+        self._genres, self._user_counts = {}, {}
+        for r in self._load_ratings():
+            self._add(str(r["user_id"]), int(r["movie_id"]), float(r["rating"]), 1)
+
+    def _add(self, user_id: str, movie_id: int, rating: float, count: int):
+        genres = self._genres_of(movie_id)
+        if not genres:
+            return
+        self._user_counts[user_id] = self._user_counts.get(user_id, 0) + count
+        if self._user_counts[user_id] <= 0:
+            del self._user_counts[user_id]
+        for genre in genres:
+            users = self._genres.setdefault(genre, {})
+            totals = users.setdefault(user_id, [0.0, 0])
+            totals[0] += rating * count
+            totals[1] += count
+            if totals[1] <= 0:
+                del users[user_id]
+                if not users:
+                    del self._genres[genre]
+
+    def handle(self, event_type: str, payload: dict):
+        """Apply a rating event to the aggregates."""
+        with self._lock:
+            self.version = next(_versions)
+            if event_type == RATINGS_RESET:
+                self._genres = None
+            # Not loaded yet: the first read will include this change
+            if self._genres is None:
+                return
+
+            user_id, movie_id = str(payload["user_id"]), int(payload["movie_id"])
+            if event_type == RATING_CREATED:
+                self._add(user_id, movie_id, float(payload["rating"]), 1)
+            elif event_type == RATING_DELETED:
+                self._add(user_id, movie_id, float(payload["rating"]), -1)
+            elif event_type == RATING_UPDATED:
+                delta = float(payload["rating"]) - float(payload["previous_rating"])
+                for genre in self._genres_of(movie_id):
+                    self._genres[genre][user_id][0] += delta
+
+    def snapshot(self) -> tuple[dict[str, dict[str, tuple[float, int]]], dict[str, int]]:
+        """
+        Copy of the aggregates.
+
+        Returns:
+            (rating sum and count per user, per genre) and the number of
+            ratings of movies with genres per user.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            genres = {
+                genre: {user_id: (total, count) for user_id, (total, count) in users.items()}
+                for genre, users in self._genres.items()
+            }
+            return genres, dict(self._user_counts)
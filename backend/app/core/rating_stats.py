@@ -0,0 +1,78 @@
+"""Per-movie rating aggregates kept up to date from rating change events."""
+
+import itertools
+import threading
+from collections.abc import Callable
+
+from app.core.events import RATING_CREATED, RATING_DELETED, RATING_UPDATED, RATINGS_RESET
+
+# Process-wide, so a version is never reused by another RatingStats instance
+_versions = itertools.count(1)
+
+
+class RatingStats:
+    """
+    Rating sum and count of every movie.
+
+    The aggregates are built from all ratings on first use and then updated
+    incrementally by ``handle`` for each rating event, so averages and
+    rankings never re-read the ratings store. ``version`` changes whenever
+    the aggregates do, for caches derived from them.
+    """
+
+    def __init__(self, load_ratings: Callable[[], list[dict]]):
+        self._load_ratings = load_ratings
+        self._lock = threading.Lock()
+        self._sums: dict[int, float] | None = None
+        self._counts: dict[int, int] = {}
+        self.version = next(_versions)
+
+    def _ensure_loaded(self):
+        if self._sums is not None:
+            return
+        sums: dict[int, float] = {}
+        counts: dict[int, int] = {}
+        for r in self._load_ratings():
+            movie_id = int(r["movie_id"])
+            sums[movie_id] = sums.get(movie_id, 0.0) + float(r["rating"])
+            counts[movie_id] = counts.get(movie_id, 0) + 1
+        self._sums, self._counts = sums, counts
+
+    def _add(self, movie_id: int, rating: float, count: int):
+        self._sums[movie_id] = self._sums.get(movie_id, 0.0) + rating * count
+        self._counts[movie_id] = self._counts.get(movie_id, 0) + count
+        if self._counts[movie_id] <= 0:
+            del self._sums[movie_id], self._counts[movie_id]
+
+    def handle(self, event_type: str, payload: dict):
+        """Apply a rating event to the aggregates."""
+        with self._lock:
+            self.version = next(_versions)
+            if event_type == RATINGS_RESET:
+                self._sums = None
+            # Not loaded yet: the first read will include this change
+            if self._sums is None:
+                return
+
+            movie_id = int(payload["movie_id"])
+            if event_type == RATING_CREATED:
+                self._add(movie_id, float(payload["rating"]), 1)
+            elif event_type == RATING_DELETED:
+                self._add(movie_id, float(payload["rating"]), -1)
+            elif event_type == RATING_UPDATED:
+                self._sums[movie_id] += float(payload["rating"]) - float(payload["previous_rating"])
+
+    def average(self, movie_id: int) -> float | None:
+        """Average rating of a movie, rounded to 2 decimals, or None if it has no ratings."""
+        with self._lock:
+            self._ensure_loaded()
+            count = self._counts.get(movie_id)
+            if not count:
+                return None
+            return round(self._sums[movie_id] / count, 2)
+
+    def movie_stats(self) -> dict[int, tuple[float, int]]:
+        """Snapshot of (rating sum, rating count) per rated movie."""
+        with self._lock:
+            self._ensure_loaded()
+            return {movie_id: (total, self._counts[movie_id]) for movie_id, total in self._sums.items()}
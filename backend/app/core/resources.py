@@ -4,6 +4,15 @@ from typing import Optional
 
 from argon2 import PasswordHasher
 
+from app.core.active_penalties import ActivePenalties
+from app.core.background import BackgroundRunner
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.events import PENALTY_CHANGED, RATING_EVENTS, RATINGS_RESET, WATCHLIST_EVENTS, EventBus
+from app.core.genre_stats import GenreStats
+from app.core.rating_stats import RatingStats
+from app.ml.batcher import BatchingRecommender
+from app.ml.manifest import artifact_version
 from app.ml.recommender import MovieRecommender
 from app.repositories.genome_repo import GenomeRepository
 from app.repositories.movies_repo import MoviesRepository
@@ -40,30 +49,182 @@ class SingletonResources:
                 return
 
             logger.info("Initializing singleton resources...")
+            self.event_bus = EventBus()
             self.users_repo = UsersRepository()
             self.movies_repo = MoviesRepository()
-            self.ratings_repo = RatingsRepository()
-            self.watchlist_repo = WatchlistRepository()
+            self.ratings_repo = RatingsRepository(event_bus=self.event_bus)
+            self.watchlist_repo = WatchlistRepository(event_bus=self.event_bus)
             self.recommendations_repo = RecommendationsRepository()
-            self.penalties_repo = PenaltiesRepository()
+            self.penalties_repo = PenaltiesRepository(event_bus=self.event_bus)
             self.genome_repo = GenomeRepository()
             self.user_insights_repo = UserInsightsRepository()
 
             self.password_hasher = PasswordHasher()
+            self.background = BackgroundRunner(max_workers=settings.BACKGROUND_WORKERS)
+            # Long batch jobs (the recommendations precompute) get their own thread, so they never hold
+            # the workers that refresh stale caches for requests
+            self.batch_jobs = BackgroundRunner(max_workers=1, name="batch")
+            self.profile_states = LRUCache(maxsize=settings.PROFILE_STATE_CACHE_SIZE)
+            self.session_recommendations = LRUCache(maxsize=settings.SESSION_RECOMMENDATIONS_CACHE_SIZE)
 
-            self._recommender = None
+            # Derived data follows the change events instead of expiring on a TTL
+            self.rating_stats = RatingStats(lambda: self.ratings_repo.get_all())
+            self.event_bus.subscribe(RATING_EVENTS, self.rating_stats.handle)
+            self.genre_stats = GenreStats(lambda: self.ratings_repo.get_all(), self._movie_genres)
+            self.event_bus.subscribe(RATING_EVENTS, self.genre_stats.handle)
+            self.event_bus.subscribe(RATING_EVENTS, self._invalidate_user_caches)
+            # The watchlist filter is applied per request, so watchlist changes leave cached recommendations valid
+            self.event_bus.subscribe(WATCHLIST_EVENTS, self._invalidate_user_insights)
+            self.active_penalties = ActivePenalties(
+                lambda user_id: self.penalties_repo.get_active_by_user(user_id),
+                maxsize=settings.ACTIVE_PENALTIES_CACHE_SIZE,
+            )
+            self.event_bus.subscribe(PENALTY_CHANGED, self.active_penalties.handle)
+            self.event_bus.subscribe(RATINGS_RESET, lambda _event_type, _payload: self.profile_states.clear())
+
+            self._recommender: MovieRecommender | BatchingRecommender | None = None
+            self._recommender_lock = threading.Lock()
+            self._reload_lock = threading.Lock()
+            self._reload_thread: threading.Thread | None = None
+            self._last_reload_error: str | None = None
+
+            self._watcher_stop = threading.Event()
+            self._watcher: threading.Thread | None = None
+            if settings.RECOMMENDER_WATCH_INTERVAL > 0:
+                self._watcher = threading.Thread(
+                    target=self._watch_artifacts,
+                    args=(settings.RECOMMENDER_WATCH_INTERVAL,),
+                    name="recommender-watcher",
+                    daemon=True,
+                )
+                self._watcher.start()
 
             SingletonResources._initialized = True
             logger.info("Singleton resources initialized successfully")
 
+    def _invalidate_user_caches(self, _event_type: str, payload: dict):
+        """Mark the cached recommendations and insights of the user whose ratings changed as stale."""
+        user_id = payload.get("user_id")
+        if user_id is None:
+            return
+        self.recommendations_repo.mark_stale(user_id)
+        self.user_insights_repo.clear_for_user(user_id)
+
+    def _invalidate_user_insights(self, _event_type: str, payload: dict):
+        """Clear the stored insights of the user whose watchlist changed."""
+        user_id = payload.get("user_id")
+        if user_id is not None:
+            self.user_insights_repo.clear_for_user(user_id)
+
+    def _movie_genres(self) -> dict[int, list[str]]:
+        movies_df = self.movies_repo.movies_df
+        return dict(zip(movies_df["movie_id"], movies_df["genres"], strict=True))
+
+    @staticmethod
+    def _load_recommender() -> MovieRecommender | BatchingRecommender:
+        recommender = MovieRecommender(
+            data_dir=str(settings.ML_DIR),
+            engine=settings.RECOMMENDER_ENGINE,
+            ann_probes=settings.ANN_PROBES,
+            feature_set=settings.RECOMMENDER_FEATURE_SET,
+        )
+        if settings.RECOMMENDER_BATCH_WINDOW_MS > 0:
+            return BatchingRecommender(
+                recommender, settings.RECOMMENDER_BATCH_WINDOW_MS, settings.RECOMMENDER_BATCH_SIZE
+            )
+        return recommender
+
     @property
     def recommender(self):
         if self._recommender is None:
-            logger.info("Initializing MovieRecommender...")
-            self._recommender = MovieRecommender()
+            with self._recommender_lock:
+                if self._recommender is None:
+                    logger.info("Initializing MovieRecommender...")
+                    self._recommender = self._load_recommender()
         return self._recommender
 
+    @property
+    def recommender_version(self) -> str:
+        """Artifact version of the recommender currently serving requests."""
+        return self.recommender.version
+
+    def reload_recommender(self, *, wait: bool = False) -> bool:
+        """
+        Load the current artifacts into a new recommender in a background thread.
+
+        The new recommender is validated before it replaces the old one, so
+        requests keep being served by the old recommender until the swap and
+        a failed reload leaves it in place.
+        Only this worker process reloads; other uvicorn workers pick up new
+        artifacts through their own watcher (RECOMMENDER_WATCH_INTERVAL).
+
+        Args:
+            wait: Block until the reload has finished
+
+        Returns:
+            False if a reload was already in progress, True otherwise.
+        """
+        with self._reload_lock:
+            if self._reload_thread is not None and self._reload_thread.is_alive():
+                return False
+            self._reload_thread = threading.Thread(target=self._reload, name="recommender-reload", daemon=True)
+            self._reload_thread.start()
+            thread = self._reload_thread
+
+        if wait:
+            thread.join()
+        return True
+
+    def _reload(self):
+        try:
+            recommender = self._load_recommender()
+            recommender.validate()
+        except (OSError, ValueError) as e:
+            self._last_reload_error = str(e)
+            logger.exception("Recommender reload failed, keeping the current recommender")
+            return
+
+        # Swapping the reference is atomic: in-flight requests finish on the recommender they already hold
+        with self._recommender_lock:
+            previous, self._recommender = self._recommender, recommender
+        if isinstance(previous, BatchingRecommender):
+            previous.close()
+        self._last_reload_error = None
+        logger.info("Recommender reloaded with artifact version %s", recommender.version)
+
+    def recommender_status(self) -> dict:
+        """Loaded artifact version and the state of the last reload."""
+        reload_thread = self._reload_thread
+        return {
+            "version": self._recommender.version if self._recommender is not None else None,
+            "available_version": artifact_version(settings.ML_DIR),
+            "reloading": reload_thread is not None and reload_thread.is_alive(),
+            "last_error": self._last_reload_error,
+        }
+
+    def _watch_artifacts(self, interval: float):
+        """Reload the recommender when the artifacts on disk change and then stay unchanged for one interval."""
+        observed = artifact_version(settings.ML_DIR)
+        pending = None
+        while not self._watcher_stop.wait(interval):
+            current = artifact_version(settings.ML_DIR)
+            if current == observed:
+                pending = None
+            elif current != pending:
+                # Wait another interval so a pipeline run still writing files is not picked up half-way
+                pending = current
+            elif self._recommender is None or self.reload_recommender():
+                observed, pending = current, None
+
     def cleanup(self):
         logger.info("Cleaning up singleton resources...")
-        # TODO: Add cleanup logic for repositories/recommender here if needed
+        self._watcher_stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+        if self._reload_thread is not None:
+            self._reload_thread.join()
+        self.background.shutdown()
+        self.batch_jobs.shutdown()
+        if isinstance(self._recommender, BatchingRecommender):
+            self._recommender.close()
         logger.info("Singleton resources cleaned up")
@@ -20,6 +20,7 @@ from app.routers import (
     users,
     watchlist,
 )
+from app.services import recommendations_service
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +38,7 @@ async def lifespan(app: FastAPI):
     if not hasattr(app.state, "resources") or app.state.resources is None:
         logger.info("Initializing new SingletonResources...")
         app.state.resources = SingletonResources()
+        recommendations_service.subscribe_to_rating_changes(app.state.resources)
     else:
         logger.info("SingletonResources already initialized, skipping...")
 
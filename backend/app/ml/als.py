@@ -0,0 +1,172 @@
+"""
+Implicit-feedback matrix factorization with alternating least squares.
+
+Ratings are treated as confidence that a user likes a movie,
+``c = 1 + alpha * rating`` (Hu, Koren and Volinsky). Each half-step solves
+one small positive-definite system per user (or movie) with a Cholesky
+solve; the shared Gram matrix ``Y^T Y`` is computed once per half-step,
+so the large products run multithreaded in BLAS.
+"""
+
+import json
+import logging
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+import numpy as np
+from scipy import linalg, sparse
+
+from app.ml.artifacts import atomic_write, load_array, save_array
+
+logger = logging.getLogger(__name__)
+
+USER_FACTORS_FILE = "als_user_factors.npy"
+ITEM_FACTORS_FILE = "als_item_factors.npy"
+METADATA_FILE = "als_metadata.json"
+
+
+def _least_squares(confidence: sparse.csr_matrix, fixed: np.ndarray, regularization: float, alpha: float) -> np.ndarray:
+    """Solve the factors of every row of ``confidence`` with the other side's factors held fixed."""
+    n_factors = fixed.shape[1]
+    base = fixed.T @ fixed + regularization * np.eye(n_factors, dtype=np.float32)
+    solved = np.zeros((confidence.shape[0], n_factors), dtype=np.float32)
+
+    indptr, indices, data = confidence.indptr, confidence.indices, confidence.data
+    for row in range(confidence.shape[0]):
+        start, stop = indptr[row], indptr[row + 1]
+        if start == stop:
+            continue
+        solved[row] = _solve_row(base, fixed[indices[start:stop]], data[start:stop], alpha)
+
+    return solved
+
+
+def _solve_row(base: np.ndarray, factors: np.ndarray, ratings: np.ndarray, alpha: float) -> np.ndarray:
+    """Factors of one user (or movie) given the factors of the movies (or users) it has ratings with."""
+    extra_confidence = alpha * ratings
+    a = base + (factors.T * extra_confidence) @ factors
+    b = factors.T @ (1 + extra_confidence)
+    return linalg.solve(a, b, assume_a="pos")
+
+
+class ImplicitALS:
+    """
+    Implicit ALS model with user and item factor matrices.
+
+    Users are identified by the IDs the model was trained on; users that are
+    unknown or rated movies after training are folded in from their ratings
+    against the fixed item factors.
+    """
+
+    def __init__(self, factors: int = 64, regularization: float = 0.1, alpha: float = 1.0, iterations: int = 15):
+        self.factors = factors
+        self.regularization = regularization
+        self.alpha = alpha
+        self.iterations = iterations
+        self.user_factors: np.ndarray = np.empty((0, factors), dtype=np.float32)
+        self.item_factors: np.ndarray = np.empty((0, factors), dtype=np.float32)
+        self.user_ids: list = []
+        self.trained_at: datetime | None = None
+        self._user_index: dict[str, int] = {}
+        self._item_gram: np.ndarray | None = None
+
+    def fit(self, ratings: sparse.csr_matrix, user_ids: list, seed: int = 0) -> list[float]:
+        """
+        Train on a user x movie rating matrix.
+
+        Args:
+            ratings: Non-negative ratings, shape (users, movies)
+            user_ids: ID of the user in each row
+            seed: Random seed for the initial item factors
+
+        Returns:
+            Wall-clock seconds of each iteration.
+        """
+        rng = np.random.default_rng(seed)
+        by_user = sparse.csr_matrix(ratings, dtype=np.float32)
+        by_item = by_user.T.tocsr()
+        self.item_factors = (rng.standard_normal((by_user.shape[1], self.factors)) * 0.01).astype(np.float32)
+
+        iteration_seconds = []
+        for iteration in range(self.iterations):
+            start = time.perf_counter()
+            self.user_factors = _least_squares(by_user, self.item_factors, self.regularization, self.alpha)
+            self.item_factors = _least_squares(by_item, self.user_factors, self.regularization, self.alpha)
+            iteration_seconds.append(time.perf_counter() - start)
+            logger.info("ALS iteration %d/%d: %.2f s", iteration + 1, self.iterations, iteration_seconds[-1])
+
+        self.user_ids = [str(u) for u in user_ids]
+        self._user_index = {u: i for i, u in enumerate(self.user_ids)}
+        self._item_gram = None
+        self.trained_at = datetime.now(UTC)
+        return iteration_seconds
+
+    def save(self, data_dir: Path):
+        """Persist the factors and the trained user IDs next to the other ML artifacts."""
+        save_array(data_dir / USER_FACTORS_FILE, self.user_factors)
+        save_array(data_dir / ITEM_FACTORS_FILE, self.item_factors)
+        metadata = {
+            "factors": self.factors,
+            "regularization": self.regularization,
+            "alpha": self.alpha,
+            "iterations": self.iterations,
+            "trained_at": self.trained_at.isoformat() if self.trained_at else None,
+            "user_ids": self.user_ids,
+        }
+        with atomic_write(data_dir / METADATA_FILE, "w", encoding="utf-8") as f:
+            json.dump(metadata, f)
+
+    @classmethod
+    def load(cls, data_dir: Path, n_movies: int) -> "ImplicitALS":
+        """
+        Memory-map a saved model whose item factors cover ``n_movies`` movies.
+
+        Raises:
+            FileNotFoundError: If a model file is missing.
+            ValueError: If the model files are inconsistent.
+        """
+        metadata_path = data_dir / METADATA_FILE
+        if not metadata_path.exists():
+            raise FileNotFoundError(f"Missing {metadata_path}.")
+        with Path.open(metadata_path, encoding="utf-8") as f:
+            metadata = json.load(f)
+
+        model = cls(metadata["factors"], metadata["regularization"], metadata["alpha"], metadata["iterations"])
+        model.item_factors = load_array(data_dir / ITEM_FACTORS_FILE, ndim=2, rows=n_movies)
+        model.user_factors = load_array(data_dir / USER_FACTORS_FILE, ndim=2, rows=len(metadata["user_ids"]))
+        if model.item_factors.shape[1] != model.factors or model.user_factors.shape[1] != model.factors:
+            raise ValueError(f"ALS factor files do not have {model.factors} factors")
+
+        model.user_ids = metadata["user_ids"]
+        model._user_index = {u: i for i, u in enumerate(model.user_ids)}
+        model.trained_at = datetime.fromisoformat(metadata["trained_at"]) if metadata["trained_at"] else None
+        return model
+
+    def fold_in(self, item_idx: np.ndarray, ratings: np.ndarray) -> np.ndarray:
+        """Factors of a user from their ratings, with the item factors held fixed."""
+        if self._item_gram is None:
+            factors = np.asarray(self.item_factors)
+            self._item_gram = factors.T @ factors + self.regularization * np.eye(self.factors, dtype=np.float32)
+        if len(item_idx) == 0:
+            return np.zeros(self.factors, dtype=np.float32)
+        return _solve_row(
+            self._item_gram, np.asarray(self.item_factors[item_idx]), np.asarray(ratings, dtype=np.float32), self.alpha
+        ).astype(np.float32)
+
+    def user_vector(
+        self, user_id: str, item_idx: np.ndarray, ratings: np.ndarray, updated_at: datetime | None = None
+    ) -> np.ndarray:
+        """
+        Factors of a user: the trained ones if the user has not rated anything
+        since training, otherwise folded in from their current ratings.
+        """
+        row = self._user_index.get(str(user_id))
+        trained_is_current = updated_at is None or (self.trained_at is not None and updated_at <= self.trained_at)
+        if row is not None and trained_is_current:
+            return np.asarray(self.user_factors[row])
+        return self.fold_in(item_idx, ratings)
+
+    def scores(self, user_vector: np.ndarray) -> np.ndarray:
+        """Predicted preference of the user for every movie: one dot product against the item factors."""
+        return np.asarray(self.item_factors) @ user_vector
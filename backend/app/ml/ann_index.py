@@ -0,0 +1,265 @@
+"""
+Approximate nearest-neighbor index over the combined movie features.
+
+Implements an inverted-file (IVF) index: movies are grouped into coarse
+clusters with spherical k-means, and a query only scores the movies in
+its closest ``probes`` clusters instead of the whole catalog.
+"""
+
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.ml.artifacts import load_array, save_array
+
+logger = logging.getLogger(__name__)
+
+CENTROIDS_FILE = "ann_centroids.npy"
+LIST_OFFSETS_FILE = "ann_list_offsets.npy"
+LIST_INDICES_FILE = "ann_list_indices.npy"
+
+ASSIGN_BLOCK_SIZE = 4096
+
+
+def _assign(data: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Assign each row to its most similar centroid, in blocks to bound memory."""
+    labels = np.empty(len(data), dtype=np.int64)
+    for start in range(0, len(data), ASSIGN_BLOCK_SIZE):
+        block = np.asarray(data[start : start + ASSIGN_BLOCK_SIZE], dtype=np.float32)
+        labels[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _spherical_kmeans(data: np.ndarray, n_clusters: int, n_iter: int, rng: np.random.Generator) -> np.ndarray:
+    """Cluster L2-normalized rows by cosine similarity and return unit-length centroids."""
+    centroids = data[rng.choice(len(data), n_clusters, replace=False)].copy()
+
+    for _ in range(n_iter):
+        labels = _assign(data, centroids)
+        counts = np.bincount(labels, minlength=n_clusters)
+
+        order = np.argsort(labels, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        non_empty = counts > 0
+
+        sums = np.zeros_like(centroids)
+        sums[non_empty] = np.add.reduceat(data[order], starts[non_empty], axis=0)
+
+        # Re-seed empty clusters with random points so every list stays useful
+        empty = ~non_empty
+        if empty.any():
+            sums[empty] = data[rng.choice(len(data), int(empty.sum()), replace=False)]
+
+        centroids = _normalize_rows(sums).astype(np.float32)
+
+    return centroids
+
+
+class IVFIndex:
+    """
+    Inverted-file index with k-means coarse clusters.
+
+    The inverted lists are stored CSR-style: the catalog indices of
+    cluster ``c`` are ``list_indices[list_offsets[c]:list_offsets[c + 1]]``.
+    Candidates are re-scored exactly against ``features``, the matrix the
+    index was built from.
+    """
+
+    def __init__(self, centroids: np.ndarray, list_offsets: np.ndarray, list_indices: np.ndarray, features: np.ndarray):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_indices = list_indices
+        self.features = features
+
+    @property
+    def n_clusters(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(
+        cls,
+        features: np.ndarray,
+        n_clusters: int | None = None,
+        n_iter: int = 15,
+        sample_size: int = 20000,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        """
+        Train coarse clusters on a sample of the features and index every movie.
+
+        Args:
+            features: L2-normalized feature matrix (movies x dims)
+            n_clusters: Number of coarse clusters (default: sqrt of catalog size)
+            n_iter: Number of k-means iterations
+            sample_size: Number of movies used to train the clusters
+            seed: Random seed for reproducible builds
+
+        Returns:
+            The built index.
+        """
+        n_movies = len(features)
+        if n_clusters is None:
+            n_clusters = max(1, int(np.sqrt(n_movies)))
+        n_clusters = min(n_clusters, n_movies)
+
+        rng = np.random.default_rng(seed)
+        sample_idx = np.sort(rng.choice(n_movies, min(sample_size, n_movies), replace=False))
+        sample = np.asarray(features[sample_idx], dtype=np.float32)
+
+        logger.info("Training %d coarse clusters on %d of %d movies...", n_clusters, len(sample), n_movies)
+        centroids = _spherical_kmeans(sample, min(n_clusters, len(sample)), n_iter, rng)
+
+        return cls.from_centroids(centroids, features)
+
+    @classmethod
+    def from_centroids(cls, centroids: np.ndarray, features: np.ndarray) -> "IVFIndex":
+        """Index ``features`` against existing clusters, e.g. after new movies were appended, without retraining."""
+        centroids = np.asarray(centroids, dtype=np.float32)
+        labels = _assign(features, centroids)
+        counts = np.bincount(labels, minlength=len(centroids))
+        list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        list_indices = np.argsort(labels, kind="stable").astype(np.int64)
+
+        return cls(centroids, list_offsets, list_indices, features)
+
+    def save(self, data_dir: Path):
+        """Persist the index next to the other ML artifacts."""
+        save_array(data_dir / CENTROIDS_FILE, self.centroids)
+        save_array(data_dir / LIST_OFFSETS_FILE, self.list_offsets)
+        save_array(data_dir / LIST_INDICES_FILE, self.list_indices)
+
+    @classmethod
+    def load(cls, data_dir: Path, features: np.ndarray) -> "IVFIndex":
+        """
+        Memory-map a previously saved index built from ``features``.
+
+        Raises:
+            FileNotFoundError: If an index file is missing.
+            ValueError: If the index files are inconsistent.
+        """
+        centroids = load_array(data_dir / CENTROIDS_FILE, ndim=2)
+        list_offsets = load_array(data_dir / LIST_OFFSETS_FILE, ndim=1, rows=len(centroids) + 1, kind="iu")
+        list_indices = load_array(data_dir / LIST_INDICES_FILE, ndim=1, rows=len(features), kind="iu")
+
+        if list_offsets[-1] != len(list_indices):
+            raise ValueError(f"{LIST_OFFSETS_FILE} does not match {LIST_INDICES_FILE}")
+        if centroids.shape[1] != features.shape[1]:
+            raise ValueError(f"{CENTROIDS_FILE} has {centroids.shape[1]} dims, features have {features.shape[1]}")
+
+        return cls(centroids, list_offsets, list_indices, features)
+
+    def candidates(self, query_scores: np.ndarray, probes: int) -> np.ndarray:
+        """Catalog indices of the movies in the ``probes`` clusters with the highest scores."""
+        probes = min(probes, self.n_clusters)
+        clusters = np.argpartition(-query_scores, probes - 1)[:probes]
+        return np.concatenate(
+            [self.list_indices[self.list_offsets[c] : self.list_offsets[c + 1]] for c in clusters]
+        ).astype(np.intp)
+
+    def search(
+        self,
+        queries: np.ndarray,
+        n: int,
+        probes: int,
+        exclude: np.ndarray | None = None,
+        query_idx: np.ndarray | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the approximate top N movies for each query vector.
+
+        Args:
+            queries: Query vectors of shape (rows, dims)
+            n: Number of results per query
+            probes: Number of coarse clusters to scan per query
+            exclude: Optional boolean mask over the catalog of movies to skip
+            query_idx: Optional catalog index per query to skip (the query movie itself)
+
+        Returns:
+            Tuple of (indices, scores), each of shape (rows, n), best first.
+            Missing results are padded with index -1 and score -inf.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        top_idx = np.full((len(queries), n), -1, dtype=np.intp)
+        top_scores = np.full((len(queries), n), -np.inf, dtype=np.float32)
+
+        centroid_scores = queries @ self.centroids.T
+        for row, query in enumerate(queries):
+            cand = self.candidates(centroid_scores[row], probes)
+
+            keep = np.ones(len(cand), dtype=bool)
+            if exclude is not None:
+                keep &= ~exclude[cand]
+            if query_idx is not None:
+                keep &= cand != query_idx[row]
+            cand = cand[keep]
+
+            scores = np.asarray(self.features[cand], dtype=np.float32) @ query
+            if len(cand) > n:
+                best = np.argpartition(-scores, n - 1)[:n]
+                cand, scores = cand[best], scores[best]
+
+            order = np.argsort(-scores, kind="stable")
+            top_idx[row, : len(cand)] = cand[order]
+            top_scores[row, : len(cand)] = scores[order]
+
+        return top_idx, top_scores
+
+
+def recall_report(
+    index: IVFIndex,
+    k: int = 10,
+    probes_options: tuple[int, ...] = (1, 2, 4, 8, 16, 32),
+    n_queries: int = 200,
+) -> list[dict]:
+    """
+    Measure recall@K and per-query latency of the index against exact search.
+
+    Args:
+        index: The index to evaluate
+        k: Number of neighbors compared per query
+        probes_options: Probe counts to evaluate
+        n_queries: Number of random movies used as queries
+
+    Returns:
+        One dict per configuration with engine, probes, recall and latency_ms.
+    """
+    features = index.features
+    rng = np.random.default_rng(0)
+    query_idx = rng.choice(len(features), min(n_queries, len(features)), replace=False)
+    queries = np.asarray(features[query_idx], dtype=np.float32)
+
+    start = time.perf_counter()
+    exact_scores = queries @ np.asarray(features, dtype=np.float32).T
+    exact_scores[np.arange(len(query_idx)), query_idx] = -np.inf
+    k = min(k, len(features) - 1)
+    exact_top = np.argpartition(-exact_scores, k - 1, axis=1)[:, :k]
+    exact_ms = (time.perf_counter() - start) * 1000 / len(query_idx)
+
+    report = [{"engine": "exact", "probes": None, "recall": 1.0, "latency_ms": round(exact_ms, 3)}]
+
+    for probes in probes_options:
+        start = time.perf_counter()
+        ann_top, _ = index.search(queries, k, probes, query_idx=query_idx)
+        ann_ms = (time.perf_counter() - start) * 1000 / len(query_idx)
+
+        hits = sum(
+            len(np.intersect1d(exact_row, ann_row)) for exact_row, ann_row in zip(exact_top, ann_top, strict=True)
+        )
+        report.append(
+            {
+                "engine": "ann",
+                "probes": probes,
+                "recall": round(hits / (k * len(query_idx)), 4),
+                "latency_ms": round(ann_ms, 3),
+            }
+        )
+
+    return report
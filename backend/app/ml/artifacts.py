@@ -0,0 +1,130 @@
+"""
+Helpers for loading and writing the artifacts produced by the ML pipeline.
+
+Arrays are memory-mapped read-only, so every worker process shares one
+page-cache copy of the data instead of holding a private one. Because a
+serving process may have a file mapped while the pipeline rebuilds it,
+artifacts are never rewritten in place: they are written to a temporary
+file that then replaces the old one, and mapped readers keep the old data
+until they reload.
+"""
+
+import logging
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def read_npy_header(path: Path) -> tuple[tuple[int, ...], np.dtype]:
+    """
+    Read the shape and dtype of a .npy file without loading its data.
+
+    Raises:
+        ValueError: If the file is not a supported .npy file.
+    """
+    with Path.open(path, "rb") as f:
+        try:
+            version = np.lib.format.read_magic(f)
+        except ValueError as e:
+            raise ValueError(f"{path.name} is not a valid .npy file: {e}") from e
+
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        elif version == (2, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        else:
+            raise ValueError(f"{path.name} uses unsupported .npy format version {version}")
+
+    if fortran_order:
+        raise ValueError(f"{path.name} is stored in Fortran order; expected C order")
+    if dtype.hasobject:
+        raise ValueError(f"{path.name} contains Python objects and cannot be memory-mapped")
+
+    return shape, dtype
+
+
+def load_array(
+    path: Path,
+    *,
+    ndim: int | None = None,
+    rows: int | None = None,
+    kind: str = "f",
+) -> np.ndarray:
+    """
+    Validate the header of a .npy artifact and memory-map it read-only.
+
+    Args:
+        path: Path to the .npy file
+        ndim: Expected number of dimensions, if any
+        rows: Expected length of the first axis, if any
+        kind: Accepted dtype kinds (see ``numpy.dtype.kind``), e.g. "f" or "iu"
+
+    Returns:
+        A read-only ``np.memmap`` over the file.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If the header does not match the expected layout.
+    """
+    if not path.exists():
+        raise FileNotFoundError(f"Missing {path}.")
+
+    shape, dtype = read_npy_header(path)
+
+    if ndim is not None and len(shape) != ndim:
+        raise ValueError(f"{path.name} has {len(shape)} dimensions, expected {ndim}")
+    if rows is not None and (not shape or shape[0] != rows):
+        raise ValueError(f"{path.name} has shape {shape}, expected {rows} rows")
+    if dtype.kind not in kind:
+        raise ValueError(f"{path.name} has dtype {dtype}, expected kind '{kind}'")
+
+    return np.load(path, mmap_mode="r")
+
+
+@contextmanager
+def atomic_write(path: Path, mode: str = "wb", **kwargs) -> Iterator[IO]:
+    """
+    Open a temporary file next to ``path`` that replaces it once the block exits.
+
+    The data is fsynced before it is renamed over ``path``, so the path always holds
+    either the old or the complete new file. Truncating a file in place
+    would crash any process that has it memory-mapped with SIGBUS. On an
+    exception the temporary file is removed and ``path`` is left untouched.
+
+    Args:
+        path: Destination file
+        mode: Write mode for ``open``, e.g. "wb" or "w"
+        **kwargs: Further arguments for ``open``, e.g. ``encoding``
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        with Path.open(tmp_path, mode, **kwargs) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        tmp_path.replace(path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def save_array(path: Path, array: np.ndarray):
+    """Write a .npy artifact without touching the file readers may have mapped (see ``atomic_write``)."""
+    with atomic_write(path) as f:
+        np.save(f, array)
+
+
+def mapped_nbytes(*arrays: np.ndarray | None) -> int:
+    """Total size of the given arrays that are backed by a memory map."""
+    return sum(a.nbytes for a in arrays if isinstance(a, np.memmap))
+
+
+def resident_nbytes(*arrays: np.ndarray | None) -> int:
+    """Total size of the given arrays that live in process-private memory."""
+    return sum(a.nbytes for a in arrays if a is not None and not isinstance(a, np.memmap))
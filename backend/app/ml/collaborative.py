@@ -0,0 +1,153 @@
+"""
+Item-item collaborative filtering from user ratings.
+
+Ratings are mean-centered per user and each movie's rating column is
+L2-normalized, so the dot product of two columns is their adjusted cosine
+similarity. Only the top K neighbors of each movie are kept, computed a
+block of movies at a time so memory stays bounded by the block size
+rather than growing with the square of the catalog.
+"""
+
+import logging
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from app.ml.artifacts import save_array
+
+logger = logging.getLogger(__name__)
+
+NEIGHBOR_IDX_FILE = "cf_neighbor_idx.npy"
+NEIGHBOR_SIM_FILE = "cf_neighbor_sim.npy"
+
+# Compact dtypes for a MovieLens-style ratings.csv
+RATING_DTYPES = {"user_id": np.int32, "movie_id": np.int32, "rating": np.float32}
+RATINGS_CHUNK_SIZE = 5_000_000
+
+
+def read_ratings_csv(path: Path, chunksize: int = RATINGS_CHUNK_SIZE) -> Iterable[pd.DataFrame]:
+    """Stream a ratings CSV (user_id, movie_id, rating) in chunks with compact dtypes."""
+    return pd.read_csv(path, usecols=list(RATING_DTYPES), dtype=RATING_DTYPES, chunksize=chunksize)
+
+
+def load_rating_matrix(
+    ratings_chunks: Iterable[pd.DataFrame], movie_id_to_idx: dict[int, int], *, center: bool = True
+) -> tuple[sparse.csr_matrix, np.ndarray]:
+    """
+    Build a user x movie rating matrix.
+
+    Args:
+        ratings_chunks: DataFrames with user_id, movie_id and rating columns
+        movie_id_to_idx: Mapping from movie ID to catalog index; other movies are skipped
+        center: Subtract each user's mean rating from their ratings
+
+    Returns:
+        Tuple of (float32 CSR matrix of shape (users, catalog size), user ID of each row).
+    """
+    n_movies = max(movie_id_to_idx.values(), default=-1) + 1
+    catalog = pd.Series(movie_id_to_idx, dtype=np.int64)
+
+    users, cols, values = [], [], []
+    for chunk in ratings_chunks:
+        movie_idx = chunk["movie_id"].map(catalog)
+        known = movie_idx.notna().to_numpy()
+
+        users.append(chunk["user_id"].to_numpy()[known])
+        cols.append(movie_idx.to_numpy()[known].astype(np.int32))
+        values.append(chunk["rating"].to_numpy(dtype=np.float32)[known])
+
+    if not users:
+        return sparse.csr_matrix((0, n_movies), dtype=np.float32), np.empty(0, dtype=object)
+
+    rows, user_keys = pd.factorize(np.concatenate(users))
+    rows = rows.astype(np.int32)
+    cols = np.concatenate(cols)
+    values = np.concatenate(values)
+
+    n_users = len(user_keys)
+    if center:
+        counts = np.bincount(rows, minlength=n_users)
+        means = np.bincount(rows, weights=values, minlength=n_users) / np.maximum(counts, 1)
+        values -= means[rows].astype(np.float32)
+
+    logger.info("Rating matrix: %d users x %d movies, %d ratings", n_users, n_movies, len(values))
+    matrix = sparse.csr_matrix((values, (rows, cols)), shape=(n_users, n_movies), dtype=np.float32)
+    matrix.sum_duplicates()
+    return matrix, np.asarray(user_keys)
+
+
+def build_rating_matrix(ratings_chunks: Iterable[pd.DataFrame], movie_id_to_idx: dict[int, int]) -> sparse.csr_matrix:
+    """Build a mean-centered user x movie rating matrix (see ``load_rating_matrix``)."""
+    return load_rating_matrix(ratings_chunks, movie_id_to_idx)[0]
+
+
+def item_neighbors(rating_matrix: sparse.spmatrix, k: int = 50, block_size: int = 512) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Top K most similar movies of every movie by adjusted cosine similarity.
+
+    Similarities are computed for ``block_size`` movies at a time, so peak
+    memory is about ``block_size x movies`` floats.
+
+    Returns:
+        Tuple of (indices, similarities), each of shape (movies, k), best
+        first. Missing neighbors (no positive similarity) are index -1 and
+        similarity 0.
+    """
+    items = sparse.csr_matrix(rating_matrix.T, dtype=np.float32)
+    norms = np.sqrt(np.asarray(items.multiply(items).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    items = sparse.csr_matrix(sparse.diags(1 / norms).astype(np.float32) @ items)
+    items_t = items.T.tocsc()
+
+    n_movies = items.shape[0]
+    k = min(k, max(n_movies - 1, 1))
+    neighbor_idx = np.full((n_movies, k), -1, dtype=np.int32)
+    neighbor_sim = np.zeros((n_movies, k), dtype=np.float32)
+
+    for start in range(0, n_movies, block_size):
+        stop = min(start + block_size, n_movies)
+        block = (items[start:stop] @ items_t).toarray()
+        block[np.arange(stop - start), np.arange(start, stop)] = -np.inf  # skip itself
+
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        top_sim = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_sim, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_sim = np.take_along_axis(top_sim, order, axis=1)
+
+        positive = top_sim > 0
+        neighbor_idx[start:stop] = np.where(positive, top, -1)
+        neighbor_sim[start:stop] = np.where(positive, top_sim, 0)
+
+    return neighbor_idx, neighbor_sim
+
+
+def build_and_save(
+    data_dir: Path, ratings_chunks: Iterable[pd.DataFrame], movie_id_to_idx: dict[int, int], k: int = 50
+) -> int:
+    """
+    Build the item-item neighbor lists and save them next to the other ML artifacts.
+
+    Returns:
+        Number of movies with at least one neighbor.
+    """
+    rating_matrix = build_rating_matrix(ratings_chunks, movie_id_to_idx)
+    neighbor_idx, neighbor_sim = item_neighbors(rating_matrix, k=k)
+
+    save_array(data_dir / NEIGHBOR_IDX_FILE, neighbor_idx)
+    save_array(data_dir / NEIGHBOR_SIM_FILE, neighbor_sim)
+
+    return int((neighbor_idx[:, 0] >= 0).sum())
+
+
+def profile_scores(
+    neighbor_idx: np.ndarray, neighbor_sim: np.ndarray, seed_idx: np.ndarray, weights: np.ndarray, n_movies: int
+) -> np.ndarray:
+    """Weighted sum of the seeds' neighbor similarities, scattered over the catalog."""
+    idx = np.asarray(neighbor_idx[seed_idx])
+    sim = np.asarray(neighbor_sim[seed_idx]) * weights[:, np.newaxis]
+    valid = idx >= 0
+    return np.bincount(idx[valid], weights=sim[valid], minlength=n_movies).astype(np.float32)
@@ -5,6 +5,7 @@ Orchestrates preprocessing of MovieLens data.
 import json
 import logging
 import pickle
+from collections.abc import Iterable
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -15,7 +16,8 @@ if TYPE_CHECKING:
     from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.preprocessing import normalize
 
-from app.ml.feature_engineering import genome_processor, genre_processor
+from app.ml.artifacts import atomic_write, save_array
+from app.ml.feature_engineering import dimensionality_reducer, genome_processor, genre_processor
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +33,7 @@ class MovieDataPreprocessor:
         output_dir: str = "data/ml",
         genre_weight: float = 0.3,
         genome_weight: float = 0.7,
+        reduced_dims: int | None = None,
     ):
         """
         Initialize preprocessor.
@@ -40,6 +43,7 @@ class MovieDataPreprocessor:
             output_dir: Path to save processed data
             genre_weight: Weight for genre features (0-1)
             genome_weight: Weight for genome features (0-1)
+            reduced_dims: If set, also save features reduced to this many dims with TruncatedSVD
 
         """
         self.data_path = Path(data_path)
@@ -56,10 +60,14 @@ class MovieDataPreprocessor:
         self.genre_weight = genre_weight / total
         self.genome_weight = genome_weight / total
 
+        if reduced_dims is not None and reduced_dims < 1:
+            raise ValueError("Reduced dims must be positive")
+        self.reduced_dims = reduced_dims
+
         logger.info("Using weights: Genre=%.2f, Genome=%.2f", self.genre_weight, self.genome_weight)
 
-    def load_data(self) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
-        """Load movies, genome scores, and genome tags."""
+    def load_data(self) -> tuple[pd.DataFrame, Iterable[pd.DataFrame], pd.DataFrame]:
+        """Load movies and genome tags, and open genome scores as a chunked reader."""
         logger.info("Loading data...")
 
         movies_path = self.data_path / "movies.csv"
@@ -70,14 +78,14 @@ class MovieDataPreprocessor:
         genome_scores_path = self.data_path / "genome-scores.csv"
         if not genome_scores_path.exists():
             raise FileNotFoundError(f"Genome scores not found at {genome_scores_path}")
-        genome_scores_df = pd.read_csv(genome_scores_path, encoding="utf-8")
+        genome_scores = genome_processor.read_genome_scores(genome_scores_path)
 
         genome_tags_path = self.data_path / "genome-tags.csv"
         if not genome_tags_path.exists():
             raise FileNotFoundError(f"Genome tags not found at {genome_tags_path}")
         genome_tags_df = pd.read_csv(genome_tags_path, encoding="utf-8")
 
-        return movies_df, genome_scores_df, genome_tags_df
+        return movies_df, genome_scores, genome_tags_df
 
     def combine_features(self, genre_matrix: np.ndarray, genome_matrix: np.ndarray) -> np.ndarray:
         """
@@ -102,6 +110,20 @@ class MovieDataPreprocessor:
 
         return normalize(combined, norm="l2", axis=1)
 
+    def save_feature_blocks(self, genre_matrix: np.ndarray, genome_matrix: np.ndarray, *, append: bool = False):
+        """
+        Save the L2-normalized genre and genome blocks separately, unweighted.
+
+        The recommender blends their similarities with per-request weights,
+        so trying a different blend does not require rerunning the pipeline.
+        """
+        for name, block in (("genre_features.npy", genre_matrix), ("genome_features.npy", genome_matrix)):
+            path = self.output_dir / name
+            normalized = normalize(block, norm="l2", axis=1).astype(np.float32)
+            if append:
+                normalized = np.vstack([np.load(path), normalized])
+            save_array(path, normalized)
+
     def save_processed_data(
         self,
         movies_df: pd.DataFrame,
@@ -110,31 +132,153 @@ class MovieDataPreprocessor:
     ):
         """Save all processed data and models."""
         movies_clean_path = self.output_dir / "movies_clean.csv"
-        movies_df[["movie_id", "title", "genres"]].to_csv(movies_clean_path, index=False)
+        with atomic_write(movies_clean_path, "w", newline="") as f:
+            movies_df[["movie_id", "title", "genres"]].to_csv(f, index=False)
 
         combined_path = self.output_dir / "combined_features.npy"
-        np.save(combined_path, combined_matrix)
+        save_array(combined_path, combined_matrix)
 
         vectorizer_path = self.output_dir / "tfidf_vectorizer.pkl"
-        with Path.open(vectorizer_path, "wb") as f:
+        with atomic_write(vectorizer_path) as f:
             pickle.dump(tfidf_vectorizer, f)
 
         movie_id_to_idx = pd.Series(range(len(movies_df)), index=movies_df["movie_id"]).to_dict()
 
         mapping_path = self.output_dir / "movie_id_to_idx.json"
-        with Path.open(mapping_path, "w") as f:
+        with atomic_write(mapping_path, "w") as f:
+            json.dump(movie_id_to_idx, f)
+
+    def reduce_dimensions(self, combined_matrix: np.ndarray) -> dict:
+        """
+        Save an SVD-reduced copy of the combined features alongside the full ones.
+
+        Returns:
+            Report with the number of components, explained variance and
+            top-10 ranking overlap with the full features.
+        """
+        reduced_matrix, svd = dimensionality_reducer.reduce_features(combined_matrix, self.reduced_dims)
+        overlap = dimensionality_reducer.ranking_overlap(combined_matrix, reduced_matrix, k=10)
+
+        save_array(self.output_dir / "reduced_features.npy", reduced_matrix)
+        save_array(self.output_dir / "svd_components.npy", svd.components_.astype(np.float32))
+
+        report = {
+            "n_components": reduced_matrix.shape[1],
+            "explained_variance": float(svd.explained_variance_ratio_.sum()),
+            "ranking_overlap_at_10": overlap,
+        }
+        logger.info(
+            "Reduced features: %d dims, %.2f%% variance explained, %.2f%% top-10 overlap with full features",
+            report["n_components"],
+            report["explained_variance"] * 100,
+            report["ranking_overlap_at_10"] * 100,
+        )
+        return report
+
+    @property
+    def params(self) -> dict:
+        """Parameters that determine the produced artifacts, as recorded in the manifest."""
+        return {
+            "genre_weight": self.genre_weight,
+            "genome_weight": self.genome_weight,
+            "max_features": genre_processor.MAX_FEATURES,
+            "reduced_dims": self.reduced_dims,
+        }
+
+    @staticmethod
+    def _existing_rows_unchanged(existing_df: pd.DataFrame, movies_df: pd.DataFrame) -> bool:
+        """Whether every previously processed movie is still in movies.csv with the same title and genres."""
+        if not existing_df["movie_id"].isin(movies_df["movie_id"]).all():
+            logger.info("Movies were removed since the last run; a full rebuild is needed.")
+            return False
+
+        current = movies_df.set_index("movie_id").loc[existing_df["movie_id"], ["title", "genres"]]
+        if not current.reset_index(drop=True).equals(existing_df[["title", "genres"]]):
+            logger.info("Existing movies were edited since the last run; a full rebuild is needed.")
+            return False
+        return True
+
+    def append_new_movies(self) -> int | None:
+        """
+        Append feature rows for movies added to movies.csv since the last run.
+
+        Existing rows are left untouched and the fitted TF-IDF vectorizer is
+        reused rather than refitted, so only the new movies are processed.
+
+        Returns:
+            Number of appended movies, or None if the saved artifacts cannot be
+            extended (e.g. movies were removed or edited) and a full rebuild is needed.
+        """
+        movies_clean_path = self.output_dir / "movies_clean.csv"
+        combined_path = self.output_dir / "combined_features.npy"
+        vectorizer_path = self.output_dir / "tfidf_vectorizer.pkl"
+        mapping_path = self.output_dir / "movie_id_to_idx.json"
+        block_paths = [self.output_dir / "genre_features.npy", self.output_dir / "genome_features.npy"]
+        if not all(p.exists() for p in (movies_clean_path, combined_path, vectorizer_path, mapping_path, *block_paths)):
+            return None
+
+        movies_df, genome_scores, genome_tags_df = self.load_data()
+        existing_df = pd.read_csv(movies_clean_path)
+
+        if not self._existing_rows_unchanged(existing_df, movies_df):
+            return None
+
+        new_movies_df = movies_df[~movies_df["movie_id"].isin(existing_df["movie_id"])]
+        if new_movies_df.empty:
+            return 0
+
+        with Path.open(vectorizer_path, "rb") as f:
+            tfidf_vectorizer = pickle.load(f)  # noqa: S301 - artifact written by this pipeline
+
+        genre_matrix, new_movies_df = genre_processor.transform_genres(new_movies_df, tfidf_vectorizer)
+        if new_movies_df.empty:
+            return 0
+
+        combined_matrix = np.load(combined_path)
+        genome_matrix = genome_processor.create_genome_features(new_movies_df, genome_scores, genome_tags_df["tag_id"])
+        if genre_matrix.shape[1] + genome_matrix.shape[1] != combined_matrix.shape[1]:
+            logger.info("Feature dimensions changed; a full rebuild is needed.")
+            return None
+
+        new_rows = self.combine_features(genre_matrix, genome_matrix).astype(np.float32)
+        save_array(combined_path, np.vstack([combined_matrix, new_rows]))
+        self.save_feature_blocks(genre_matrix, genome_matrix, append=True)
+
+        reduced_path = self.output_dir / "reduced_features.npy"
+        if self.reduced_dims is not None and reduced_path.exists():
+            components = np.load(self.output_dir / "svd_components.npy")
+            reduced_rows = normalize(new_rows @ components.T, norm="l2", axis=1).astype(np.float32)
+            save_array(reduced_path, np.vstack([np.load(reduced_path), reduced_rows]))
+
+        with atomic_write(movies_clean_path, "w", newline="") as f:
+            pd.concat([existing_df, new_movies_df[["movie_id", "title", "genres"]]]).to_csv(f, index=False)
+
+        with Path.open(mapping_path) as f:
+            movie_id_to_idx = json.load(f)
+        start = len(existing_df)
+        movie_id_to_idx.update({str(mid): start + i for i, mid in enumerate(new_movies_df["movie_id"])})
+        with atomic_write(mapping_path, "w") as f:
             json.dump(movie_id_to_idx, f)
 
+        logger.info("Appended %d new movies to the feature matrices", len(new_movies_df))
+        return len(new_movies_df)
+
     def run_preprocessing(self):
         """Run full preprocessing pipeline."""
-        movies_df, genome_scores_df, _ = self.load_data()
+        movies_df, genome_scores, genome_tags_df = self.load_data()
 
         genre_matrix, tfidf_vectorizer, movies_filtered_df = genre_processor.create_genre_features(movies_df)
 
-        genome_matrix = genome_processor.create_genome_features(movies_filtered_df, genome_scores_df)
+        genome_matrix = genome_processor.create_genome_features(
+            movies_filtered_df, genome_scores, genome_tags_df["tag_id"]
+        )
 
         combined_matrix = self.combine_features(genre_matrix, genome_matrix)
 
         combined_matrix = combined_matrix.astype(np.float32)
 
         self.save_processed_data(movies_filtered_df, combined_matrix, tfidf_vectorizer)
+        self.save_feature_blocks(genre_matrix, genome_matrix)
+
+        if self.reduced_dims is not None:
+            self.reduce_dimensions(combined_matrix)
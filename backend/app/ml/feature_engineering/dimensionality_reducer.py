@@ -0,0 +1,53 @@
+"""
+Handles optional dimensionality reduction of the combined feature matrix.
+"""
+
+import logging
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+
+logger = logging.getLogger(__name__)
+
+
+def reduce_features(combined_matrix: np.ndarray, n_components: int) -> tuple[np.ndarray, TruncatedSVD]:
+    """
+    Project combined features onto their top singular vectors.
+
+    Returns:
+        - The reduced, L2-normalized float32 feature matrix
+        - The fitted TruncatedSVD (its ``components_`` project new movies)
+
+    """
+    n_components = min(n_components, combined_matrix.shape[1] - 1)
+    logger.info("Reducing %d feature dims to %d with TruncatedSVD...", combined_matrix.shape[1], n_components)
+
+    svd = TruncatedSVD(n_components=n_components, random_state=0)
+    reduced = svd.fit_transform(combined_matrix)
+
+    logger.info("Explained variance: %.2f%%", svd.explained_variance_ratio_.sum() * 100)
+
+    return normalize(reduced, norm="l2", axis=1).astype(np.float32), svd
+
+
+def ranking_overlap(full_matrix: np.ndarray, reduced_matrix: np.ndarray, k: int = 10, n_queries: int = 200) -> float:
+    """
+    Average fraction of each movie's top K neighbors preserved after reduction.
+
+    Both matrices are assumed to be L2-normalized, so cosine similarity is a dot product.
+    """
+    rng = np.random.default_rng(0)
+    query_idx = rng.choice(len(full_matrix), min(n_queries, len(full_matrix)), replace=False)
+    k = min(k, len(full_matrix) - 1)
+
+    def top_k(matrix: np.ndarray) -> np.ndarray:
+        scores = matrix[query_idx] @ matrix.T
+        scores[np.arange(len(query_idx)), query_idx] = -np.inf
+        return np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+    full_top = top_k(full_matrix)
+    reduced_top = top_k(reduced_matrix)
+
+    hits = sum(len(np.intersect1d(a, b)) for a, b in zip(full_top, reduced_top, strict=True))
+    return hits / (k * len(query_idx))
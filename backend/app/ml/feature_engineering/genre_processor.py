@@ -10,6 +10,8 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 
 logger = logging.getLogger(__name__)
 
+MAX_FEATURES = 100  # Limit features since genres are limited
+
 
 def _preprocess_genres_df(movies_df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -42,7 +44,7 @@ def create_genre_features(
 
     movies_processed_df = _preprocess_genres_df(movies_df)
 
-    tfidf = TfidfVectorizer(stop_words="english", max_features=100)  # Limit features since genres are limited
+    tfidf = TfidfVectorizer(stop_words="english", max_features=MAX_FEATURES)
     tfidf_matrix_sparse = tfidf.fit_transform(movies_processed_df["genres_processed"])
 
     tfidf_matrix = tfidf_matrix_sparse.toarray()  # type: ignore [attr-defined]
@@ -50,3 +52,17 @@ def create_genre_features(
     logger.info("Created TF-IDF matrix with shape: %s", tfidf_matrix.shape)
 
     return tfidf_matrix, tfidf, movies_processed_df
+
+
+def transform_genres(movies_df: pd.DataFrame, tfidf: TfidfVectorizer) -> tuple[np.ndarray, pd.DataFrame]:
+    """
+    Vectorizes genres of new movies with an already fitted TfidfVectorizer.
+
+    Returns:
+        - The TF-IDF matrix as a dense numpy array (np.ndarray)
+        - The filtered movies_df with processed genres
+
+    """
+    movies_processed_df = _preprocess_genres_df(movies_df)
+    tfidf_matrix = tfidf.transform(movies_processed_df["genres_processed"]).toarray()  # type: ignore [attr-defined]
+    return tfidf_matrix, movies_processed_df
@@ -0,0 +1,134 @@
+"""
+Content-hash manifest for the ML artifact pipeline.
+
+Records, for each pipeline stage, the hashes of its input files, the
+parameters it ran with and the hashes of the files it produced, so
+unchanged stages can be skipped on the next run.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import UTC, datetime
+from pathlib import Path
+
+from app.ml.artifacts import atomic_write
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+
+def file_hash(path: Path) -> str:
+    """SHA-256 of a file's contents, streamed so large CSVs are never held in memory."""
+    with Path.open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def artifact_version(data_dir: Path) -> str:
+    """
+    Identify the artifacts currently in ``data_dir``.
+
+    Uses the manifest version when the pipeline wrote one, otherwise a
+    fingerprint of the artifact file names, sizes and modification times.
+    """
+    data_dir = Path(data_dir)
+    manifest_path = data_dir / MANIFEST_FILE
+    if manifest_path.exists():
+        try:
+            with Path.open(manifest_path, encoding="utf-8") as f:
+                version = json.load(f).get("version")
+        except (OSError, json.JSONDecodeError):
+            version = None
+        if version:
+            return version
+
+    digest = hashlib.sha256()
+    for path in sorted(data_dir.glob("*")):
+        if path.is_file() and path.suffix in {".npy", ".json", ".csv"}:
+            stat = path.stat()
+            digest.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:12]
+
+
+class ArtifactManifest:
+    """Tracks inputs, parameters and outputs of each pipeline stage in ``manifest.json``."""
+
+    def __init__(self, data_dir: Path):
+        self.path = Path(data_dir) / MANIFEST_FILE
+        self.stages: dict[str, dict] = {}
+        self._hash_cache: dict[tuple[str, int, int], str] = {}
+
+        if self.path.exists():
+            try:
+                with Path.open(self.path, encoding="utf-8") as f:
+                    self.stages = json.load(f).get("stages", {})
+            except (OSError, json.JSONDecodeError):
+                logger.warning("Ignoring unreadable manifest at %s", self.path)
+
+    def hash_files(self, files: dict[str, Path]) -> dict[str, str | None]:
+        """Hash each file, or None if it is missing. Hashes are cached per size and mtime."""
+        hashes: dict[str, str | None] = {}
+        for name, path in files.items():
+            if not path.exists():
+                hashes[name] = None
+                continue
+            stat = path.stat()
+            key = (str(path), stat.st_size, stat.st_mtime_ns)
+            if key not in self._hash_cache:
+                self._hash_cache[key] = file_hash(path)
+            hashes[name] = self._hash_cache[key]
+        return hashes
+
+    def get(self, stage: str) -> dict | None:
+        """Previous record of a stage, if any."""
+        return self.stages.get(stage)
+
+    def changed_inputs(self, stage: str, inputs: dict[str, Path]) -> set[str] | None:
+        """Names of the inputs whose hash differs from the last run, or None if the stage never ran."""
+        record = self.get(stage)
+        if record is None:
+            return None
+        hashes = self.hash_files(inputs)
+        return {
+            name for name in hashes.keys() | record["inputs"].keys() if hashes.get(name) != record["inputs"].get(name)
+        }
+
+    def outputs_intact(self, stage: str, outputs: dict[str, Path]) -> bool:
+        """Whether every output of the stage still matches the recorded hash."""
+        record = self.get(stage)
+        if record is None or set(record["outputs"]) != set(outputs):
+            return False
+        return self.hash_files(outputs) == record["outputs"]
+
+    def is_current(self, stage: str, inputs: dict[str, Path], params: dict, outputs: dict[str, Path]) -> bool:
+        """Whether the stage ran with the same inputs and parameters and its outputs are untouched."""
+        record = self.get(stage)
+        if record is None or record["params"] != params:
+            return False
+        if self.hash_files(inputs) != record["inputs"]:
+            return False
+        return self.outputs_intact(stage, outputs)
+
+    def record(self, stage: str, inputs: dict[str, Path], params: dict, outputs: dict[str, Path]):
+        """Record a completed stage and write the manifest."""
+        self.stages[stage] = {
+            "inputs": self.hash_files(inputs),
+            "params": params,
+            "outputs": self.hash_files(outputs),
+            "completed_at": datetime.now(UTC).isoformat(),
+        }
+        self.save()
+
+    def save(self):
+        with atomic_write(self.path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "stages": self.stages}, f, indent=2)
+
+    @property
+    def version(self) -> str:
+        """Short hash identifying the current set of artifacts."""
+        digest = hashlib.sha256()
+        for stage in sorted(self.stages):
+            for name, value in sorted(self.stages[stage]["outputs"].items()):
+                digest.update(f"{stage}:{name}:{value}".encode())
+        return digest.hexdigest()[:12]
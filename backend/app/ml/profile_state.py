@@ -0,0 +1,129 @@
+"""
+Running top candidates of a user's content profile.
+
+A user's profile score is the weighted sum of their seed movies' score
+rows divided by the total weight, so adding, removing or reweighting one
+seed only changes the sums by that movie's row. The state keeps the sums
+of just the top M candidates, plus an upper bound on the sum of every
+other movie: folding in a row updates the candidates exactly and raises
+the bound by the row's largest value outside them. While the requested
+top N all stay at or above the bound they are exact, so "rate a movie,
+see fresh recommendations" costs one row and a sort of M sums instead of
+a full regeneration. Once the bound catches up, the candidates are
+rebuilt from all the seeds.
+"""
+
+import threading
+from collections.abc import Iterable
+
+import numpy as np
+
+from app.ml.recommender import MovieRecommender, top_n
+
+# Candidates kept beyond the longest list requested, so the bound takes several updates to catch up
+CANDIDATE_COUNT = 100
+
+
+class ProfileState:
+    """
+    Seed weights and rated movies of one user plus the sums of their top candidates.
+
+    Memory is O(ratings + candidates) per user rather than O(catalog). The
+    state is tied to the artifact version and weights it was built with;
+    callers should rebuild it when those change. ``generation`` counts the
+    updates applied, so a caller publishing recommendations can hold
+    ``publish_lock`` and skip them if a later update has landed meanwhile.
+    """
+
+    def __init__(
+        self,
+        recommender: MovieRecommender,
+        seed_weights: dict[int, float],
+        rated: Iterable[int],
+        genre_weight: float | None = None,
+        cf_weight: float = 0.0,
+    ):
+        self.version = recommender.version
+        self.genre_weight = genre_weight
+        self.cf_weight = cf_weight
+        self.seed_weights = {mid: weight for mid, weight in seed_weights.items() if weight > 0}
+        self.rated = set(rated)
+        self.limit = 0
+        # Catalog rows and unnormalized sums of the candidates, and a bound on the sum of any other unrated movie.
+        # An infinite bound means the candidates have to be rebuilt; -inf that every unrated movie is a candidate.
+        self._candidate_idx = np.empty(0, dtype=np.int32)
+        self._candidate_sums = np.empty(0, dtype=np.float32)
+        self._bound = np.inf
+        self.generation = 0
+        self.publish_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    def matches(self, version: str, genre_weight: float | None, cf_weight: float) -> bool:
+        """Whether the state was built from these artifacts and weights."""
+        return (self.version, self.genre_weight, self.cf_weight) == (version, genre_weight, cf_weight)
+
+    def update(self, recommender: MovieRecommender, movie_id: int, weight: float, *, rated: bool = True):
+        """
+        Set one movie's seed weight (0 if it is not a seed) and whether the user rated it.
+
+        Only that movie's score row is computed, scaled by the weight change.
+        """
+        with self._lock:
+            if rated:
+                self.rated.add(movie_id)
+            else:
+                self.rated.discard(movie_id)
+                # Rated movies are not covered by the bound, so one that can be recommended again forces a rebuild
+                self._bound = np.inf
+
+            delta = weight - self.seed_weights.get(movie_id, 0.0)
+            if delta:
+                row = recommender.seed_scores({movie_id: delta}, self.genre_weight, self.cf_weight)
+                self._candidate_sums += row[self._candidate_idx]
+                if np.isfinite(self._bound):
+                    outside = np.where(recommender.exclusion_mask(self.rated), -np.inf, row)
+                    outside[self._candidate_idx] = -np.inf
+                    self._bound += outside.max(initial=-np.inf)
+
+            if weight > 0:
+                self.seed_weights[movie_id] = weight
+            else:
+                self.seed_weights.pop(movie_id, None)
+            if rated and movie_id in recommender.movie_id_to_idx:
+                keep = self._candidate_idx != recommender.movie_id_to_idx[movie_id]
+                self._candidate_idx, self._candidate_sums = self._candidate_idx[keep], self._candidate_sums[keep]
+            self.generation += 1
+
+    def recommend(self, recommender: MovieRecommender, n: int) -> list[tuple[int, float]]:
+        """Top N (movie_id, score), best first, excluding every rated movie."""
+        with self._lock:
+            total_weight = sum(self.seed_weights.values())
+            if total_weight <= 0:
+                return []
+
+            self.limit = max(self.limit, n)
+            order = np.argsort(-self._candidate_sums, kind="stable")[:n]
+            if not self._is_exact(order, n):
+                self._rebuild(recommender, self.limit + CANDIDATE_COUNT)
+                order = np.arange(min(n, len(self._candidate_idx)))
+
+            movie_ids = recommender.movie_ids[self._candidate_idx[order]]
+            scores = self._candidate_sums[order] / np.float32(total_weight)
+            return [(int(mid), float(score)) for mid, score in zip(movie_ids, scores, strict=True)]
+
+    def _is_exact(self, order: np.ndarray, n: int) -> bool:
+        """Whether the first ``n`` candidates in ``order`` are the true top N."""
+        if self._bound == -np.inf:
+            return True
+        return len(order) == n and self._candidate_sums[order[-1]] >= self._bound
+
+    def _rebuild(self, recommender: MovieRecommender, m: int):
+        """Score the whole catalog from all seeds and keep the top ``m`` unrated movies, best first."""
+        sums = recommender.seed_scores(self.seed_weights, self.genre_weight, self.cf_weight)
+        sums = np.where(recommender.exclusion_mask(self.rated), -np.inf, sums)
+        top_idx, top_sums = top_n(sums[np.newaxis], m)
+        valid = top_sums[0] != -np.inf
+        self._candidate_idx = top_idx[0][valid].astype(np.int32)
+        self._candidate_sums = top_sums[0][valid].astype(np.float32)
+        # Every other unrated movie sums to at most the last candidate, if any is left out at all
+        self._bound = self._candidate_sums[-1] if len(self._candidate_idx) == m else -np.inf
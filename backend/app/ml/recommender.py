@@ -5,25 +5,74 @@ movie data to generate content-based recommendations.
 
 import json
 import logging
+from collections.abc import Iterable
+from datetime import datetime
 from pathlib import Path
+from typing import ClassVar
 
 import numpy as np
 import pandas as pd
 
+from app.ml import als, collaborative, quantization
+from app.ml.ann_index import IVFIndex
+from app.ml.artifacts import load_array, mapped_nbytes, resident_nbytes
+from app.ml.manifest import artifact_version
+
 logger = logging.getLogger(__name__)
 
+# Seeds whose similarity rows are summed at once when no feature matrix is loaded
+PROFILE_BLOCK_SIZE = 256
+
 
 class MovieRecommender:
     """
     Content-based movie recommender using pre-computed similarity.
+
+    Three search engines are available:
+        - "exact": rows of the pre-computed similarity matrix
+        - "ann": an IVF index over the movie features (see ``app.ml.ann_index``)
+        - "int8": int8-quantized features, dequantized block by block for scoring (see ``app.ml.quantization``)
+
+    The feature set is either the full "combined" features or the SVD-"reduced"
+    ones; it must match the features the similarity matrix and index were built from.
+
+    When the separate genre and genome blocks are available, queries can also
+    pass a ``genre_weight`` to score ``w * S_genre + (1 - w) * S_genome``
+    directly from the blocks, bypassing the engine. Both blocks together have
+    as many dims as the combined features, so a reweighted query costs about
+    the same as a single feature-matrix query.
     """
 
-    def __init__(self, data_dir: str = "data/ml"):
+    ENGINES = ("exact", "ann", "int8")
+    FEATURE_FILES: ClassVar[dict[str, str]] = {"combined": "combined_features.npy", "reduced": "reduced_features.npy"}
+
+    def __init__(
+        self, data_dir: str = "data/ml", engine: str = "exact", ann_probes: int = 8, feature_set: str = "combined"
+    ):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown recommender engine '{engine}'. Choose from {', '.join(self.ENGINES)}.")
+        if feature_set not in self.FEATURE_FILES:
+            raise ValueError(f"Unknown feature set '{feature_set}'. Choose from {', '.join(self.FEATURE_FILES)}.")
+
         self.data_dir = Path(data_dir)
+        self.engine = engine
+        self.ann_probes = ann_probes
+        self.feature_set = feature_set
+        self.version: str
         self.movies_df: pd.DataFrame
-        self.similarity_matrix: np.ndarray
+        self.similarity_matrix: np.ndarray | None = None
+        self.features: np.ndarray | None = None
+        self.genre_features: np.ndarray | None = None
+        self.genome_features: np.ndarray | None = None
+        self.cf_neighbor_idx: np.ndarray | None = None
+        self.cf_neighbor_sim: np.ndarray | None = None
+        self.als_model: als.ImplicitALS | None = None
+        self.ann_index: IVFIndex | None = None
+        self.quantized_codes: np.ndarray | None = None
+        self.quantized_scales: np.ndarray | None = None
         self.movie_id_to_idx: dict[int, int]
         self.idx_to_movie_id: dict[int, int]
+        self.movie_ids: np.ndarray
         self.title_to_movie_id: dict[str, int]
         self.movie_id_to_title: dict[int, str]
 
@@ -31,19 +80,50 @@ class MovieRecommender:
 
     def load_data(self):
         """Load all necessary data artifacts."""
-        logger.info("Loading recommender data...")
+        logger.info("Loading recommender data (engine=%s)...", self.engine)
+
+        # Read before the artifacts so a concurrent pipeline run shows up as a newer version
+        self.version = artifact_version(self.data_dir)
 
         movies_path = self.data_dir / "movies_clean.csv"
         if not movies_path.exists():
             raise FileNotFoundError(f"Missing {movies_path}. Run data_preprocessor.py.")
         self.movies_df = pd.read_csv(movies_path)
+        n_movies = len(self.movies_df)
 
         self.movie_id_to_title = pd.Series(self.movies_df.title.values, index=self.movies_df.movie_id).to_dict()
 
-        sim_matrix_path = self.data_dir / "similarity_matrix.npy"
-        if not sim_matrix_path.exists():
-            raise FileNotFoundError(f"Missing {sim_matrix_path}. Run similarity_matrix.py.")
-        self.similarity_matrix = np.load(sim_matrix_path)
+        if self.engine == "exact":
+            sim_matrix_path = self.data_dir / "similarity_matrix.npy"
+            if not sim_matrix_path.exists():
+                raise FileNotFoundError(f"Missing {sim_matrix_path}. Run similarity_matrix.py.")
+            self.similarity_matrix = load_array(sim_matrix_path, ndim=2, rows=n_movies)
+            if self.similarity_matrix.shape[0] != self.similarity_matrix.shape[1]:
+                raise ValueError(f"{sim_matrix_path.name} must be square, got shape {self.similarity_matrix.shape}")
+
+        features_path = self.data_dir / self.FEATURE_FILES[self.feature_set]
+        # The int8 engine scores against the quantized codes only; mapping the float features would undo its saving
+        if features_path.exists() and self.engine != "int8":
+            self.features = load_array(features_path, ndim=2, rows=n_movies)
+        elif self.engine == "ann":
+            raise FileNotFoundError(f"Missing {features_path}. Run data_preprocessor.py.")
+
+        self.genre_features, self.genome_features = self._load_optional_pair(
+            "genre_features.npy", "genome_features.npy", n_movies
+        )
+        self.cf_neighbor_idx, self.cf_neighbor_sim = self._load_optional_pair(
+            collaborative.NEIGHBOR_IDX_FILE, collaborative.NEIGHBOR_SIM_FILE, n_movies, first_kind="i"
+        )
+
+        if (self.data_dir / als.METADATA_FILE).exists():
+            self.als_model = als.ImplicitALS.load(self.data_dir, n_movies)
+
+        if self.engine == "ann":
+            self.ann_index = IVFIndex.load(self.data_dir, self.features)
+
+        if self.engine == "int8":
+            self.quantized_codes = load_array(self.data_dir / quantization.CODES_FILE, ndim=2, rows=n_movies, kind="i")
+            self.quantized_scales = load_array(self.data_dir / quantization.SCALES_FILE, ndim=1, rows=n_movies)
 
         mapping_path = self.data_dir / "movie_id_to_idx.json"
         if not mapping_path.exists():
@@ -54,7 +134,134 @@ class MovieRecommender:
         self.movie_id_to_idx = {int(k): v for k, v in self.movie_id_to_idx.items()}
 
         self.idx_to_movie_id = {idx: mid for mid, idx in self.movie_id_to_idx.items()}
+
+        # Matrix index -> movie ID lookup as an int array; -1 marks rows without a movie
+        self.movie_ids = np.full(n_movies, -1, dtype=np.int64)
+        for mid, idx in self.movie_id_to_idx.items():
+            if idx < n_movies:
+                self.movie_ids[idx] = mid
         self.title_to_movie_id = pd.Series(self.movies_df.movie_id.values, index=self.movies_df.title).to_dict()
+        self._build_filter_index()
+
+        self._log_memory_usage()
+
+    def _build_filter_index(self):
+        """Precompute a boolean mask per genre and a release year per catalog row, for filter_mask."""
+        n_rows = len(self.movie_ids)
+        rows = self.movies_df.movie_id.map(self.movie_id_to_idx)
+        known = rows.notna().to_numpy() & (rows.fillna(n_rows).to_numpy() < n_rows)
+        rows = rows[known].astype(np.intp).to_numpy()
+        movies = self.movies_df[known]
+
+        self.movie_years = np.zeros(n_rows, dtype=np.int32)  # 0 = unknown
+        years = movies.title.astype(str).str.extract(r"\((\d{4})\)\s*$")[0]
+        self.movie_years[rows] = pd.to_numeric(years, errors="coerce").fillna(0).astype(np.int32).to_numpy()
+
+        self.genre_masks: dict[str, np.ndarray] = {}
+        for row, genres in zip(rows, movies.genres.fillna("").astype(str), strict=True):
+            for genre in genres.split("|"):
+                if genre and genre != "(no genres listed)":
+                    self.genre_masks.setdefault(genre.lower(), np.zeros(n_rows, dtype=bool))[row] = True
+
+    def filter_mask(
+        self, genres: Iterable[str] | None = None, year_min: int | None = None, year_max: int | None = None
+    ) -> np.ndarray:
+        """
+        Build a boolean vector over the catalog that is True for movies a filter rules out.
+
+        The vector is combined from the per-genre masks and the year vector
+        built at load time, so it can be applied to a score vector before the
+        top N are selected, like ``exclusion_mask``.
+
+        Args:
+            genres: Keep movies with any of these genres (case-insensitive)
+            year_min: Keep movies released in or after this year
+            year_max: Keep movies released in or before this year
+
+        Returns:
+            Boolean mask, True for excluded movies. Movies with an unknown
+            year are excluded when a year bound is given.
+
+        Raises:
+            ValueError: If year_min is after year_max.
+        """
+        if year_min is not None and year_max is not None and year_min > year_max:
+            raise ValueError("year_min must not be after year_max")
+
+        keep = np.ones(len(self.movie_ids), dtype=bool)
+        if genres:
+            in_genres = np.zeros(len(self.movie_ids), dtype=bool)
+            for genre in genres:
+                genre_mask = self.genre_masks.get(genre.lower())
+                if genre_mask is not None:
+                    in_genres |= genre_mask
+            keep &= in_genres
+        if year_min is not None:
+            keep &= self.movie_years >= year_min
+        if year_max is not None:
+            keep &= (self.movie_years <= year_max) & (self.movie_years > 0)
+        return ~keep
+
+    def _load_optional_pair(
+        self, first: str, second: str, n_movies: int, first_kind: str = "f"
+    ) -> tuple[np.ndarray | None, np.ndarray | None]:
+        """Memory-map two artifacts that are only usable together, or return (None, None) if either is missing."""
+        first_path, second_path = self.data_dir / first, self.data_dir / second
+        if not (first_path.exists() and second_path.exists()):
+            return None, None
+        return (
+            load_array(first_path, ndim=2, rows=n_movies, kind=first_kind),
+            load_array(second_path, ndim=2, rows=n_movies),
+        )
+
+    def _log_memory_usage(self):
+        """Report process-private memory vs. memory-mapped artifacts shared between workers."""
+        arrays = [
+            self.similarity_matrix,
+            self.features,
+            self.genre_features,
+            self.genome_features,
+            self.cf_neighbor_idx,
+            self.cf_neighbor_sim,
+            self.quantized_codes,
+            self.quantized_scales,
+        ]
+        if self.als_model is not None:
+            arrays += [self.als_model.user_factors, self.als_model.item_factors]
+        if self.ann_index is not None:
+            arrays += [self.ann_index.centroids, self.ann_index.list_offsets, self.ann_index.list_indices]
+        resident = int(self.movies_df.memory_usage(deep=True).sum()) + resident_nbytes(*arrays)
+        mapped = mapped_nbytes(*arrays)
+        logger.info(
+            "Recommender data loaded: %.2f MB resident, %.2f MB memory-mapped (shared across workers)",
+            resident / (1024 * 1024),
+            mapped / (1024 * 1024),
+        )
+
+    def validate(self):
+        """
+        Check that the loaded artifacts can serve a query.
+
+        Raises:
+            ValueError: If no movie can be looked up in the loaded artifacts.
+        """
+        known_ids = self.movie_ids[self.movie_ids >= 0]
+        if len(known_ids) == 0:
+            raise ValueError("Recommender artifacts do not contain any movies.")
+
+        probe_id = int(known_ids[0])
+        if probe_id not in self.get_similar_by_ids([probe_id], n=1):
+            raise ValueError(f"Recommender artifacts cannot score movie {probe_id}.")
+
+    @property
+    def has_collaborative(self) -> bool:
+        """Whether item-item collaborative filtering neighbors are loaded."""
+        return self.cf_neighbor_idx is not None
+
+    @property
+    def has_als(self) -> bool:
+        """Whether a trained ALS matrix-factorization model is loaded."""
+        return self.als_model is not None
 
     def get_recommendations(self, movie_title: str, n: int = 10) -> list[tuple[str, float]]:
         """
@@ -83,13 +290,16 @@ class MovieRecommender:
 
         return [(self.movie_id_to_title.get(mid, "Unknown"), score) for mid, score in recs_by_id]
 
-    def get_similar_by_id(self, movie_id: int, n: int = 10) -> list[tuple[int, float]]:
+    def get_similar_by_id(
+        self, movie_id: int, n: int = 10, genre_weight: float | None = None
+    ) -> list[tuple[int, float]]:
         """
         Get top N recommendations for a given movie ID.
 
         Args:
             movie_id: The MovieLens ID of the movie
             n: Number of recommendations to return
+            genre_weight: Optional weight of genre vs. genome similarity (0-1)
 
         Returns:
             A list of (movie_id, score) tuples.
@@ -97,25 +307,503 @@ class MovieRecommender:
         Raises:
             ValueError: If recommender data is not loaded or movie_id not found.
         """
-        if self.movie_id_to_idx is None or self.similarity_matrix is None:
+        if self.movie_id_to_idx is None:
             raise ValueError("Recommender data not loaded.")
 
         if movie_id not in self.movie_id_to_idx:
             raise ValueError(f"Movie ID {movie_id} not found in recommender dataset.")
 
-        movie_idx = self.movie_id_to_idx[movie_id]
-        sim_scores = self.similarity_matrix[movie_idx]
-
-        top_indices = np.argsort(sim_scores)[::-1]  # descending
-        recommendations = []
-        for idx in top_indices:
-            if idx == movie_idx:
-                continue  # skip itself
-            rec_movie_id = self.idx_to_movie_id.get(idx)
-            if rec_movie_id is None:
-                continue
-            recommendations.append((rec_movie_id, float(sim_scores[idx])))
-            if len(recommendations) >= n:
-                break
-
-        return recommendations
+        return self.get_similar_by_ids([movie_id], n, genre_weight=genre_weight)[movie_id]
+
+    def get_similar_by_ids(
+        self,
+        movie_ids: Iterable[int],
+        n: int = 10,
+        exclude: Iterable[int] | None = None,
+        genre_weight: float | None = None,
+    ) -> dict[int, list[tuple[int, float]]]:
+        """
+        Get top N recommendations for many movie IDs in one vectorized pass.
+
+        Args:
+            movie_ids: The MovieLens IDs of the query movies
+            n: Number of recommendations to return per movie
+            exclude: Movie IDs that must not appear in any result
+            genre_weight: Optional weight of genre vs. genome similarity (0-1).
+                If set, scores are blended from the separate feature blocks.
+
+        Returns:
+            A dict mapping each query movie ID to its list of (movie_id, score)
+            tuples. Query IDs not in the recommender dataset are omitted.
+
+        Raises:
+            ValueError: If genre_weight is out of range or the feature blocks are not available.
+        """
+        self._check_genre_weight(genre_weight)
+
+        query_ids = [mid for mid in dict.fromkeys(movie_ids) if mid in self.movie_id_to_idx]
+        if not query_ids:
+            return {}
+
+        query_idx = np.fromiter((self.movie_id_to_idx[mid] for mid in query_ids), dtype=np.intp, count=len(query_ids))
+
+        mask = self.exclusion_mask(exclude)
+
+        if self.ann_index is not None and genre_weight is None:
+            top_idx, top_scores = self.ann_index.search(
+                self.features[query_idx], n, self.ann_probes, exclude=mask, query_idx=query_idx
+            )
+            self._fill_short_ann_rows(top_idx, top_scores, query_idx, mask)
+        else:
+            if genre_weight is None:
+                scores = self._score_rows(query_idx)
+            else:
+                scores = self._blended_scores(query_idx, genre_weight)
+            scores[:, mask] = -np.inf
+            scores[np.arange(len(query_idx)), query_idx] = -np.inf  # skip itself
+            top_idx, top_scores = top_n(scores, n)
+        top_movie_ids = self.movie_ids[top_idx]
+
+        return {
+            mid: [
+                (int(rec_id), float(score))
+                for rec_id, score in zip(top_movie_ids[row], top_scores[row], strict=True)
+                if score != -np.inf
+            ]
+            for row, mid in enumerate(query_ids)
+        }
+
+    def similarity_submatrix(
+        self, movie_ids: Iterable[int], genre_weight: float | None = None
+    ) -> tuple[list[int], np.ndarray]:
+        """
+        Pairwise similarities of a set of movies.
+
+        Only the rows of the given movies are read: their feature rows are
+        multiplied as ``F_sub @ F_sub.T`` when the features are loaded,
+        otherwise the submatrix is gathered from the similarity artifact.
+
+        Args:
+            movie_ids: The MovieLens IDs of the movies; repeated and unknown IDs are dropped
+            genre_weight: Optional weight of genre vs. genome similarity (0-1)
+
+        Returns:
+            Tuple of (known movie IDs in the given order, float32 array of
+            shape (movies, movies) with the similarity of each pair).
+
+        Raises:
+            ValueError: If genre_weight is out of range or the feature blocks are not available.
+        """
+        self._check_genre_weight(genre_weight)
+
+        ids = [mid for mid in dict.fromkeys(movie_ids) if mid in self.movie_id_to_idx]
+        idx = np.fromiter((self.movie_id_to_idx[mid] for mid in ids), dtype=np.intp, count=len(ids))
+
+        if genre_weight is not None:
+            genre = np.asarray(self.genre_features[idx], dtype=np.float32)
+            genome = np.asarray(self.genome_features[idx], dtype=np.float32)
+            matrix = genre_weight * (genre @ genre.T) + (1 - genre_weight) * (genome @ genome.T)
+        elif self.quantized_codes is not None:
+            codes, scales = self.quantized_codes[idx], self.quantized_scales[idx]
+            matrix = quantization.int8_scores(codes, scales, codes, scales)
+        elif self.features is not None:
+            features = np.asarray(self.features[idx], dtype=np.float32)
+            matrix = features @ features.T
+        else:
+            matrix = self.similarity_matrix[np.ix_(idx, idx)]
+        return ids, np.asarray(matrix, dtype=np.float32)
+
+    def _fill_short_ann_rows(
+        self, top_idx: np.ndarray, top_scores: np.ndarray, query_idx: np.ndarray, mask: np.ndarray
+    ):
+        """
+        Rescore, in place, the ANN results that came back short by an exact scan of the allowed movies.
+
+        A selective filter can leave fewer than N allowed movies in the probed
+        clusters; scanning only the allowed movies keeps the full count at
+        about the cost of the filter's selectivity.
+        """
+        allowed = np.flatnonzero(~mask)
+        n = top_idx.shape[1]
+        expected = np.minimum(n, len(allowed) - (~mask[query_idx]).astype(np.intp))
+        short = np.flatnonzero((top_scores != -np.inf).sum(axis=1) < expected)
+        if len(short) == 0:
+            return
+
+        scores = np.asarray(self.features[query_idx[short]], dtype=np.float32) @ np.asarray(self.features[allowed]).T
+        scores[allowed[np.newaxis, :] == query_idx[short, np.newaxis]] = -np.inf  # skip itself
+        best, best_scores = top_n(scores, n)
+        top_idx[short, : best.shape[1]] = allowed[best]
+        top_scores[short, : best.shape[1]] = best_scores
+
+    def recommend_for_profile(
+        self,
+        seed_weights: dict[int, float],
+        n: int = 10,
+        exclude: Iterable[int] | None = None,
+        genre_weight: float | None = None,
+        cf_weight: float = 0.0,
+    ) -> list[tuple[int, float]]:
+        """
+        Score the whole catalog against a user profile in one vectorized pass.
+
+        A movie's score is its weighted mean similarity to the seed movies.
+        With features loaded, this is a single matrix-vector product
+        ``F @ (w @ F[seeds]) / sum(w)``; otherwise the seeds' similarity rows
+        are summed in blocks.
+
+        Args:
+            seed_weights: Mapping of seed movie ID to its weight (e.g. normalized rating)
+            n: Number of recommendations to return
+            exclude: Movie IDs that must not be recommended; the seeds are always excluded
+            genre_weight: Optional weight of genre vs. genome similarity (0-1)
+            cf_weight: Weight of the item-item collaborative filtering score (0-1),
+                blended as ``(1 - cf_weight) * content + cf_weight * cf``
+
+        Returns:
+            Up to N (movie_id, score) tuples, best first. Seeds not in the
+            recommender dataset are ignored.
+
+        Raises:
+            ValueError: If a weight is out of range or the artifacts it needs are not available.
+        """
+        return self.recommend_for_profiles([seed_weights], n, [exclude], genre_weight, cf_weight)[0]
+
+    def recommend_for_profiles(
+        self,
+        seed_weights: list[dict[int, float]],
+        n: int = 10,
+        excludes: list[Iterable[int] | None] | None = None,
+        genre_weight: float | None = None,
+        cf_weight: float = 0.0,
+    ) -> list[list[tuple[int, float]]]:
+        """
+        Score the whole catalog against several user profiles at once.
+
+        The profile vectors are stacked so all profiles are scored with one
+        matrix multiply and one batched top-N selection, which is much
+        cheaper per profile than scoring them one by one.
+
+        Args:
+            seed_weights: One mapping of seed movie ID to weight per profile
+            n: Number of recommendations per profile
+            excludes: Movie IDs that must not be recommended, one entry per profile
+            genre_weight: Optional weight of genre vs. genome similarity (0-1)
+            cf_weight: Weight of the item-item collaborative filtering score (0-1)
+
+        Returns:
+            Up to N (movie_id, score) tuples per profile, in input order.
+            Profiles without known seeds get an empty list.
+
+        Raises:
+            ValueError: If a weight is out of range or the artifacts it needs are not available.
+        """
+        ranked = self.rank_profiles(seed_weights, n, excludes, genre_weight, cf_weight)
+        return [list(zip(movie_ids.tolist(), scores.tolist(), strict=True)) for movie_ids, scores in ranked]
+
+    def rank_profiles(
+        self,
+        seed_weights: list[dict[int, float]],
+        n: int = 10,
+        excludes: list[Iterable[int] | None] | None = None,
+        genre_weight: float | None = None,
+        cf_weight: float = 0.0,
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        ``recommend_for_profiles`` returning arrays instead of tuples.
+
+        Bulk consumers such as the batch precompute use this to skip
+        building a Python object per recommended movie.
+
+        Returns:
+            A (movie IDs, scores) pair of arrays per profile, best first.
+        """
+        self._check_genre_weight(genre_weight)
+        if not 0 <= cf_weight <= 1:
+            raise ValueError("CF weight must be between 0 and 1")
+        if cf_weight > 0 and not self.has_collaborative:
+            raise ValueError(
+                f"CF blending requires {collaborative.NEIGHBOR_IDX_FILE} and {collaborative.NEIGHBOR_SIM_FILE}."
+            )
+        if excludes is None:
+            excludes = [None] * len(seed_weights)
+
+        profiles = []
+        for weights_by_id in seed_weights:
+            seeds = {mid: weight for mid, weight in weights_by_id.items() if mid in self.movie_id_to_idx and weight > 0}
+            seed_idx = np.fromiter((self.movie_id_to_idx[mid] for mid in seeds), dtype=np.intp, count=len(seeds))
+            weights = np.fromiter(seeds.values(), dtype=np.float32, count=len(seeds))
+            profiles.append((seed_idx, weights / weights.sum() if len(weights) else weights))
+
+        empty = (np.empty(0, dtype=self.movie_ids.dtype), np.empty(0, dtype=np.float32))
+        results: list[tuple[np.ndarray, np.ndarray]] = [empty] * len(seed_weights)
+        rows = [row for row, (seed_idx, _) in enumerate(profiles) if len(seed_idx)]
+        if not rows:
+            return results
+
+        active = [profiles[row] for row in rows]
+        scores = self._profile_scores(active, genre_weight)
+        if cf_weight > 0:
+            scores *= 1 - cf_weight
+            for i, (seed_idx, weights) in enumerate(active):
+                scores[i] += cf_weight * collaborative.profile_scores(
+                    self.cf_neighbor_idx, self.cf_neighbor_sim, seed_idx, weights, len(self.movie_ids)
+                )
+
+        ranked = self._top_movie_arrays(
+            scores, n, [excludes[row] for row in rows], [seed_idx for seed_idx, _ in active]
+        )
+        for row, movies in zip(rows, ranked, strict=True):
+            results[row] = movies
+        return results
+
+    def seed_scores(
+        self, seed_weights: dict[int, float], genre_weight: float | None = None, cf_weight: float = 0.0
+    ) -> np.ndarray:
+        """
+        Weighted sum of the seeds' score rows over the whole catalog.
+
+        This is the unnormalized profile score of ``recommend_for_profile``:
+        dividing it by the sum of the weights gives the same scores. Since
+        it is linear in the weights, a profile can be updated by adding the
+        scores of just the seeds that changed, with their weight deltas.
+
+        Args:
+            seed_weights: Mapping of seed movie ID to weight; negative weights subtract a seed
+            genre_weight: Optional weight of genre vs. genome similarity (0-1)
+            cf_weight: Weight of the item-item collaborative filtering score (0-1)
+
+        Returns:
+            float32 array with one score per catalog row. Unknown seeds are ignored.
+
+        Raises:
+            ValueError: If a weight is out of range or the artifacts it needs are not available.
+        """
+        return self.seed_scores_for_profiles([seed_weights], genre_weight, cf_weight)[0]
+
+    def seed_scores_for_profiles(
+        self, seed_weights: list[dict[int, float]], genre_weight: float | None = None, cf_weight: float = 0.0
+    ) -> np.ndarray:
+        """
+        ``seed_scores`` of several profiles, computed with one matrix multiply.
+
+        Returns:
+            float32 array with one row per profile and one column per catalog row.
+
+        Raises:
+            ValueError: If a weight is out of range or the artifacts it needs are not available.
+        """
+        self._check_genre_weight(genre_weight)
+        if not 0 <= cf_weight <= 1:
+            raise ValueError("CF weight must be between 0 and 1")
+        if cf_weight > 0 and not self.has_collaborative:
+            raise ValueError(
+                f"CF blending requires {collaborative.NEIGHBOR_IDX_FILE} and {collaborative.NEIGHBOR_SIM_FILE}."
+            )
+
+        profiles = []
+        for weights_by_id in seed_weights:
+            seeds = {
+                mid: weight for mid, weight in weights_by_id.items() if mid in self.movie_id_to_idx and weight != 0
+            }
+            seed_idx = np.fromiter((self.movie_id_to_idx[mid] for mid in seeds), dtype=np.intp, count=len(seeds))
+            weights = np.fromiter(seeds.values(), dtype=np.float32, count=len(seeds))
+            profiles.append((seed_idx, weights))
+
+        # Profiles without known seeds score zero everywhere
+        scores = self._profile_scores(profiles, genre_weight).astype(np.float32, copy=False)
+        if cf_weight > 0:
+            scores *= 1 - cf_weight
+            for row, (seed_idx, weights) in enumerate(profiles):
+                if len(seed_idx):
+                    scores[row] += cf_weight * collaborative.profile_scores(
+                        self.cf_neighbor_idx, self.cf_neighbor_sim, seed_idx, weights, len(self.movie_ids)
+                    )
+        return scores
+
+    def top_movies(self, scores: np.ndarray, n: int, exclude: Iterable[int] | None = None) -> list[tuple[int, float]]:
+        """Top N (movie_id, score) of a catalog-wide score vector, skipping excluded movies."""
+        return self._top_movies(np.array(scores, dtype=np.float32), n, exclude, np.empty(0, dtype=np.intp))
+
+    def recommend_for_user(
+        self,
+        user_id: str,
+        ratings: dict[int, float],
+        n: int = 10,
+        exclude: Iterable[int] | None = None,
+        updated_at: datetime | None = None,
+    ) -> list[tuple[int, float]]:
+        """
+        Recommend movies for a user from the ALS factors.
+
+        The user's trained factors are used if they have not rated anything
+        since training; otherwise (or for users unknown to the model) the
+        factors are folded in from ``ratings``. Scoring is one dot product
+        against the item factors.
+
+        Args:
+            user_id: ID of the user
+            ratings: The user's current ratings, movie ID -> rating
+            n: Number of recommendations to return
+            exclude: Movie IDs that must not be recommended; rated movies are always excluded
+            updated_at: Time of the user's latest rating, if known
+
+        Returns:
+            Up to N (movie_id, score) tuples, best first.
+
+        Raises:
+            ValueError: If no ALS model is loaded.
+        """
+        if self.als_model is None:
+            raise ValueError(f"ALS recommendations require {als.METADATA_FILE}. Run scripts/train_als.py.")
+
+        rated = {mid: rating for mid, rating in ratings.items() if mid in self.movie_id_to_idx}
+        item_idx = np.fromiter((self.movie_id_to_idx[mid] for mid in rated), dtype=np.intp, count=len(rated))
+        values = np.fromiter(rated.values(), dtype=np.float32, count=len(rated))
+
+        user_vector = self.als_model.user_vector(user_id, item_idx, values, updated_at)
+        scores = self.als_model.scores(user_vector).astype(np.float32)
+        return self._top_movies(scores, n, exclude, item_idx)
+
+    def _top_movies(
+        self, scores: np.ndarray, n: int, exclude: Iterable[int] | None, skip_idx: np.ndarray
+    ) -> list[tuple[int, float]]:
+        """Top N (movie_id, score) of a catalog-wide score vector, skipping excluded movies and ``skip_idx``."""
+        return self._top_movies_batch(scores[np.newaxis, :], n, [exclude], [skip_idx])[0]
+
+    def _top_movies_batch(
+        self,
+        scores: np.ndarray,
+        n: int,
+        excludes: list[Iterable[int] | None],
+        skip_idx: list[np.ndarray],
+    ) -> list[list[tuple[int, float]]]:
+        """``_top_movies`` for each row of a (rows, movies) score array, with one batched selection."""
+        return [
+            list(zip(movie_ids.tolist(), row_scores.tolist(), strict=True))
+            for movie_ids, row_scores in self._top_movie_arrays(scores, n, excludes, skip_idx)
+        ]
+
+    def _top_movie_arrays(
+        self,
+        scores: np.ndarray,
+        n: int,
+        excludes: list[Iterable[int] | None],
+        skip_idx: list[np.ndarray],
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """``_top_movies_batch`` returning a (movie IDs, scores) pair of arrays per row."""
+        for row, (exclude, skip) in enumerate(zip(excludes, skip_idx, strict=True)):
+            mask = self.exclusion_mask(exclude)
+            mask[skip] = True
+            scores[row, mask] = -np.inf
+
+        top_idx, top_scores = top_n(scores, n)
+        top_movie_ids = self.movie_ids[top_idx]
+        valid = top_scores != -np.inf
+        return [(top_movie_ids[row][valid[row]], top_scores[row][valid[row]]) for row in range(len(scores))]
+
+    def _profile_scores(self, profiles: list[tuple[np.ndarray, np.ndarray]], genre_weight: float | None) -> np.ndarray:
+        """
+        Weighted mean similarity of every catalog movie to each profile's seeds.
+
+        ``profiles`` holds (seed indices, weights summing to 1) pairs; the
+        result has one row per profile.
+        """
+        if genre_weight is not None:
+            genre_profiles = np.stack([w @ np.asarray(self.genre_features[idx]) for idx, w in profiles])
+            genome_profiles = np.stack([w @ np.asarray(self.genome_features[idx]) for idx, w in profiles])
+            scores = genre_weight * (genre_profiles @ np.asarray(self.genre_features).T)
+            scores += (1 - genre_weight) * (genome_profiles @ np.asarray(self.genome_features).T)
+            return scores
+
+        if self.quantized_codes is not None:
+            profile_matrix = np.stack(
+                [
+                    w @ quantization.dequantize(self.quantized_codes[idx], self.quantized_scales[idx])
+                    for idx, w in profiles
+                ]
+            )
+            return quantization.quantized_scores(profile_matrix, self.quantized_codes, self.quantized_scales)
+
+        if self.features is not None:
+            profile_matrix = np.stack([w @ np.asarray(self.features[idx], dtype=np.float32) for idx, w in profiles])
+            return profile_matrix @ np.asarray(self.features).T
+
+        scores = np.zeros((len(profiles), len(self.movie_ids)), dtype=np.float32)
+        for row, (seed_idx, weights) in enumerate(profiles):
+            for start in range(0, len(seed_idx), PROFILE_BLOCK_SIZE):
+                block = slice(start, start + PROFILE_BLOCK_SIZE)
+                scores[row] += weights[block] @ self._score_rows(seed_idx[block])
+        return scores
+
+    def _check_genre_weight(self, genre_weight: float | None):
+        if genre_weight is None:
+            return
+        if not 0 <= genre_weight <= 1:
+            raise ValueError("Genre weight must be between 0 and 1")
+        if self.genre_features is None or self.genome_features is None:
+            raise ValueError("Reweighting requires genre_features.npy and genome_features.npy.")
+
+    def _score_rows(self, query_idx: np.ndarray) -> np.ndarray:
+        """Similarity of the given movies to the whole catalog, as a (queries, movies) array."""
+        if self.quantized_codes is not None:
+            return quantization.int8_scores(
+                self.quantized_codes[query_idx],
+                self.quantized_scales[query_idx],
+                self.quantized_codes,
+                self.quantized_scales,
+            )
+        return np.array(self.similarity_matrix[query_idx])
+
+    def _blended_scores(self, query_idx: np.ndarray, genre_weight: float) -> np.ndarray:
+        """Blend of genre and genome cosine similarity of the given movies to the whole catalog."""
+        genre = np.asarray(self.genre_features[query_idx]) @ np.asarray(self.genre_features).T
+        genome = np.asarray(self.genome_features[query_idx]) @ np.asarray(self.genome_features).T
+        genre *= genre_weight
+        genre += (1 - genre_weight) * genome
+        return genre
+
+    def exclusion_mask(self, exclude: Iterable[int] | np.ndarray | None = None) -> np.ndarray:
+        """
+        Build a boolean vector over the catalog that is True for excluded movies.
+
+        ``exclude`` is either movie IDs or a boolean mask over the catalog
+        (e.g. from ``filter_mask``), which every ``exclude`` argument of this
+        class accepts too. Matrix rows without a known movie ID are always
+        excluded.
+        """
+        mask = self.movie_ids < 0
+        if isinstance(exclude, np.ndarray) and exclude.dtype == bool:
+            mask |= exclude
+        elif exclude is not None:
+            excluded_idx = [self.movie_id_to_idx[mid] for mid in exclude if mid in self.movie_id_to_idx]
+            mask[excluded_idx] = True
+        return mask
+
+
+def top_n(scores: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Select the N highest scores in each row of a score matrix.
+
+    Uses ``np.argpartition`` so the cost is linear in the number of columns
+    rather than a full sort. Excluded entries should be set to ``-inf``
+    beforehand; they sort last and can be filtered by the caller.
+
+    Args:
+        scores: Array of shape (rows, movies)
+        n: Number of entries to select per row
+
+    Returns:
+        Tuple of (indices, scores), each of shape (rows, min(n, movies)),
+        ordered from highest to lowest score.
+    """
+    n = min(n, scores.shape[1])
+    if n <= 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.intp), empty.astype(scores.dtype)
+
+    candidates = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(candidate_scores, order, axis=1)
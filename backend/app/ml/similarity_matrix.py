@@ -7,15 +7,20 @@ from pathlib import Path
 
 import numpy as np
 
+from app.ml.artifacts import save_array
 
-def compute_and_save_similarity(data_dir: Path):
+COPY_BLOCK_SIZE = 4096
+
+
+def compute_and_save_similarity(data_dir: Path, features_file: str = "combined_features.npy"):
     """
     Loads the feature matrix and computes the cosine similarity matrix.
 
     The feature matrix is assumed to be L2-normalized,
     so cosine similarity is just matrix multiplication.
+    Pass ``features_file="reduced_features.npy"`` to use the SVD-reduced features.
     """
-    feature_matrix_path = data_dir / "combined_features.npy"
+    feature_matrix_path = data_dir / features_file
     output_path = data_dir / "similarity_matrix.npy"
 
     if not feature_matrix_path.exists():
@@ -24,4 +29,38 @@ def compute_and_save_similarity(data_dir: Path):
     features = np.load(feature_matrix_path)
 
     similarity_matrix = features @ features.T
-    np.save(output_path, similarity_matrix)
+    save_array(output_path, similarity_matrix)
+
+
+def extend_similarity(data_dir: Path, n_existing: int, features_file: str = "combined_features.npy"):
+    """
+    Adds rows and columns for movies appended to the feature matrix
+    since the similarity matrix was last computed.
+
+    Only the new rows are multiplied against the catalog, so the cost is
+    O(new x N) instead of O(N x N). The old matrix is copied block by block
+    into a new memory-mapped file that then replaces it.
+    """
+    feature_matrix_path = data_dir / features_file
+    output_path = data_dir / "similarity_matrix.npy"
+
+    features = np.load(feature_matrix_path, mmap_mode="r")
+    old_matrix = np.load(output_path, mmap_mode="r")
+    if old_matrix.shape != (n_existing, n_existing):
+        raise ValueError(f"Expected a {n_existing}x{n_existing} similarity matrix, found {old_matrix.shape}")
+
+    n_movies = len(features)
+    new_rows = np.asarray(features[n_existing:]) @ np.asarray(features).T
+
+    tmp_path = output_path.with_name("similarity_matrix.tmp.npy")
+    extended = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=old_matrix.dtype, shape=(n_movies, n_movies))
+    for start in range(0, n_existing, COPY_BLOCK_SIZE):
+        stop = min(start + COPY_BLOCK_SIZE, n_existing)
+        extended[start:stop, :n_existing] = old_matrix[start:stop]
+        extended[start:stop, n_existing:] = new_rows[:, start:stop].T
+    extended[n_existing:] = new_rows
+    # flush() msyncs the new file to disk before it replaces the one readers may have mapped
+    extended.flush()
+
+    del extended, old_matrix
+    tmp_path.replace(output_path)
@@ -6,16 +6,18 @@ from datetime import UTC, datetime
 from pathlib import Path
 
 from app.core.config import settings
+from app.core.events import PENALTY_CHANGED, EventBus
 
 
 class PenaltiesRepository:
     """Handle penalties stored in JSON."""
 
-    def __init__(self, penalties_file: str | None = None):
-        """Initialize with path to penalties JSON file."""
+    def __init__(self, penalties_file: str | None = None, event_bus: EventBus | None = None):
+        """Initialize with path to penalties JSON file and an optional bus to publish changes to."""
         if penalties_file is None:
             penalties_file = settings.PENALTIES_FILE
         self.penalties_file = Path(penalties_file)
+        self.event_bus = event_bus
         self._ensure_file_exists()
 
     def _ensure_file_exists(self):
@@ -38,6 +40,10 @@ class PenaltiesRepository:
         with Path.open(self.penalties_file, "w", encoding="utf-8") as f:
             json.dump(penalties, f, indent=2, ensure_ascii=False)
 
+    def _publish(self, event_type: str, payload: dict):
+        if self.event_bus is not None:
+            self.event_bus.publish(event_type, payload)
+
     def get_all(self) -> list[dict]:
         """Get all penalties."""
         return self._read()
@@ -73,6 +79,7 @@ class PenaltiesRepository:
 
         penalties.append(new_penalty)
         self._write(penalties)
+        self._publish(PENALTY_CHANGED, new_penalty)
         return new_penalty
 
     def update(self, penalty_id: str, penalty_data: dict) -> dict | None:
@@ -83,6 +90,7 @@ class PenaltiesRepository:
                 updated = {**p, **penalty_data}
                 penalties[i] = updated
                 self._write(penalties)
+                self._publish(PENALTY_CHANGED, updated)
                 return updated
         return None
 
@@ -94,18 +102,21 @@ class PenaltiesRepository:
                 penalties[i]["status"] = "resolved"
                 penalties[i]["resolved_at"] = datetime.now(UTC).isoformat()
                 self._write(penalties)
+                self._publish(PENALTY_CHANGED, p)
                 return True
         return False
 
     def delete(self, penalty_id: str) -> bool:
         """Delete a penalty."""
         penalties = self._read()
-        new_penalties = [p for p in penalties if p["id"] != penalty_id]
-        if len(new_penalties) == len(penalties):
+        deleted = next((p for p in penalties if p["id"] == penalty_id), None)
+        if deleted is None:
             return False
-        self._write(new_penalties)
+        self._write([p for p in penalties if p["id"] != penalty_id])
+        self._publish(PENALTY_CHANGED, deleted)
         return True
 
     def save_data(self, penalties: list[dict]):
         """Overwrite the penalties file with the given list of penalties."""
         self._write(penalties)
+        self._publish(PENALTY_CHANGED, {})
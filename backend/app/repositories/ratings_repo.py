@@ -1,20 +1,34 @@
 """Repository for ratings data operations."""
 
 import json
+import threading
+from collections import defaultdict
 from datetime import UTC, datetime
 from pathlib import Path
 
 from app.core.config import settings
+from app.core.events import RATING_CREATED, RATING_DELETED, RATING_UPDATED, RATINGS_RESET, EventBus
+
+
+def user_ratings_version(user_ratings: list[dict]) -> str:
+    """Version of one user's ratings, as returned by RatingsRepository.get_user_version."""
+    timestamps = [r["timestamp"] for r in user_ratings]
+    return f"{len(timestamps)}:{max(timestamps, default='')}"
 
 
 class RatingsRepository:
     """Handle user ratings stored in JSON."""
 
-    def __init__(self, ratings_file: str | None = None):
-        """Initialize with path to ratings JSON file."""
+    def __init__(self, ratings_file: str | None = None, event_bus: EventBus | None = None):
+        """Initialize with path to ratings JSON file and an optional bus to publish changes to."""
         if ratings_file is None:
             ratings_file = settings.RATINGS_FILE
         self.ratings_file = Path(ratings_file)
+        self.event_bus = event_bus
+        # Version of every user's ratings, with the (mtime, size) of the file it was built from
+        self._user_versions: dict[str, str] | None = None
+        self._user_versions_stat: tuple[int, int] | None = None
+        self._versions_lock = threading.Lock()
         self._ensure_file_exists()
 
     def _ensure_file_exists(self):
@@ -37,6 +51,30 @@ class RatingsRepository:
         with Path.open(self.ratings_file, "w", encoding="utf-8") as f:
             json.dump(ratings, f, indent=2, ensure_ascii=False)
 
+    def _file_stat(self) -> tuple[int, int]:
+        stat = self.ratings_file.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def _index_user_versions(self):
+        stat = self._file_stat()
+        by_user: dict[str, list[dict]] = defaultdict(list)
+        for r in self._read():
+            by_user[r["user_id"]].append(r)
+        self._user_versions = {user_id: user_ratings_version(user_ratings) for user_id, user_ratings in by_user.items()}
+        self._user_versions_stat = stat
+
+    def _update_user_version(self, ratings: list[dict], user_id: str):
+        """Refresh one user's version after this repository wrote ``ratings``."""
+        with self._versions_lock:
+            if self._user_versions is None:
+                return
+            self._user_versions[user_id] = user_ratings_version([r for r in ratings if r["user_id"] == user_id])
+            self._user_versions_stat = self._file_stat()
+
+    def _publish(self, event_type: str, payload: dict | None = None):
+        if self.event_bus is not None:
+            self.event_bus.publish(event_type, payload)
+
     def _get_next_id(self) -> int:
         """Get next available ID."""
         ratings = self._read()
@@ -65,6 +103,21 @@ class RatingsRepository:
             return user_ratings[:limit]
         return user_ratings
 
+    def get_user_version(self, user_id: str) -> str:
+        """
+        Version of a user's ratings as "count:latest_timestamp".
+
+        Creating, updating or deleting one of the user's ratings changes it,
+        so data derived from their ratings can be checked against it. The
+        versions of all users are indexed on first use and updated by this
+        repository's writes, so a lookup costs one stat of the ratings file;
+        the index is rebuilt only if the file was changed from elsewhere.
+        """
+        with self._versions_lock:
+            if self._user_versions is None or self._user_versions_stat != self._file_stat():
+                self._index_user_versions()
+            return self._user_versions.get(user_id, user_ratings_version([]))
+
     def get_by_movie(self, movie_id: int) -> list[dict]:
         """Get all ratings for a movie."""
         ratings = self._read()
@@ -91,6 +144,8 @@ class RatingsRepository:
 
         ratings.append(new_rating)
         self._write(ratings)
+        self._update_user_version(ratings, new_rating["user_id"])
+        self._publish(RATING_CREATED, new_rating)
         return new_rating
 
     def update(self, rating_id: int, rating_data: dict) -> dict | None:
@@ -105,18 +160,26 @@ class RatingsRepository:
                 }
                 ratings[i] = updated
                 self._write(ratings)
+                self._update_user_version(ratings, updated["user_id"])
+                self._publish(RATING_UPDATED, {**updated, "previous_rating": r["rating"]})
                 return updated
         return None
 
     def delete(self, rating_id: int) -> bool:
         """Delete a rating."""
         ratings = self._read()
-        new_ratings = [r for r in ratings if r["id"] != rating_id]
-        if len(new_ratings) == len(ratings):
+        deleted = next((r for r in ratings if r["id"] == rating_id), None)
+        if deleted is None:
             return False
-        self._write(new_ratings)
+        remaining = [r for r in ratings if r["id"] != rating_id]
+        self._write(remaining)
+        self._update_user_version(remaining, deleted["user_id"])
+        self._publish(RATING_DELETED, deleted)
         return True
 
     def save_data(self, ratings: list[dict]):
         """Overwrite the ratings file with the given list of ratings."""
         self._write(ratings)
+        with self._versions_lock:
+            self._user_versions = None
+        self._publish(RATINGS_RESET)
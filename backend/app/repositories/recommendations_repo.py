@@ -1,83 +1,201 @@
 """Repository for cached recommendations."""
 
-import json
+import sqlite3
+import threading
+from array import array
 from datetime import UTC, datetime, timedelta
 from pathlib import Path
 
 from app.core.config import settings
 
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recommendations (
+    user_id TEXT PRIMARY KEY,
+    movie_ids BLOB NOT NULL,
+    scores BLOB NOT NULL,
+    timestamp TEXT NOT NULL,
+    artifact_version TEXT,
+    variant TEXT,
+    ratings_version TEXT,
+    stale INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID
+"""
+
+_SELECT = """
+SELECT movie_ids, scores, timestamp, artifact_version, variant, ratings_version, stale
+FROM recommendations WHERE user_id = ?
+"""
+
+_INSERT = """
+INSERT OR REPLACE INTO recommendations
+    (user_id, movie_ids, scores, timestamp, artifact_version, variant, ratings_version, stale)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _pack(recommendations: list[dict]) -> tuple[bytes, bytes]:
+    """Encode a recommendation list as packed movie ID and score arrays."""
+    movie_ids = array("i", (int(item["movie_id"]) for item in recommendations))
+    scores = array("d", (float(item["similarity_score"]) for item in recommendations))
+    return movie_ids.tobytes(), scores.tobytes()
+
+
+def _pack_columns(entry: dict) -> tuple[bytes, bytes]:
+    """Encode a cache entry given either as a recommendation list or as movie ID and score columns."""
+    if "movie_ids" in entry:
+        return array("i", entry["movie_ids"]).tobytes(), array("d", entry["scores"]).tobytes()
+    return _pack(entry.get("recommendations", []))
+
+
+def _unpack(movie_ids: bytes, scores: bytes) -> list[dict]:
+    """Decode packed movie ID and score arrays into a recommendation list."""
+    ids = array("i")
+    ids.frombytes(movie_ids)
+    values = array("d")
+    values.frombytes(scores)
+    return [{"movie_id": mid, "similarity_score": score} for mid, score in zip(ids, values, strict=True)]
+
+
+def is_fresh_entry(entry: dict, max_age_hours: int = 24) -> bool:
+    """Whether a cache entry from ``get_for_user`` is not marked stale and younger than ``max_age_hours``."""
+    if entry.get("stale"):
+        return False
+    try:
+        age = datetime.now(UTC) - datetime.fromisoformat(entry["timestamp"])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return age < timedelta(hours=max_age_hours)
+
 
 class RecommendationsRepository:
-    """Handle cached recommendations stored in JSON."""
+    """
+    Handle cached recommendations stored in SQLite, one row per user.
+
+    Each read or write of a user's cache is a single statement on the
+    primary key, so its cost does not grow with the number of users. The
+    recommendation list is stored as packed binary arrays of movie IDs and
+    scores rather than JSON.
+    """
 
     def __init__(self, recommendations_file: str | None = None):
-        """Initialize with path to recommendations JSON file."""
+        """Initialize with path to the recommendations database."""
         if recommendations_file is None:
             recommendations_file = settings.RECOMMENDATIONS_FILE
         self.recommendations_file = Path(recommendations_file)
-        self._ensure_file_exists()
+        # One connection shared by request and background threads; statements are serialized
+        self._lock = threading.Lock()
+        self._conn = self._connect()
 
-    def _ensure_file_exists(self):
-        """Create recommendations file if it doesn't exist."""
-        if not self.recommendations_file.exists():
-            self.recommendations_file.parent.mkdir(parents=True, exist_ok=True)
-            self.recommendations_file.write_text("{}", encoding="utf-8")
-
-    def _read(self) -> dict:
-        """Read all cached recommendations."""
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database, creating the file and table if they don't exist."""
         try:
-            with Path.open(self.recommendations_file, encoding="utf-8") as f:
-                return json.load(f)
-        except (OSError, json.JSONDecodeError):
-            return {}
+            self.recommendations_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.recommendations_file, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            raise OSError(f"Failed to open recommendations database: {e}") from e
+        return conn
 
-    def _write(self, recommendations: dict):
-        """Write all recommendations to file."""
+    def _execute(self, sql: str, params: tuple = ()) -> tuple | None:
+        """Run one statement and return its first row, if any."""
         try:
-            with Path.open(self.recommendations_file, "w", encoding="utf-8") as f:
-                json.dump(recommendations, f, indent=2, ensure_ascii=False)
-        except OSError as e:
-            raise OSError(f"Failed to write recommendations file: {e}") from e
+            with self._lock:
+                return self._conn.execute(sql, params).fetchone()
+        except sqlite3.Error as e:
+            raise OSError(f"Recommendations database error: {e}") from e
 
     def get_for_user(self, user_id: str) -> dict | None:
         """Get cached recommendations for a user."""
-        try:
-            data = self._read()
-        except OSError as e:
-            raise OSError(f"Failed to get cached recommendations for user {user_id}: {e}") from e
-        return data.get(str(user_id))
-
-    def save_for_user(self, user_id: str, recommendations: list[dict]):
-        """Save recommendations for a user."""
-        data = self._read()
-        data[str(user_id)] = {
-            "recommendations": recommendations,
-            "timestamp": datetime.now(UTC).isoformat(),
-            "generated_at": datetime.now(UTC).isoformat(),
+        row = self._execute(_SELECT, (str(user_id),))
+        if row is None:
+            return None
+
+        movie_ids, scores, timestamp, artifact_version, variant, ratings_version, stale = row
+        return {
+            "recommendations": _unpack(movie_ids, scores),
+            "timestamp": timestamp,
+            "artifact_version": artifact_version,
+            "variant": variant,
+            "ratings_version": ratings_version,
+            "stale": bool(stale),
         }
-        self._write(data)
+
+    def save_for_user(
+        self,
+        user_id: str,
+        recommendations: list[dict],
+        artifact_version: str | None = None,
+        variant: str | None = None,
+        ratings_version: str | None = None,
+    ):
+        """Save recommendations for a user, tagged with the versions of the data they were generated from."""
+        movie_ids, scores = _pack(recommendations)
+        timestamp = datetime.now(UTC).isoformat()
+        self._execute(
+            _INSERT, (str(user_id), movie_ids, scores, timestamp, artifact_version, variant, ratings_version, 0)
+        )
 
     def clear_for_user(self, user_id: str):
         """Clear cached recommendations for a user."""
-        data = self._read()
-        user_key = str(user_id)
-        if user_key in data:
-            del data[user_key]
-            self._write(data)
+        self._execute("DELETE FROM recommendations WHERE user_id = ?", (str(user_id),))
+
+    def mark_stale(self, user_id: str):
+        """Mark a user's cached recommendations as out of date without discarding them."""
+        self._execute("UPDATE recommendations SET stale = 1 WHERE user_id = ? AND stale = 0", (str(user_id),))
 
     def is_fresh(self, user_id: str, max_age_hours: int = 24) -> bool:
-        """Check if cached recommendations are still fresh."""
-        cached = self.get_for_user(user_id)
-        if not cached or "timestamp" not in cached:
+        """Check if cached recommendations are still fresh (use ``is_fresh_entry`` on an entry already read)."""
+        row = self._execute("SELECT timestamp, stale FROM recommendations WHERE user_id = ?", (str(user_id),))
+        if row is None:
             return False
+        return is_fresh_entry({"timestamp": row[0], "stale": row[1]}, max_age_hours)
 
-        try:
-            cached_time = datetime.fromisoformat(cached["timestamp"])
-            age = datetime.now(UTC) - cached_time
-            return age < timedelta(hours=max_age_hours)
-        except (ValueError, KeyError):
-            return False
+    def save_many(self, entries: dict[str, dict]):
+        """
+        Save the cached recommendations of many users in one transaction.
+
+        Args:
+            entries: User ID -> cache entry with either "recommendations" or
+                parallel "movie_ids" and "scores" lists (which are packed
+                without building a dict per movie), and optional
+                "artifact_version", "variant" and "ratings_version" keys
+        """
+        self._write_rows(entries, replace_all=False)
 
     def save_data(self, recommendations: dict):
-        """Overwrite the recommendations file with the given dictionary."""
-        self._write(recommendations)
+        """Replace all cached recommendations with the given user ID -> cache entry dictionary."""
+        self._write_rows(recommendations, replace_all=True)
+
+    def _write_rows(self, entries: dict[str, dict], *, replace_all: bool):
+        now = datetime.now(UTC).isoformat()
+        rows = []
+        for user_id, entry in entries.items():
+            movie_ids, scores = _pack_columns(entry)
+            rows.append(
+                (
+                    str(user_id),
+                    movie_ids,
+                    scores,
+                    entry.get("timestamp") or now,
+                    entry.get("artifact_version"),
+                    entry.get("variant"),
+                    entry.get("ratings_version"),
+                    int(bool(entry.get("stale"))),
+                )
+            )
+
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute("BEGIN")
+                    if replace_all:
+                        self._conn.execute("DELETE FROM recommendations")
+                    self._conn.executemany(_INSERT, rows)
+            except sqlite3.Error as e:
+                raise OSError(f"Failed to write recommendations database: {e}") from e
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
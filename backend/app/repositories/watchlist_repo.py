@@ -5,16 +5,18 @@ from datetime import UTC, datetime
 from pathlib import Path
 
 from app.core.config import settings
+from app.core.events import WATCHLIST_ADDED, WATCHLIST_REMOVED, EventBus
 
 
 class WatchlistRepository:
     """Handle user watchlists stored in JSON."""
 
-    def __init__(self, watchlist_file: str | None = None):
-        """Initialize with path to watchlist JSON file."""
+    def __init__(self, watchlist_file: str | None = None, event_bus: EventBus | None = None):
+        """Initialize with path to watchlist JSON file and an optional bus to publish changes to."""
         if watchlist_file is None:
             watchlist_file = settings.WATCHLIST_FILE
         self.watchlist_file = Path(watchlist_file)
+        self.event_bus = event_bus
         self._ensure_file_exists()
 
     def _ensure_file_exists(self):
@@ -42,6 +44,10 @@ class WatchlistRepository:
         except OSError as e:
             raise OSError(f"Failed to write watchlist file: {e}") from e
 
+    def _publish(self, event_type: str, payload: dict):
+        if self.event_bus is not None:
+            self.event_bus.publish(event_type, payload)
+
     def get_by_user(self, user_id: str) -> list[dict]:
         """Get user's watchlist."""
         data = self._read()
@@ -62,6 +68,7 @@ class WatchlistRepository:
 
         data.append(new_item)
         self._write(data)
+        self._publish(WATCHLIST_ADDED, new_item)
 
         return new_item
 
@@ -75,6 +82,7 @@ class WatchlistRepository:
 
         if len(new_data) < len(data):
             self._write(new_data)
+            self._publish(WATCHLIST_REMOVED, {"user_id": user_id, "movie_id": movie_id})
             return True
 
         return False
@@ -3,11 +3,13 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 
 from app.core.dependencies import get_current_admin_user, get_resources
 from app.core.resources import SingletonResources
 from app.schemas.penalty import Penalty, PenaltyCreate
-from app.services import admin_service
+from app.schemas.recommendation import BatchRecommendationRequest
+from app.services import admin_service, batch_service, precompute_service
 
 router = APIRouter()
 
@@ -100,3 +102,70 @@ def check_user_violations(
     """Check for user violations."""
     violations = admin_service.check_user_violations(resources, user_id)
     return {"user_id": user_id, "violations": violations}
+
+
+@router.get("/recommender")
+def get_recommender_status(
+    resources: Annotated[SingletonResources, Depends(get_resources)],
+    _current_admin: Annotated[dict, Depends(get_current_admin_user)],
+):
+    """Get the loaded recommender artifact version and reload state."""
+    return resources.recommender_status()
+
+
+@router.post("/recommender/reload", status_code=status.HTTP_202_ACCEPTED)
+def reload_recommender(
+    resources: Annotated[SingletonResources, Depends(get_resources)],
+    _current_admin: Annotated[dict, Depends(get_current_admin_user)],
+):
+    """
+    Load the current ML artifacts in the background and swap them in once validated.
+
+    Only the worker process handling this request reloads. With several
+    workers, rely on RECOMMENDER_WATCH_INTERVAL instead, which every worker runs.
+    """
+    if not resources.reload_recommender():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A recommender reload is already in progress",
+        )
+    return {"message": "Recommender reload started", **resources.recommender_status()}
+
+
+@router.post("/recommendations/precompute", status_code=status.HTTP_202_ACCEPTED)
+def precompute_recommendations(
+    resources: Annotated[SingletonResources, Depends(get_resources)],
+    _current_admin: Annotated[dict, Depends(get_current_admin_user)],
+):
+    """Regenerate every user's cached recommendations in a background batch job."""
+    if not precompute_service.start_precompute(resources):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A recommendation precompute is already running",
+        )
+    return {"message": "Recommendation precompute started"}
+
+
+@router.get("/recommendations/precompute")
+def get_precompute_status(
+    _current_admin: Annotated[dict, Depends(get_current_admin_user)],
+):
+    """Get the progress of the running recommendation precompute, or the summary of the last one."""
+    return precompute_service.get_precompute_status()
+
+
+@router.post("/recommendations/batch")
+def batch_recommendations(
+    request: BatchRecommendationRequest,
+    resources: Annotated[SingletonResources, Depends(get_resources)],
+    _current_admin: Annotated[dict, Depends(get_current_admin_user)],
+):
+    """
+    Get top-N recommendations for many users in one call, streamed as NDJSON.
+
+    Each line is one user's recommendation list, in request order.
+    """
+    return StreamingResponse(
+        batch_service.stream_recommendations(resources, request.user_ids, request.limit),
+        media_type="application/x-ndjson",
+    )
@@ -2,30 +2,72 @@
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
-from app.core.dependencies import get_current_user, get_resources
+from app.core.dependencies import get_current_user, get_optional_current_user, get_resources
 from app.main import SingletonResources
-from app.schemas.recommendation import RecommendationItem, RecommendationList
+from app.schemas.recommendation import (
+    RecommendationFilters,
+    RecommendationItem,
+    RecommendationList,
+    SessionRecommendationList,
+    SessionRecommendationRequest,
+    SimilarityMatrix,
+    SimilarityMatrixRequest,
+)
 from app.services import recommendations_service
 
 router = APIRouter()
 
 
+def get_recommendation_filters(
+    genres: Annotated[list[str] | None, Query(description="Only movies with any of these genres")] = None,
+    year_min: Annotated[int | None, Query(ge=1800, le=2100, description="Only movies released in or after")] = None,
+    year_max: Annotated[int | None, Query(ge=1800, le=2100, description="Only movies released in or before")] = None,
+    *,
+    exclude_watchlist: Annotated[bool, Query(description="Leave out movies on your watchlist")] = False,
+    exclude_rated: Annotated[bool, Query(description="Leave out movies you rated")] = False,
+) -> RecommendationFilters:
+    """Dependency collecting the recommendation filters from the query string."""
+    if year_min is not None and year_max is not None and year_min > year_max:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail="year_min must not be after year_max"
+        )
+    return RecommendationFilters(
+        genres=genres,
+        year_min=year_min,
+        year_max=year_max,
+        exclude_watchlist=exclude_watchlist,
+        exclude_rated=exclude_rated,
+    )
+
+
+def get_recommendation_options(
+    filters: Annotated[RecommendationFilters, Depends(get_recommendation_filters)],
+    diversity: Annotated[
+        float | None, Query(ge=0, le=1, description="Re-rank for variety (MMR); 0 keeps the relevance order")
+    ] = None,
+) -> RecommendationFilters:
+    """Dependency adding the diversity weight to the recommendation filters."""
+    return filters.model_copy(update={"diversity": diversity})
+
+
 @router.get("/me", response_model=RecommendationList)
 def get_my_recommendations(
     current_user: Annotated[dict, Depends(get_current_user)],
     resources: Annotated[SingletonResources, Depends(get_resources)],
+    filters: Annotated[RecommendationFilters, Depends(get_recommendation_options)],
     *,
     limit: Annotated[int, Query(ge=1, le=50)] = 10,
     force_refresh: Annotated[bool, Query(description="Force regenerate recommendations")] = False,
 ):
-    """Get personalized recommendations."""
+    """Get personalized recommendations, optionally filtered. Rated movies are always left out."""
     return recommendations_service.get_recommendations(
         resources,
         user_id=current_user["id"],
         limit=limit,
         force_refresh=force_refresh,
+        filters=filters.model_copy(update={"user_id": current_user["id"]}),
     )
 
 
@@ -35,15 +77,68 @@ def refresh_my_recommendations(
     resources: Annotated[SingletonResources, Depends(get_resources)],
     limit: Annotated[int, Query(ge=1, le=50)] = 10,
 ):
-    """Force refresh recommendations."""
+    """Regenerate recommendations now, instead of serving the cached list while they refresh in the background."""
     return recommendations_service.refresh_recommendations_for_user(resources, user_id=current_user["id"], limit=limit)
 
 
+def get_user_recommendation_filters(
+    filters: Annotated[RecommendationFilters, Depends(get_recommendation_options)],
+    current_user: Annotated[dict | None, Depends(get_optional_current_user)],
+) -> RecommendationFilters:
+    """Recommendation filters for endpoints open to anonymous users; excluding watchlist or rated movies needs a login."""
+    if current_user is None:
+        if filters.exclude_watchlist or filters.exclude_rated:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Log in to exclude your watchlist or rated movies",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return filters
+    return filters.model_copy(update={"user_id": current_user["id"]})
+
+
 @router.get("/similar/{movie_id}", response_model=list[RecommendationItem])
 def get_similar_movies(
     resources: Annotated[SingletonResources, Depends(get_resources)],
+    filters: Annotated[RecommendationFilters, Depends(get_user_recommendation_filters)],
     movie_id: int,
     limit: Annotated[int, Query(ge=1, le=50)] = 10,
+    genre_weight: Annotated[
+        float | None, Query(ge=0, le=1, description="Weight of genre vs. genome similarity")
+    ] = None,
+):
+    """Get movies similar to a specific movie, optionally filtered."""
+    try:
+        return recommendations_service.get_similar_movies(
+            resources, movie_id=movie_id, limit=limit, genre_weight=genre_weight, filters=filters
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+
+
+@router.post("/session", response_model=SessionRecommendationList)
+def get_session_recommendations(
+    request: SessionRecommendationRequest,
+    resources: Annotated[SingletonResources, Depends(get_resources)],
+):
+    """Get recommendations from a list of liked movies, without logging in."""
+    try:
+        return recommendations_service.get_session_recommendations(
+            resources, [(movie.movie_id, movie.weight) for movie in request.movies], limit=request.limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+
+
+@router.post("/similarity-matrix", response_model=SimilarityMatrix)
+def get_similarity_matrix(
+    request: SimilarityMatrixRequest,
+    resources: Annotated[SingletonResources, Depends(get_resources)],
 ):
-    """Get movies similar to a specific movie."""
-    return recommendations_service.get_similar_movies(resources, movie_id=movie_id, limit=limit)
+    """Get the pairwise similarities of 2-200 movies as a base64-encoded float32 matrix."""
+    try:
+        return recommendations_service.get_similarity_matrix(
+            resources, request.movie_ids, genre_weight=request.genre_weight
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
@@ -1,6 +1,6 @@
 """Recommendation schemas."""
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class RecommendationItem(BaseModel):
@@ -15,3 +15,75 @@ class RecommendationList(BaseModel):
 
     user_id: str
     recommendations: list[RecommendationItem]
+    variant: str | None = None
+
+
+class BatchRecommendationRequest(BaseModel):
+    """Users to generate recommendations for in one batch."""
+
+    user_ids: list[str] = Field(..., min_length=1, max_length=10000)
+    limit: int = Field(10, ge=1, le=100, description="Recommendations per user")
+
+
+class SessionMovie(BaseModel):
+    """A movie a visitor liked, with an optional relative weight."""
+
+    movie_id: int
+    weight: float = Field(1.0, gt=0, le=5, description="Relative weight, e.g. the visitor's rating")
+
+
+class SessionRecommendationRequest(BaseModel):
+    """Movies to recommend from for a visitor without an account."""
+
+    movies: list[SessionMovie] = Field(..., min_length=1, max_length=500)
+    limit: int = Field(10, ge=1, le=50)
+
+
+class SessionRecommendationList(BaseModel):
+    """Recommendations for an anonymous session."""
+
+    session_key: str = Field(..., description="Hash of the normalized movie set; equal inputs share a key")
+    recommendations: list[RecommendationItem]
+
+
+class SimilarityMatrixRequest(BaseModel):
+    """Movies to compute the pairwise similarities of."""
+
+    movie_ids: list[int] = Field(..., min_length=2, max_length=200)
+    genre_weight: float | None = Field(None, ge=0, le=1, description="Weight of genre vs. genome similarity")
+
+
+class SimilarityMatrix(BaseModel):
+    """Pairwise similarities of a set of movies, as a base64-encoded typed array."""
+
+    movie_ids: list[int] = Field(..., description="Row and column order of the matrix")
+    missing_ids: list[int] = Field(default_factory=list, description="Requested IDs not in the recommender dataset")
+    dtype: str = Field("float32", description="Element type; little-endian")
+    shape: list[int]
+    data: str = Field(..., description="Base64 of the row-major matrix bytes, e.g. a Float32Array in a browser")
+
+
+class RecommendationFilters(BaseModel):
+    """
+    Filters applied to the catalog before the top recommendations are selected,
+    and the diversity of the MMR re-ranking applied after.
+    """
+
+    genres: list[str] | None = None
+    year_min: int | None = None
+    year_max: int | None = None
+    exclude_watchlist: bool = False
+    exclude_rated: bool = False
+    user_id: str | None = Field(None, description="User whose watchlist and ratings are excluded")
+    diversity: float | None = Field(None, ge=0, le=1, description="MMR re-ranking weight; default MMR_DIVERSITY")
+
+    @property
+    def active(self) -> bool:
+        """Whether any filter is set; the diversity weight does not filter."""
+        return bool(
+            self.genres
+            or self.year_min is not None
+            or self.year_max is not None
+            or self.exclude_watchlist
+            or self.exclude_rated
+        )
@@ -0,0 +1,168 @@
+"""
+Recommendations for many users at once.
+
+The ratings are read once and grouped into one scoring job per user. The
+users' content profiles are then scored in chunks with one matrix multiply
+and one batched top-N selection per chunk, instead of a full pass per user.
+Used by the batch endpoint and the nightly precompute.
+"""
+
+import json
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+
+import numpy as np
+
+from app.core.config import settings
+from app.ml.recommender import MovieRecommender
+from app.repositories.ratings_repo import user_ratings_version
+from app.services.recommendations_service import assign_weight_variant, content_profile, get_fallback_recommendations
+
+# Profiles scored together in one matrix multiply (each holds a score per catalog movie while ranked)
+SCORING_CHUNK = 128
+
+
+def scoring_options() -> dict:
+    """Settings that decide how users are scored, passed to worker processes along with the jobs."""
+    return {"personalized_engine": settings.PERSONALIZED_ENGINE, "cf_blend_weight": settings.CF_BLEND_WEIGHT}
+
+
+def build_jobs(ratings: list[dict], user_ids: Iterable[str] | None = None) -> tuple[list[dict], dict[str, str]]:
+    """
+    Group ratings by user into scoring jobs.
+
+    Args:
+        ratings: All ratings, as returned by RatingsRepository.get_all
+        user_ids: Only build jobs for these users; default every user with ratings
+
+    Returns:
+        Tuple of (one job per user with ratings, sorted by user ID; user ID -> ratings version).
+    """
+    wanted = None if user_ids is None else set(user_ids)
+    by_user: dict[str, list[dict]] = defaultdict(list)
+    for r in ratings:
+        if wanted is None or r["user_id"] in wanted:
+            by_user[r["user_id"]].append(r)
+
+    jobs = []
+    for user_id in sorted(by_user):
+        user_ratings = by_user[user_id]
+        variant, genre_weight = assign_weight_variant(user_id)
+        seed_weights, rated = content_profile(user_ratings)
+        timestamps = [datetime.fromisoformat(r["timestamp"]) for r in user_ratings if r.get("timestamp")]
+        jobs.append(
+            {
+                "user_id": user_id,
+                "variant": variant,
+                "genre_weight": genre_weight,
+                "seed_weights": seed_weights,
+                "rated": rated,
+                "ratings": {r["movie_id"]: r["rating"] for r in user_ratings},
+                "updated_at": max(timestamps, default=None),
+            }
+        )
+    return jobs, {user_id: user_ratings_version(user_ratings) for user_id, user_ratings in by_user.items()}
+
+
+def score_jobs(recommender: MovieRecommender, jobs: list[dict], n: int, scoring: dict) -> dict[str, dict]:
+    """
+    Score a list of jobs from build_jobs.
+
+    Content profiles sharing a genre weight are scored SCORING_CHUNK at a
+    time with ``rank_profiles``; with the ALS engine each user is one dot
+    product against the item factors.
+
+    Returns:
+        User ID -> entry with parallel "movie_ids" and "scores" lists (best
+        first, scores rounded to 4 decimals) and the user's "variant".
+    """
+    use_als = scoring["personalized_engine"] == "als" and recommender.has_als
+    cf_weight = scoring["cf_blend_weight"] if recommender.has_collaborative else 0.0
+
+    ranked: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+    by_genre_weight: dict[float | None, list[dict]] = defaultdict(list)
+    for job in jobs:
+        if use_als:
+            movies = recommender.recommend_for_user(
+                job["user_id"], job["ratings"], n=n, exclude=job["rated"], updated_at=job["updated_at"]
+            )
+            ranked[job["user_id"]] = (
+                np.array([movie_id for movie_id, _ in movies], dtype=np.int64),
+                np.array([score for _, score in movies], dtype=np.float32),
+            )
+        else:
+            by_genre_weight[job["genre_weight"]].append(job)
+
+    for genre_weight, group in by_genre_weight.items():
+        for offset in range(0, len(group), SCORING_CHUNK):
+            chunk = group[offset : offset + SCORING_CHUNK]
+            results = recommender.rank_profiles(
+                [job["seed_weights"] for job in chunk],
+                n=n,
+                excludes=[job["rated"] for job in chunk],
+                genre_weight=genre_weight,
+                cf_weight=cf_weight,
+            )
+            ranked.update((job["user_id"], result) for job, result in zip(chunk, results, strict=True))
+
+    # Columns rather than a dict per movie: cheaper to build, to send back from a worker and to pack
+    return {
+        job["user_id"]: {
+            "movie_ids": ranked[job["user_id"]][0].tolist(),
+            "scores": np.round(ranked[job["user_id"]][1].astype(np.float64), 4).tolist(),
+            "variant": job["variant"],
+        }
+        for job in jobs
+    }
+
+
+def stream_recommendations(resources, user_ids: list[str], limit: int = 10) -> Iterator[str]:
+    """
+    Generate top-N recommendations for many users as NDJSON lines.
+
+    Each line is a JSON object with "user_id", "recommendations" and
+    "variant", like a RecommendationList, in the order the users were
+    requested (duplicates dropped). Unknown users get an "error" instead,
+    users without ratings the fallback recommendations. Lines are produced
+    one scored chunk at a time, so the response can be streamed.
+
+    Args:
+        resources: Application resources singleton
+        user_ids: IDs of the users to recommend for
+        limit: Number of recommendations per user
+
+    Yields:
+        Newline-terminated JSON lines for one chunk of users.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    known = {user["id"] for user in resources.users_repo.get_all()}
+    jobs, _ = build_jobs(resources.ratings_repo.get_all(), (uid for uid in user_ids if uid in known))
+    jobs_by_user = {job["user_id"]: job for job in jobs}
+    recommender = resources.recommender
+    scoring = scoring_options()
+    fallback = None
+
+    for offset in range(0, len(user_ids), SCORING_CHUNK):
+        chunk = user_ids[offset : offset + SCORING_CHUNK]
+        entries = score_jobs(recommender, [jobs_by_user[uid] for uid in chunk if uid in jobs_by_user], limit, scoring)
+        lines = []
+        for user_id in chunk:
+            if user_id not in known:
+                line = {"user_id": user_id, "error": "User not found"}
+            elif user_id in entries:
+                entry = entries[user_id]
+                line = {
+                    "user_id": user_id,
+                    "recommendations": [
+                        {"movie_id": movie_id, "similarity_score": score}
+                        for movie_id, score in zip(entry["movie_ids"], entry["scores"], strict=True)
+                    ],
+                    "variant": entry["variant"],
+                }
+            else:
+                if fallback is None:
+                    fallback = [item.model_dump() for item in get_fallback_recommendations(resources, limit)]
+                line = {"user_id": user_id, "recommendations": fallback, "variant": None}
+            lines.append(json.dumps(line) + "\n")
+        yield "".join(lines)
@@ -1,13 +1,14 @@
 """Global insights service for platform-wide analytics."""
 
 import logging
-from collections import defaultdict
-from statistics import mean
 
 from app.schemas.global_insights import GlobalGenreLeaderboard, GlobalGenreStats
 
 logger = logging.getLogger(__name__)
 
+# Keyed by the genre aggregates version and the user ids, so the leaderboard is rebuilt only after either changes
+_leaderboard_cache = {"key": None, "data": None}
+
 
 def _calculate_popularity_score(total_ratings: int, avg_rating: float, total_platform_ratings: int) -> float:
     """
@@ -31,43 +32,42 @@ def get_global_genre_leaderboard(resources) -> GlobalGenreLeaderboard:
     """
     Generate global genre popularity leaderboard across all users.
 
+    The leaderboard is built from the per-genre rating aggregates
+    (``resources.genre_stats``), which follow the rating change events, and
+    is cached until they or the set of users change.
+
     Args:
         resources: SingletonResources instance
 
     Returns:
         GlobalGenreLeaderboard with ranked genres
     """
-    all_users = resources.users_repo.get_all()
-    user_ids = [user["id"] for user in all_users]
-
-    genre_stats = defaultdict(lambda: {"ratings": [], "user_ids": set()})
-
-    total_platform_ratings = 0
-
-    for user_id in user_ids:
-        user_ratings = resources.ratings_repo.get_by_user(user_id)
-
-        for rating in user_ratings:
-            movie = resources.movies_repo.get_by_id(rating["movie_id"])
-            if not movie or not movie.get("genres"):
-                continue
+    user_ids = [user["id"] for user in resources.users_repo.get_all()]
+    key = (resources.genre_stats.version, tuple(user_ids))
+    if _leaderboard_cache["key"] == key:
+        return _leaderboard_cache["data"]
 
-            rating_value = float(rating["rating"])
-            total_platform_ratings += 1
+    leaderboard = _build_leaderboard(resources, user_ids)
+    _leaderboard_cache["data"] = leaderboard
+    _leaderboard_cache["key"] = key
+    return leaderboard
 
-            for genre in movie["genres"]:
-                if not genre:
-                    continue
 
-                genre_stats[genre]["ratings"].append(rating_value)
-                genre_stats[genre]["user_ids"].add(user_id)
+def _build_leaderboard(resources, user_ids: list[str]) -> GlobalGenreLeaderboard:
+    genre_totals, user_counts = resources.genre_stats.snapshot()
+    # Ratings left behind by deleted users are not counted
+    known_users = set(user_ids)
+    total_platform_ratings = sum(user_counts.get(user_id, 0) for user_id in known_users)
 
     genre_leaderboard = []
 
-    for genre, stats in genre_stats.items():
-        total_ratings = len(stats["ratings"])
-        avg_rating = mean(stats["ratings"]) if stats["ratings"] else 0.0
-        user_count = len(stats["user_ids"])
+    for genre, users in genre_totals.items():
+        totals = [user_totals for user_id, user_totals in users.items() if user_id in known_users]
+        if not totals:
+            continue
+        total_ratings = sum(count for _, count in totals)
+        avg_rating = sum(total for total, _ in totals) / total_ratings
+        user_count = len(totals)
 
         popularity_score = _calculate_popularity_score(total_ratings, avg_rating, total_platform_ratings)
 
@@ -14,7 +14,7 @@ def get_movies(
     total_pages = ceil(total / page_size) if total > 0 else 1
 
     for m in movies_data:
-        m["average_rating"] = resources.movies_repo.get_average_rating(m["movie_id"])
+        m["average_rating"] = resources.rating_stats.average(m["movie_id"])
 
     return MoviePage(
         movies=[Movie(**m) for m in movies_data],
@@ -39,7 +39,7 @@ def get_movie_by_id(resources, movie_id: int) -> Movie | None:
     if not movie_data:
         return None
 
-    avg_rating = resources.movies_repo.get_average_rating(movie_id_int)
+    avg_rating = resources.rating_stats.average(movie_id_int)
     movie_data["average_rating"] = avg_rating
 
     return Movie(**movie_data)
@@ -0,0 +1,243 @@
+"""
+Batch precompute of every user's recommendations.
+
+Users are split into partitions that are scored in a process pool. Each
+worker loads the (memory-mapped) artifacts once and scores a partition with
+a few stacked profile matrix multiplies; the parent writes each finished
+partition to the recommendations store in one transaction. Run nightly, it
+keeps online requests on a warm cache.
+
+The process pool is for scripts/precompute_recommendations.py. On a running
+server the job scores in-process with the serving recommender instead, so
+it neither starts a second set of processes next to the request handlers
+nor tags entries with a version the server is not serving.
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import UTC, datetime
+
+from app.core.config import settings
+from app.ml.manifest import artifact_version
+from app.ml.recommender import MovieRecommender
+from app.services import batch_service
+
+logger = logging.getLogger(__name__)
+
+# Background job key; at most one precompute runs at a time
+PRECOMPUTE_JOB = "precompute_recommendations"
+
+# Recommender loaded once per worker process by _init_worker
+_worker: dict = {}
+
+_status: dict = {"state": "idle"}
+_status_lock = threading.Lock()
+
+
+def get_precompute_status() -> dict:
+    """Progress of the running precompute, or the summary of the last one."""
+    with _status_lock:
+        return {**_status, "partitions": list(_status.get("partitions", []))}
+
+
+def _set_status(**fields):
+    with _status_lock:
+        _status.update(fields)
+
+
+def _init_worker(options: dict):
+    _worker["recommender"] = MovieRecommender(**options)
+
+
+def _score_in_worker(jobs: list[dict], n: int, scoring: dict) -> tuple[str, dict[str, dict], float]:
+    return _score_partition(_worker["recommender"], jobs, n, scoring)
+
+
+def _score_partition(
+    recommender: MovieRecommender, jobs: list[dict], n: int, scoring: dict
+) -> tuple[str, dict[str, dict], float]:
+    """
+    Score one partition of users.
+
+    Returns:
+        Tuple of (artifact version, user ID -> cache entry, seconds spent scoring).
+    """
+    start = time.perf_counter()
+    entries = batch_service.score_jobs(recommender, jobs, n, scoring)
+    return recommender.version, entries, time.perf_counter() - start
+
+
+def precompute_recommendations(
+    ratings_repo,
+    recommendations_repo,
+    workers: int | None = None,
+    partition_size: int | None = None,
+    recommender: MovieRecommender | None = None,
+) -> dict:
+    """
+    Regenerate and cache the recommendations of every user with ratings.
+
+    Users without ratings are skipped; they get the fallback list online.
+    Progress is logged per partition and available from get_precompute_status.
+    Entries are tagged with the version of the recommender that scored them;
+    partitions scored by pool workers that loaded other artifacts than those
+    on disk when the job started are not saved.
+
+    Args:
+        ratings_repo: Ratings repository to read all ratings from
+        recommendations_repo: Recommendations repository the results are written to
+        workers: Worker processes (default PRECOMPUTE_WORKERS); 1 scores in this process.
+            Only the CLI script should start a pool; the server passes 1.
+        partition_size: Users per partition (default PRECOMPUTE_PARTITION_SIZE)
+        recommender: Recommender to use when scoring in this process; loaded if not given
+
+    Returns:
+        Summary with user count, skipped users, elapsed seconds, throughput and per-partition timings.
+
+    Raises:
+        ValueError: If workers or partition_size is not positive.
+    """
+    workers = workers or settings.PRECOMPUTE_WORKERS or multiprocessing.cpu_count()
+    partition_size = partition_size or settings.PRECOMPUTE_PARTITION_SIZE
+    if workers < 1 or partition_size < 1:
+        raise ValueError("Workers and partition size must be positive")
+
+    start = time.perf_counter()
+    jobs, ratings_versions = batch_service.build_jobs(ratings_repo.get_all())
+    partitions = [jobs[i : i + partition_size] for i in range(0, len(jobs), partition_size)]
+    n = settings.RECOMMENDATIONS_CACHE_DEPTH
+    scoring = batch_service.scoring_options()
+
+    in_process = workers == 1 or len(partitions) <= 1
+    if in_process:
+        recommender = recommender or _load_recommender()
+        expected_version = recommender.version
+    else:
+        expected_version = artifact_version(settings.ML_DIR)
+
+    _set_status(
+        state="running",
+        started_at=datetime.now(UTC).isoformat(),
+        finished_at=None,
+        error=None,
+        users_total=len(jobs),
+        users_done=0,
+        users_skipped=0,
+        partitions_total=len(partitions),
+        partitions=[],
+    )
+    logger.info("Precomputing recommendations for %d users in %d partitions", len(jobs), len(partitions))
+
+    def write(index: int, result: tuple[str, dict[str, dict], float]):
+        version, entries, score_seconds = result
+        if version != expected_version:
+            # The artifacts changed while the pool started; these entries would only be regenerated on first read
+            logger.warning(
+                "Partition %d was scored with artifacts %s instead of %s; not saving it",
+                index,
+                version,
+                expected_version,
+            )
+            with _status_lock:
+                _status["users_skipped"] += len(entries)
+            return
+
+        write_start = time.perf_counter()
+        for user_id, entry in entries.items():
+            entry["artifact_version"] = version
+            entry["ratings_version"] = ratings_versions[user_id]
+        recommendations_repo.save_many(entries)
+        timing = {
+            "partition": index,
+            "users": len(entries),
+            "score_seconds": round(score_seconds, 3),
+            "write_seconds": round(time.perf_counter() - write_start, 3),
+        }
+        with _status_lock:
+            _status["users_done"] += len(entries)
+            _status["partitions"].append(timing)
+            done = _status["users_done"]
+        logger.info(
+            "Partition %d: %d users scored in %.2f s, written in %.2f s (%d/%d users done)",
+            index,
+            timing["users"],
+            timing["score_seconds"],
+            timing["write_seconds"],
+            done,
+            len(jobs),
+        )
+
+    try:
+        if in_process:
+            for index, partition in enumerate(partitions):
+                write(index, _score_partition(recommender, partition, n, scoring))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(partitions)),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(_recommender_options(),),
+            ) as pool:
+                futures = {
+                    pool.submit(_score_in_worker, partition, n, scoring): index
+                    for index, partition in enumerate(partitions)
+                }
+                for future in as_completed(futures):
+                    write(futures[future], future.result())
+    except Exception as e:
+        _set_status(state="failed", error=str(e), finished_at=datetime.now(UTC).isoformat())
+        raise
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "users": len(jobs),
+        "users_skipped": get_precompute_status()["users_skipped"],
+        "seconds": round(elapsed, 3),
+        "users_per_second": round(len(jobs) / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    _set_status(state="finished", finished_at=datetime.now(UTC).isoformat(), **summary)
+    logger.info(
+        "Precomputed recommendations for %d users in %.1f s (%.0f users/s)",
+        summary["users"],
+        summary["seconds"],
+        summary["users_per_second"],
+    )
+    return {**summary, "partitions": get_precompute_status()["partitions"]}
+
+
+def start_precompute(resources) -> bool:
+    """
+    Start a precompute of every user's recommendations as a background job.
+
+    The job scores in this process with the serving recommender, so the
+    entries carry the artifact version requests are checked against. It
+    runs on ``resources.batch_jobs``, not on the runner that refreshes
+    stale caches, so a full-catalog run does not hold up those refreshes.
+
+    Returns:
+        True if the job was started, False if one is already running.
+    """
+    return resources.batch_jobs.submit(PRECOMPUTE_JOB, _precompute_in_server, resources)
+
+
+def _precompute_in_server(resources) -> dict:
+    # Read the recommender when the job starts, so a reload in between is picked up
+    return precompute_recommendations(
+        resources.ratings_repo, resources.recommendations_repo, workers=1, recommender=resources.recommender
+    )
+
+
+def _recommender_options() -> dict:
+    return {
+        "data_dir": str(settings.ML_DIR),
+        "engine": settings.RECOMMENDER_ENGINE,
+        "ann_probes": settings.ANN_PROBES,
+        "feature_set": settings.RECOMMENDER_FEATURE_SET,
+    }
+
+
+def _load_recommender() -> MovieRecommender:
+    return MovieRecommender(**_recommender_options())
@@ -1,57 +1,101 @@
-import json
-from datetime import UTC, datetime, timedelta
-from pathlib import Path
+import heapq
+from collections.abc import Iterable, Iterator
 
-from app.core.config import settings
 from app.core.resources import SingletonResources
 
 # Settings
-UPDATE_FREQUENCY_HOURS = 24
 NOISE_FILTER = 0.5
 MIN_METRICS_COUNT = 5
+POPULAR_COUNT = 5
 
-_popular_cache = {"last_updated": None, "data": []}
+# Keyed by the rating aggregates version, so the ranking is recomputed only after ratings change
+_popular_cache = {"version": None, "data": []}
 
+# Every rated movie by Bayesian average, best first, and the same split per genre (built on first use).
+# Backs the popular list and the cold-start recommendations; keyed by the rating aggregates version too.
+_ranking_cache = {"version": None, "scored": [], "ranked": [], "by_genre": None}
 
-def get_popular_movies(resources: SingletonResources) -> list[dict]:
-    now = datetime.now(UTC)
 
-    if (
-        _popular_cache["data"]
-        and _popular_cache["last_updated"]
-        and (now - _popular_cache["last_updated"]) < timedelta(hours=UPDATE_FREQUENCY_HOURS)
-    ):
+def get_popular_movies(resources: SingletonResources) -> list[dict]:
+    version = resources.rating_stats.version
+    if _popular_cache["version"] == version:
         return _popular_cache["data"]
 
     top_movies = _calculate_weighted_ratings(resources)
     _popular_cache["data"] = top_movies
-    _popular_cache["last_updated"] = now
+    _popular_cache["version"] = version
     return top_movies
 
 
-def _calculate_weighted_ratings(resources: SingletonResources) -> list[dict]:
-    ratings_path = Path(settings.RATINGS_FILE)
-    if not ratings_path.exists():
-        return []
-
-    with ratings_path.open() as f:
-        ratings_list = json.load(f)
-
-    if not ratings_list:
+def get_bayesian_ranking(
+    resources: SingletonResources, genres: Iterable[str] | None = None
+) -> Iterator[tuple[int, float]]:
+    """
+    Rated movies by Bayesian average rating, best first.
+
+    The ranking is precomputed once per change of the rating aggregates,
+    overall and per genre, so reading the top of it costs no scan. With
+    several genres their lists are merged lazily.
+
+    Args:
+        resources: Application resources singleton
+        genres: Only movies with any of these genres (case-insensitive)
+
+    Yields:
+        (movie_id, Bayesian average rating) tuples.
+    """
+    ranking = _current_ranking(resources)
+    if not genres:
+        yield from ranking["ranked"]
+        return
+
+    if ranking["by_genre"] is None:
+        ranking["by_genre"] = _split_by_genre(resources, ranking["ranked"])
+    lists = [ranking["by_genre"].get(genre.lower(), []) for genre in dict.fromkeys(genres)]
+    seen: set[int] = set()
+    for movie_id, score in heapq.merge(*lists, key=lambda entry: -entry[1]):
+        if movie_id not in seen:
+            seen.add(movie_id)
+            yield movie_id, score
+
+
+def _current_ranking(resources: SingletonResources) -> dict:
+    version = resources.rating_stats.version
+    if _ranking_cache["version"] != version:
+        scored = _bayesian_scores(resources)
+        _ranking_cache["scored"] = scored
+        _ranking_cache["ranked"] = [(m_id, score) for m_id, score, _, _, _ in scored]
+        _ranking_cache["by_genre"] = None
+        _ranking_cache["version"] = version
+    return _ranking_cache
+
+
+def _split_by_genre(resources: SingletonResources, ranked: list[tuple[int, float]]) -> dict[str, list]:
+    movies_df = resources.movies_repo.movies_df
+    genres_by_id = dict(zip(movies_df["movie_id"], movies_df["genres"], strict=True))
+
+    by_genre: dict[str, list[tuple[int, float]]] = {}
+    for m_id, score in ranked:
+        for genre in genres_by_id.get(m_id) or []:
+            by_genre.setdefault(genre.lower(), []).append((m_id, score))
+    return by_genre
+
+
+def _bayesian_scores(resources: SingletonResources) -> list[tuple[int, float, int, float, bool]]:
+    """
+    Bayesian average of every rated movie, best first.
+
+    Returns:
+        (movie_id, score, vote count, average rating, whether the vote count
+        passes the noise filter) tuples.
+    """
+    aggregates = resources.rating_stats.movie_stats()
+    if not aggregates:
         return []
 
-    movie_stats = {}
-    total_rating_sum = 0
-    for r in ratings_list:
-        m_id = r["movie_id"]
-        val = float(r["rating"])
-        if m_id not in movie_stats:
-            movie_stats[m_id] = {"sum": 0.0, "count": 0}
-        movie_stats[m_id]["sum"] += val
-        movie_stats[m_id]["count"] += 1
-        total_rating_sum += val
-
-    total_count = len(ratings_list)
+    movie_stats = {m_id: {"sum": total, "count": count} for m_id, (total, count) in aggregates.items()}
+    total_rating_sum = sum(s["sum"] for s in movie_stats.values())
+    total_count = sum(s["count"] for s in movie_stats.values())
     mean_vote = total_rating_sum / total_count if total_count > 0 else 0
 
     all_counts = sorted([s["count"] for s in movie_stats.values()])
@@ -59,16 +103,24 @@ def _calculate_weighted_ratings(resources: SingletonResources) -> list[dict]:
     if len(all_counts) > MIN_METRICS_COUNT:
         m = all_counts[int(len(all_counts) * NOISE_FILTER)]
 
-    weighted_movies = []
-    movies_repo = resources.movies_repo
-
+    scored = []
     for m_id, stats in movie_stats.items():
         v = stats["count"]
-        if v < m:
-            continue
-
         avg_val = stats["sum"] / v
         score = (v / (v + m) * avg_val) + (m / (v + m) * mean_vote)
+        scored.append((m_id, score, v, avg_val, v >= m))
+
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored
+
+
+def _calculate_weighted_ratings(resources: SingletonResources) -> list[dict]:
+    weighted_movies = []
+    movies_repo = resources.movies_repo
+
+    for m_id, score, v, avg_val, qualified in _current_ranking(resources)["scored"]:
+        if not qualified:
+            continue
 
         movie_details = movies_repo.get_by_id(m_id)
 
@@ -89,6 +141,7 @@ def _calculate_weighted_ratings(resources: SingletonResources) -> list[dict]:
                 "tmdb_id": tmdb_id,
             }
         )
+        if len(weighted_movies) == POPULAR_COUNT:
+            break
 
-    weighted_movies.sort(key=lambda x: x["score"], reverse=True)
-    return weighted_movies[:5]
+    return weighted_movies
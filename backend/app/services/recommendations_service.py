@@ -1,51 +1,237 @@
 """Recommendations service using cosine similarity."""
 
+import base64
+import functools
+import hashlib
+import itertools
+import json
 import logging
-from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
 
 from app.core.config import settings
-from app.schemas.recommendation import RecommendationItem, RecommendationList
+from app.core.events import RATING_CREATED, RATING_DELETED, RATING_UPDATED
+from app.ml.diversity import mmr_rerank
+from app.ml.profile_state import ProfileState
+from app.repositories.ratings_repo import user_ratings_version
+from app.repositories.recommendations_repo import is_fresh_entry
+from app.schemas.recommendation import (
+    RecommendationFilters,
+    RecommendationItem,
+    RecommendationList,
+    SessionRecommendationList,
+    SimilarityMatrix,
+)
+from app.services import ranking_service
 
 logger = logging.getLogger(__name__)
 
+# Makes the background key of every rating change unique (see handle_rating_event)
+_rating_change_ids = itertools.count()
+
 
-def get_recommendations(resources, user_id: str, limit: int = 10, *, force_refresh: bool = False) -> RecommendationList:
+def get_recommendations(
+    resources,
+    user_id: str,
+    limit: int = 10,
+    *,
+    force_refresh: bool = False,
+    filters: RecommendationFilters | None = None,
+) -> RecommendationList:
     """
     Get personalized recommendations for a user.
 
-    Uses cached recommendations if available and fresh,
-    otherwise generates new recommendations.
+    The cache holds the top RECOMMENDATIONS_CACHE_DEPTH recommendations, so
+    any smaller limit is served as a slice. Cached recommendations are used
+    if fresh and produced by the currently loaded artifacts from the user's
+    current ratings. A cached list that is out of date (or when a refresh
+    is forced) is still served right away, minus movies the user has rated
+    since, while a background job regenerates it; only users without cached
+    recommendations wait for them to be generated.
+
+    Genre, year and watchlist filters bypass the cache: they are applied as
+    a mask on the catalog scores before the top N are selected, which costs
+    about the same as an unfiltered pass and still returns ``limit`` movies
+    when that many pass the filters. ``exclude_rated`` alone is served from
+    the cache, which never holds rated movies.
+
+    With a diversity weight (from the filters, or MMR_DIVERSITY), the top
+    MMR_CANDIDATE_POOL recommendations are re-ranked with ``diversify``.
 
     Args:
         resources: Application resources singleton
         user_id: User ID to generate recommendations for
         limit: Maximum number of recommendations to return
-        force_refresh: Force regeneration even if cached recommendations exist
+        force_refresh: Regenerate the recommendations even if the cached ones are fresh
+        filters: Optional genre, year and watchlist filters and diversity weight
 
     Returns:
         RecommendationList with personalized recommendations
 
     """
-    if not force_refresh:
-        cached = resources.recommendations_repo.get_for_user(user_id)
-        if cached and resources.recommendations_repo.is_fresh(user_id, max_age_hours=24):
-            items = [RecommendationItem(**item) for item in cached.get("recommendations", [])[:limit]]
-            return RecommendationList(user_id=user_id, recommendations=items)
+    diversity = _diversity(filters)
+    if not diversity:
+        return _ranked_recommendations(resources, user_id, limit, force_refresh=force_refresh, filters=filters)
+
+    ranked = _ranked_recommendations(
+        resources, user_id, max(limit, settings.MMR_CANDIDATE_POOL), force_refresh=force_refresh, filters=filters
+    )
+    return ranked.model_copy(update={"recommendations": diversify(resources, ranked.recommendations, limit, diversity)})
+
+
+def _ranked_recommendations(
+    resources, user_id: str, limit: int, *, force_refresh: bool, filters: RecommendationFilters | None
+) -> RecommendationList:
+    """``get_recommendations`` in relevance order, without re-ranking."""
+    # Rated movies are never in a user's recommendations, cached or filtered, so exclude_rated alone uses the cache
+    if filters is not None and filters.model_copy(update={"exclude_rated": False}).active:
+        return _filtered_recommendations(resources, user_id, limit, filters)
+
+    depth = max(limit, settings.RECOMMENDATIONS_CACHE_DEPTH)
+    cached = resources.recommendations_repo.get_for_user(user_id)
+    if not cached:
+        result = _regenerate_recommendations(resources, user_id, depth)
+        return RecommendationList(
+            user_id=user_id, recommendations=result.recommendations[:limit], variant=result.variant
+        )
 
-    recommendations = generate_recommendations(resources, user_id, limit)
-    resources.recommendations_repo.save_for_user(user_id, [item.model_dump() for item in recommendations])
+    variant, _ = assign_weight_variant(user_id)
+    cached_items = cached.get("recommendations", [])
+    if (
+        not force_refresh
+        and cached.get("artifact_version") == resources.recommender_version
+        and cached.get("variant") == variant
+        and cached.get("ratings_version") == resources.ratings_repo.get_user_version(user_id)
+        # Freshness is checked on the row already read, so a cache hit is one indexed lookup
+        and is_fresh_entry(cached, max_age_hours=24)
+    ):
+        items = [RecommendationItem(**item) for item in cached_items[:limit]]
+        return RecommendationList(user_id=user_id, recommendations=items, variant=variant)
+
+    # Stale-while-revalidate: at most one refresh per user is in flight, however many requests see the stale list
+    resources.background.submit(
+        ("recommendations", str(user_id)), _regenerate_recommendations, resources, user_id, depth
+    )
+
+    rated_movie_ids = {r["movie_id"] for r in resources.ratings_repo.get_by_user(user_id)}
+    items = [RecommendationItem(**item) for item in cached_items if item["movie_id"] not in rated_movie_ids]
+    return RecommendationList(user_id=user_id, recommendations=items[:limit], variant=cached.get("variant"))
+
+
+def _regenerate_recommendations(resources, user_id: str, limit: int) -> RecommendationList:
+    """
+    Generate recommendations for a user and cache them, tagged with the artifact, variant and ratings versions.
 
-    return RecommendationList(user_id=user_id, recommendations=recommendations)
+    The popularity fallback of users without ratings is not cached: it follows
+    everyone's ratings rather than the user's, ``ranking_service`` already
+    keeps it per ratings change, and a cached copy would pin it, or an empty
+    list on an install without ratings yet, for the cache's lifetime.
+    """
+    artifact_version = resources.recommender_version
+    ratings_version = resources.ratings_repo.get_user_version(user_id)
+    variant, genre_weight = assign_weight_variant(user_id)
+
+    recommendations = generate_recommendations(resources, user_id, limit, genre_weight=genre_weight)
+    if ratings_version == user_ratings_version([]):
+        # Drop a list cached while the user still had ratings
+        resources.recommendations_repo.clear_for_user(user_id)
+        return RecommendationList(user_id=user_id, recommendations=recommendations, variant=variant)
+
+    resources.recommendations_repo.save_for_user(
+        user_id,
+        [item.model_dump() for item in recommendations],
+        artifact_version=artifact_version,
+        variant=variant,
+        ratings_version=ratings_version,
+    )
+
+    return RecommendationList(user_id=user_id, recommendations=recommendations, variant=variant)
+
+
+def _filtered_recommendations(
+    resources, user_id: str, limit: int, filters: RecommendationFilters
+) -> RecommendationList:
+    """Score the catalog for a user with the filters' mask applied; rated movies are always excluded."""
+    user_ratings = resources.ratings_repo.get_by_user(user_id)
+    if not user_ratings:
+        fallback = get_fallback_recommendations(resources, limit, filters.model_copy(update={"user_id": user_id}))
+        return RecommendationList(user_id=user_id, recommendations=fallback)
+
+    variant, genre_weight = assign_weight_variant(user_id)
+    seed_weights, rated_movie_ids = content_profile(user_ratings)
+    mask = filter_mask(resources, filters.model_copy(update={"user_id": user_id, "exclude_rated": False}))
+    mask |= resources.recommender.exclusion_mask(rated_movie_ids)
+
+    if settings.PERSONALIZED_ENGINE == "als" and resources.recommender.has_als:
+        items = _get_als_recommendations(resources, user_id, user_ratings, limit, exclude=mask)
+    else:
+        similar_movies = resources.recommender.recommend_for_profile(
+            seed_weights, n=limit, exclude=mask, genre_weight=genre_weight, cf_weight=_cf_weight(resources)
+        )
+        items = [RecommendationItem(movie_id=mid, similarity_score=round(score, 4)) for mid, score in similar_movies]
 
+    return RecommendationList(user_id=user_id, recommendations=items, variant=variant)
 
-def generate_recommendations(resources, user_id: str, limit: int = 10) -> list[RecommendationItem]:
+
+def filter_mask(resources, filters: RecommendationFilters) -> np.ndarray:
+    """
+    Boolean mask over the recommender catalog of the movies the filters rule out.
+
+    Genre and year filters come from the recommender's precomputed masks;
+    the watchlist and rated movies of ``filters.user_id`` are added when
+    their exclusion is requested.
+
+    Raises:
+        ValueError: If the year range is inverted.
+    """
+    recommender = resources.recommender
+    mask = recommender.filter_mask(filters.genres, filters.year_min, filters.year_max)
+
+    excluded: set[int] = set()
+    if filters.user_id is not None and filters.exclude_rated:
+        excluded.update(r["movie_id"] for r in resources.ratings_repo.get_by_user(filters.user_id))
+    if filters.user_id is not None and filters.exclude_watchlist:
+        excluded.update(item["movie_id"] for item in resources.watchlist_repo.get_by_user(filters.user_id))
+    if excluded:
+        mask |= recommender.exclusion_mask(excluded)
+    return mask
+
+
+def assign_weight_variant(user_id: str) -> tuple[str | None, float | None]:
+    """
+    Assign a user to one of the configured genre/genome weighting variants.
+
+    The assignment is a stable hash of the user ID, so a user stays in the
+    same variant across requests and worker processes.
+
+    Returns:
+        Tuple of (variant name, genre weight), or (None, None) if no variants are configured.
+    """
+    variants = settings.RECOMMENDER_WEIGHT_VARIANTS
+    if not variants:
+        return None, None
+
+    names = sorted(variants)
+    bucket = int.from_bytes(hashlib.sha256(str(user_id).encode()).digest()[:8], "big") % len(names)
+    return names[bucket], variants[names[bucket]]
+
+
+def generate_recommendations(
+    resources, user_id: str, limit: int = 10, genre_weight: float | None = None
+) -> list[RecommendationItem]:
     """
     Generate new recommendations using cosine similarity.
 
+    Each movie is scored by its rating-weighted mean similarity to the
+    user's highly rated movies, blended with collaborative filtering
+    scores when CF_BLEND_WEIGHT is set.
+
     Args:
         resources: Application resources singleton
         user_id: User ID to generate recommendations for
         limit: Number of recommendations to generate
+        genre_weight: Optional weight of genre vs. genome similarity (0-1)
 
     Returns:
         List of RecommendationItem sorted by similarity score
@@ -54,44 +240,193 @@ def generate_recommendations(resources, user_id: str, limit: int = 10) -> list[R
     user_ratings = resources.ratings_repo.get_by_user(user_id)
 
     if not user_ratings:
-        return _get_fallback_recommendations(resources, limit)
+        return get_fallback_recommendations(resources, limit)
+
+    if settings.PERSONALIZED_ENGINE == "als" and resources.recommender.has_als:
+        return _get_als_recommendations(resources, user_id, user_ratings, limit)
+
+    seed_weights, rated_movie_ids = content_profile(user_ratings)
+    cf_weight = _cf_weight(resources)
+
+    # Incremental updates only track highly rated seeds, not the best-5 fallback
+    if resources.profile_states.enabled and any(_seed_weight(r["rating"]) > 0 for r in user_ratings):
+        # Keep the running scores so later ratings are folded in incrementally (see apply_rating_change).
+        # The state scores the catalog through seed_scores, which the batcher batches too.
+        state = ProfileState(resources.recommender, seed_weights, rated_movie_ids, genre_weight, cf_weight)
+        resources.profile_states.put(str(user_id), state)
+        similar_movies = state.recommend(resources.recommender, limit)
+    else:
+        # Score the whole catalog against the rating-weighted profile in one pass; rated movies are masked out
+        similar_movies = resources.recommender.recommend_for_profile(
+            seed_weights, n=limit, exclude=rated_movie_ids, genre_weight=genre_weight, cf_weight=cf_weight
+        )
 
-    seed_movies = [r for r in user_ratings if r["rating"] >= settings.HIGH_RATING_THRESHOLD]
+    return [
+        RecommendationItem(movie_id=movie_id, similarity_score=round(score, 4)) for movie_id, score in similar_movies
+    ]
 
+
+def content_profile(user_ratings: list[dict]) -> tuple[dict[int, float], set[int]]:
+    """
+    Seed movies of a user's content profile.
+
+    The seeds are the user's highly rated movies, or their 5 best rated
+    movies if none is rated highly, weighted by rating normalized to 0-1.
+
+    Returns:
+        Tuple of (seed movie ID -> weight, IDs of all movies the user rated).
+    """
+    seed_movies = [r for r in user_ratings if r["rating"] >= settings.HIGH_RATING_THRESHOLD]
     if not seed_movies:
         seed_movies = sorted(user_ratings, key=lambda x: x["rating"], reverse=True)[:5]
 
-    rated_movie_ids = {r["movie_id"] for r in user_ratings}
-    recommendation_scores: dict[int, list[float]] = defaultdict(list)
+    seed_weights = {r["movie_id"]: r["rating"] / 5.0 for r in seed_movies}
+    return seed_weights, {r["movie_id"] for r in user_ratings}
+
+
+def _cf_weight(resources) -> float:
+    """Blend in item-item collaborative filtering once its neighbor lists have been built."""
+    return settings.CF_BLEND_WEIGHT if resources.recommender.has_collaborative else 0.0
+
+
+def _seed_weight(rating: float) -> float:
+    """Weight of a rated movie in the user's profile: highly rated movies only, normalized to 0-1."""
+    return rating / 5.0 if rating >= settings.HIGH_RATING_THRESHOLD else 0.0
+
 
-    for seed_rating in seed_movies:
-        movie_id = seed_rating["movie_id"]
-        movie = resources.movies_repo.get_by_id(movie_id)
+def subscribe_to_rating_changes(resources):
+    """Fold every rating change into the user's cached recommendations, off the request path."""
+    resources.event_bus.subscribe(
+        (RATING_CREATED, RATING_UPDATED, RATING_DELETED), functools.partial(handle_rating_event, resources)
+    )
 
-        if not movie:
-            continue
 
-        similar_movies = get_similar_movies(resources, movie_id, limit)
+def handle_rating_event(resources, event_type: str, payload: dict):
+    """
+    Schedule ``apply_rating_change`` for a rating event on the background runner.
+
+    Users without running profile scores in memory are skipped: the event
+    already marked their cache stale, so it is regenerated on the next read.
+    """
+    user_id = payload.get("user_id")
+    if user_id is None or str(user_id) not in resources.profile_states:
+        return
+
+    if event_type == RATING_DELETED:
+        rating, previous_rating = None, payload["rating"]
+    else:
+        rating, previous_rating = payload["rating"], payload.get("previous_rating")
+    # One job per change: the runner drops a job whose key is in flight, which would lose this change
+    resources.background.submit(
+        ("rating_change", str(user_id), next(_rating_change_ids)),
+        apply_rating_change,
+        resources,
+        user_id,
+        payload["movie_id"],
+        rating,
+        previous_rating,
+    )
+
+
+def apply_rating_change(
+    resources, user_id: str, movie_id: int, rating: float | None, previous_rating: float | None = None
+) -> bool:
+    """
+    Fold a new, updated or deleted rating into the user's cached recommendations.
 
-        user_rating_weight = seed_rating["rating"] / 5.0  # Normalize to 0-1
+    If the user's running profile scores are in memory, only the rated
+    movie's score row is added (or subtracted) and the cached list is
+    re-ranked and saved as fresh. Otherwise, or when the change needs a
+    full regeneration (different artifacts or weights, or no highly rated
+    movies left), the state is dropped and the cache marked stale.
+    Runs in the background for each rating event (see ``handle_rating_event``).
+
+    Args:
+        resources: Application resources singleton
+        user_id: User whose rating changed
+        movie_id: The rated movie
+        rating: The new rating, or None if the rating was deleted
+        previous_rating: The rating before an update, if any
 
-        for rec in similar_movies:
-            # Don't recommend movies user has already rated
-            if rec.movie_id not in rated_movie_ids:
-                weighted_score = rec.similarity_score * user_rating_weight
-                recommendation_scores[rec.movie_id].append(weighted_score)
+    Returns:
+        True if the cached recommendations were updated.
+    """
+    state = resources.profile_states.get(str(user_id))
+    if state is None:
+        # Another change dropped the state; an earlier job may have saved over the stale mark since
+        resources.recommendations_repo.mark_stale(user_id)
+        return False
+
+    variant, genre_weight = assign_weight_variant(user_id)
+    weight = _seed_weight(rating) if rating is not None else 0.0
+    remaining_seeds = set(state.seed_weights) - {movie_id}
+    if not state.matches(resources.recommender_version, genre_weight, _cf_weight(resources)) or (
+        weight == 0 and not remaining_seeds
+    ):
+        _drop_profile_state(resources, user_id)
+        return False
+
+    if previous_rating is not None and _seed_weight(previous_rating) != state.seed_weights.get(movie_id, 0.0):
+        # The state missed an earlier change to this rating; its sums cannot be trusted
+        _drop_profile_state(resources, user_id)
+        return False
+
+    state.update(resources.recommender, movie_id, weight, rated=rating is not None)
+    generation = state.generation
+    recommendations = [
+        RecommendationItem(movie_id=mid, similarity_score=round(score, 4))
+        for mid, score in state.recommend(resources.recommender, state.limit)
+    ]
+    with state.publish_lock:
+        if state.generation != generation:
+            # A later change has been folded in; its job saves the newer list
+            return True
+        resources.recommendations_repo.save_for_user(
+            user_id,
+            [item.model_dump() for item in recommendations],
+            artifact_version=state.version,
+            variant=variant,
+            ratings_version=resources.ratings_repo.get_user_version(user_id),
+        )
+    return True
 
-    final_recommendations = []
-    for movie_id, scores in recommendation_scores.items():
-        avg_score = sum(scores) / len(scores)
-        final_recommendations.append(RecommendationItem(movie_id=movie_id, similarity_score=round(avg_score, 4)))
 
-    final_recommendations.sort(key=lambda x: x.similarity_score, reverse=True)
+def _drop_profile_state(resources, user_id: str):
+    resources.profile_states.pop(str(user_id))
+    resources.recommendations_repo.mark_stale(user_id)
 
-    return final_recommendations[:limit]
 
+def _get_als_recommendations(
+    resources, user_id: str, user_ratings: list[dict], limit: int, exclude: np.ndarray | None = None
+) -> list[RecommendationItem]:
+    """
+    Score the catalog with the user's matrix-factorization factors.
 
-def get_similar_movies(resources, movie_id: int, limit: int = 10) -> list[RecommendationItem]:
+    Users who rated movies after the model was trained are folded in from
+    their current ratings. ``exclude`` is an optional filter mask; rated
+    movies are always excluded.
+    """
+    timestamps = [datetime.fromisoformat(r["timestamp"]) for r in user_ratings if r.get("timestamp")]
+    similar_movies = resources.recommender.recommend_for_user(
+        user_id,
+        {r["movie_id"]: r["rating"] for r in user_ratings},
+        n=limit,
+        exclude=exclude if exclude is not None else {r["movie_id"] for r in user_ratings},
+        updated_at=max(timestamps, default=None),
+    )
+
+    return [
+        RecommendationItem(movie_id=movie_id, similarity_score=round(score, 4)) for movie_id, score in similar_movies
+    ]
+
+
+def get_similar_movies(
+    resources,
+    movie_id: int,
+    limit: int = 10,
+    genre_weight: float | None = None,
+    filters: RecommendationFilters | None = None,
+) -> list[RecommendationItem]:
     """
     Get movies similar to a given movie.
 
@@ -99,20 +434,34 @@ def get_similar_movies(resources, movie_id: int, limit: int = 10) -> list[Recomm
         resources: Application resources singleton
         movie_id: Movie ID to find similar movies for
         limit: Number of similar movies to return
+        genre_weight: Optional weight of genre vs. genome similarity (0-1)
+        filters: Optional genre, year, watchlist and rated filters, applied before the top N are selected
 
     Returns:
-        List of RecommendationItem sorted by similarity score
+        List of RecommendationItem sorted by similarity score, or in MMR
+        order when a diversity weight is set (see ``get_recommendations``)
 
+    Raises:
+        ValueError: If genre_weight is set but the feature blocks are not available.
     """
     movie = resources.movies_repo.get_by_id(movie_id)
     if not movie:
         return []
 
-    recommendations = resources.recommender.get_similar_by_id(movie_id, n=limit)
+    diversity = _diversity(filters)
+    n = max(limit, settings.MMR_CANDIDATE_POOL) if diversity else limit
+    if filters is not None and filters.active:
+        recommendations = resources.recommender.get_similar_by_ids(
+            [movie_id], n=n, exclude=filter_mask(resources, filters), genre_weight=genre_weight
+        ).get(movie_id)
+    else:
+        recommendations = resources.recommender.get_similar_by_id(movie_id, n=n, genre_weight=genre_weight)
 
     if recommendations is None:
         logger.warning("Movie ID %s not found in recommender dataset", movie_id)
         return []
+    if diversity:
+        recommendations = [recommendations[i] for i in _mmr_order(resources, recommendations, limit, diversity)]
 
     result = []
     for rec_id, score in recommendations:
@@ -125,48 +474,194 @@ def get_similar_movies(resources, movie_id: int, limit: int = 10) -> list[Recomm
     return result
 
 
-def _get_fallback_recommendations(resources, limit: int = 10) -> list[RecommendationItem]:
+def diversify(resources, items: list[RecommendationItem], limit: int, diversity: float) -> list[RecommendationItem]:
     """
-    Get fallback recommendations for users with no ratings.
+    Re-rank recommendations with Maximal Marginal Relevance.
+
+    Picks ``limit`` of the items, trading their similarity score against
+    their similarity to the items already picked, so a list is not
+    dominated by near-duplicates such as sequels. Only the items' own
+    feature rows are read, so a pool of a few hundred costs well under a
+    millisecond.
+
+    Args:
+        resources: Application resources singleton
+        items: Candidates, best first
+        limit: Number of items to return
+        diversity: Weight of novelty vs. relevance (0-1)
+
+    Returns:
+        Up to ``limit`` of the items in MMR order, with their original scores
+    """
+    ranked = [(item.movie_id, item.similarity_score) for item in items]
+    return [items[i] for i in _mmr_order(resources, ranked, limit, diversity)]
+
+
+def _mmr_order(resources, ranked: list[tuple[int, float]], limit: int, diversity: float) -> list[int]:
+    """Positions in ``ranked`` of the ``limit`` (movie_id, score) pairs MMR picks, in pick order."""
+    if len(ranked) <= 1:
+        return list(range(min(limit, len(ranked))))
+
+    ids, similarity = resources.recommender.similarity_submatrix([movie_id for movie_id, _ in ranked])
+    # Candidates the recommender no longer knows (e.g. after an artifact reload) cannot be compared; drop them
+    position = {movie_id: i for i, (movie_id, _) in enumerate(ranked)}
+    candidates = [position[movie_id] for movie_id in ids]
+    relevance = np.array([ranked[i][1] for i in candidates], dtype=np.float32)
+    return [candidates[i] for i in mmr_rerank(relevance, similarity, limit, diversity)]
+
+
+def _diversity(filters: RecommendationFilters | None) -> float:
+    """Diversity weight of a request: its own, or MMR_DIVERSITY."""
+    if filters is not None and filters.diversity is not None:
+        return filters.diversity
+    return settings.MMR_DIVERSITY
+
+
+def get_similarity_matrix(resources, movie_ids: list[int], genre_weight: float | None = None) -> SimilarityMatrix:
+    """
+    Pairwise similarities of a set of movies, for comparison views.
+
+    The matrix is computed in one pass from the movies' rows only and
+    returned as little-endian float32 bytes, base64-encoded, which is about
+    a third of the size of the same matrix as JSON numbers.
+
+    Args:
+        resources: Application resources singleton
+        movie_ids: IDs of the movies; repeated IDs are dropped
+        genre_weight: Optional weight of genre vs. genome similarity (0-1)
+
+    Returns:
+        SimilarityMatrix over the movies known to the recommender, in the requested order
+
+    Raises:
+        ValueError: If genre_weight is set but the feature blocks are not available.
+    """
+    ids, matrix = resources.recommender.similarity_submatrix(movie_ids, genre_weight=genre_weight)
+    known = set(ids)
+    return SimilarityMatrix(
+        movie_ids=ids,
+        missing_ids=[mid for mid in dict.fromkeys(movie_ids) if mid not in known],
+        shape=list(matrix.shape),
+        data=base64.b64encode(matrix.astype("<f4").tobytes()).decode("ascii"),
+    )
+
+
+def get_session_recommendations(
+    resources, movies: list[tuple[int, float]], limit: int = 10
+) -> SessionRecommendationList:
+    """
+    Recommend movies from an arbitrary list of liked movies, without an account.
 
-    Returns popular movies or a curated selection.
+    The movies are scored as one weighted content profile in a single
+    vectorized call. Results are cached in memory by a hash of the
+    normalized movie set, so the same set asked for again (by any visitor,
+    in any order or weight scale) is served without scoring.
 
     Args:
         resources: Application resources singleton
+        movies: (movie ID, weight) pairs; weights of a repeated movie are added up
         limit: Number of recommendations to return
 
     Returns:
-        List of RecommendationItem with default similarity scores
+        SessionRecommendationList with the session key and the recommendations
 
+    Raises:
+        ValueError: If no weight is positive.
     """
-    # Get first N movies as fallback
-    movies = resources.movies_repo.get_all(limit=limit)
+    seed_weights = normalize_session(movies)
+    key = session_key(seed_weights)
+    cache_key = (resources.recommender_version, key, limit)
+
+    cached = resources.session_recommendations.get(cache_key)
+    if cached is not None:
+        return SessionRecommendationList(session_key=key, recommendations=cached)
+
+    similar_movies = resources.recommender.recommend_for_profile(
+        seed_weights, n=limit, exclude=set(seed_weights), cf_weight=_cf_weight(resources)
+    )
+    items = [RecommendationItem(movie_id=mid, similarity_score=round(score, 4)) for mid, score in similar_movies]
+    resources.session_recommendations.put(cache_key, items)
+    return SessionRecommendationList(session_key=key, recommendations=items)
+
+
+def normalize_session(movies: list[tuple[int, float]]) -> dict[int, float]:
+    """
+    Profile weights of a session's movies, summing to 1 and sorted by movie ID.
+
+    Raises:
+        ValueError: If no weight is positive.
+    """
+    totals: dict[int, float] = {}
+    for movie_id, weight in movies:
+        totals[movie_id] = totals.get(movie_id, 0.0) + weight
+    total = sum(totals.values())
+    if total <= 0:
+        raise ValueError("At least one movie needs a positive weight")
+    return {movie_id: round(totals[movie_id] / total, 6) for movie_id in sorted(totals)}
+
+
+def session_key(seed_weights: dict[int, float]) -> str:
+    """Stable hash of normalized session weights, as returned by normalize_session."""
+    payload = json.dumps(sorted(seed_weights.items()), separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
 
-    return [
-        RecommendationItem(
-            movie_id=movie["movie_id"],
-            similarity_score=0.5,  # Neutral score for fallback recommendations
-        )
-        for movie in movies
-    ]
+
+def get_fallback_recommendations(
+    resources, limit: int = 10, filters: RecommendationFilters | None = None
+) -> list[RecommendationItem]:
+    """
+    Get fallback recommendations for users with no ratings.
+
+    Returns the best movies by Bayesian average rating from the ranking
+    precomputed by ``ranking_service``, so no ratings are read. Genre
+    filters pick the precomputed per-genre rankings; year and watchlist
+    filters are checked against the recommender's catalog mask while
+    reading down the ranking.
+
+    Args:
+        resources: Application resources singleton
+        limit: Number of recommendations to return
+        filters: Optional genre, year and watchlist filters
+
+    Returns:
+        List of RecommendationItem scored by Bayesian average rating scaled to 0-1
+
+    """
+    active = filters is not None and filters.active
+    mask = filter_mask(resources, filters) if active else None
+    movie_id_to_idx = resources.recommender.movie_id_to_idx if active else None
+
+    items = []
+    for movie_id, score in ranking_service.get_bayesian_ranking(resources, filters.genres if active else None):
+        if mask is not None:
+            idx = movie_id_to_idx.get(movie_id)
+            if idx is None or mask[idx]:
+                continue
+        items.append(RecommendationItem(movie_id=movie_id, similarity_score=round(score / 5.0, 4)))
+        if len(items) >= limit:
+            break
+    return items
 
 
 def refresh_recommendations_for_user(resources, user_id: str, limit: int = 10) -> RecommendationList:
     """
     Force refresh recommendations for a user.
 
-    Convenience method that calls get_recommendations with force_refresh=True.
+    Unlike ``get_recommendations`` with force_refresh=True, which serves the
+    cached list while a background job regenerates it, this regenerates the
+    recommendations before returning and caches them.
 
     Args:
         resources: Application resources singleton
         user_id: User ID to refresh recommendations for
-        limit: Number of recommendations to generate
+        limit: Number of recommendations to return
 
     Returns:
         RecommendationList with fresh recommendations
 
     """
-    return get_recommendations(resources, user_id, limit=limit, force_refresh=True)
+    result = _regenerate_recommendations(resources, user_id, max(limit, settings.RECOMMENDATIONS_CACHE_DEPTH))
+    return RecommendationList(user_id=user_id, recommendations=result.recommendations[:limit], variant=result.variant)
 
 
 def clear_recommendations_cache(resources, user_id: str) -> None:
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Build item-item collaborative filtering neighbors from user ratings.
+Run this script after setup_ml_data.py, and again whenever ratings change.
+
+Usage:
+    python scripts/build_cf_neighbors.py [--ratings-csv ratings.csv] [--k 50]
+
+By default the ratings come from the application's ratings store
+(data/ratings.json). Pass --ratings-csv to use a MovieLens ratings.csv
+(user_id, movie_id, rating columns), which is streamed in chunks.
+Set CF_BLEND_WEIGHT to blend the neighbors into recommendations.
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pandas as pd
+
+from app.core.config import settings
+from app.ml import collaborative
+from app.ml.manifest import ArtifactManifest
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build item-item collaborative filtering neighbors.")
+    parser.add_argument(
+        "--ratings-csv", type=Path, default=None, help="MovieLens ratings.csv to use instead of the store"
+    )
+    parser.add_argument("--k", type=int, default=50, help="Number of neighbors kept per movie")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None):
+    """Build and save the neighbor lists, recording them in the artifact manifest."""
+    args = parse_args(argv)
+    processed_data_path = Path(settings.ML_DIR)
+
+    mapping_path = processed_data_path / "movie_id_to_idx.json"
+    if not mapping_path.exists():
+        logger.error("Missing %s. Run scripts/setup_ml_data.py first.", mapping_path)
+        return 1
+
+    with Path.open(mapping_path) as f:
+        movie_id_to_idx = {int(k): v for k, v in json.load(f).items()}
+
+    if args.ratings_csv is not None:
+        ratings_path = args.ratings_csv
+        if not ratings_path.exists():
+            logger.error("Ratings file not found: %s", ratings_path)
+            return 1
+        ratings_chunks = collaborative.read_ratings_csv(ratings_path)
+    else:
+        ratings_path = Path(settings.RATINGS_FILE)
+        with Path.open(ratings_path, encoding="utf-8") as f:
+            ratings = json.load(f)
+        ratings_chunks = [pd.DataFrame(ratings, columns=["user_id", "movie_id", "rating"])]
+
+    logger.info("Building item-item neighbors (k=%d) from %s...", args.k, ratings_path)
+    start = time.perf_counter()
+    covered = collaborative.build_and_save(processed_data_path, ratings_chunks, movie_id_to_idx, k=args.k)
+    logger.info(
+        "Neighbors found for %d of %d movies in %.1f s",
+        covered,
+        len(movie_id_to_idx),
+        time.perf_counter() - start,
+    )
+
+    # Recording the stage changes the artifact version, which invalidates cached recommendations
+    manifest = ArtifactManifest(processed_data_path)
+    outputs = {
+        name: processed_data_path / name for name in (collaborative.NEIGHBOR_IDX_FILE, collaborative.NEIGHBOR_SIM_FILE)
+    }
+    manifest.record("collaborative", {ratings_path.name: ratings_path}, {"k": args.k}, outputs)
+
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s [%(levelname)-8s] %(name)s: %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
+    )
+    sys.exit(main())
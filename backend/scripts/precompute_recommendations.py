@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Regenerate the cached recommendations of every user with ratings.
+Run this script nightly, and after new ML artifacts are built.
+
+Usage:
+    python scripts/precompute_recommendations.py [--workers 8] [--partition-size 500]
+
+Users are split into partitions scored in a process pool; each finished
+partition is written to the recommendations store in one transaction.
+Progress and per-partition timings are logged as the job runs. The same
+job can be started on a running server with POST /admin/recommendations/precompute;
+there it scores in the server process with the serving recommender, without a pool.
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.repositories.ratings_repo import RatingsRepository
+from app.repositories.recommendations_repo import RecommendationsRepository
+from app.services.precompute_service import precompute_recommendations
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Precompute every user's recommendations.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (default PRECOMPUTE_WORKERS, one per CPU if 0; 1 runs in this process)",
+    )
+    parser.add_argument(
+        "--partition-size", type=int, default=None, help="Users per partition (default PRECOMPUTE_PARTITION_SIZE)"
+    )
+    args = parser.parse_args(argv)
+    if (args.workers is not None and args.workers < 1) or (args.partition_size is not None and args.partition_size < 1):
+        parser.error("--workers and --partition-size must be positive")
+    return args
+
+
+def main(argv: list[str] | None = None):
+    """Precompute and cache the recommendations, then report the throughput."""
+    args = parse_args(argv)
+
+    mapping_path = Path(settings.ML_DIR) / "movie_id_to_idx.json"
+    if not mapping_path.exists():
+        logger.error("Missing %s. Run scripts/setup_ml_data.py first.", mapping_path)
+        return 1
+
+    recommendations_repo = RecommendationsRepository()
+    try:
+        summary = precompute_recommendations(
+            RatingsRepository(), recommendations_repo, workers=args.workers, partition_size=args.partition_size
+        )
+    finally:
+        recommendations_repo.close()
+
+    if summary["users_skipped"]:
+        logger.warning(
+            "%d users were not saved because the ML artifacts changed during the run; run the script again",
+            summary["users_skipped"],
+        )
+
+    partitions = summary["partitions"]
+    if partitions:
+        slowest = max(partitions, key=lambda p: p["score_seconds"])
+        logger.info(
+            "%d partitions, slowest scored in %.2f s (partition %d)",
+            len(partitions),
+            slowest["score_seconds"],
+            slowest["partition"],
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s [%(levelname)-8s] %(name)s: %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
+    )
+    sys.exit(main())
@@ -4,9 +4,18 @@ Setup script to generate ML artifacts for the recommendation system.
 Run this script after downloading the MovieLens datasets.
 
 Usage:
-    python scripts/setup_ml_data.py
+    python scripts/setup_ml_data.py [--reduced-dims 128] [--full]
+
+Each stage is recorded in data/ml/manifest.json with the hashes of its
+inputs and outputs and its parameters; stages whose inputs did not change
+are skipped. When movies are only added, their feature rows are appended
+and the similarity matrix and ANN index are extended instead of rebuilt.
+
+With --reduced-dims, the similarity matrix and ANN index are built from
+SVD-reduced features; set RECOMMENDER_FEATURE_SET=reduced to serve them.
 """
 
+import argparse
 import logging
 import sys
 from pathlib import Path
@@ -15,12 +24,64 @@ logger = logging.getLogger(__name__)
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import numpy as np
+
+from app.ml.ann_index import CENTROIDS_FILE, LIST_INDICES_FILE, LIST_OFFSETS_FILE, IVFIndex, recall_report
+from app.ml.artifacts import load_array
 from app.ml.data_preprocessor import MovieDataPreprocessor
-from app.ml.similarity_matrix import compute_and_save_similarity
+from app.ml.manifest import ArtifactManifest
+from app.ml.quantization import CODES_FILE, SCALES_FILE, quantize_and_save
+from app.ml.similarity_matrix import compute_and_save_similarity, extend_similarity
+
+FEATURE_ARTIFACTS = [
+    "movies_clean.csv",
+    "combined_features.npy",
+    "genre_features.npy",
+    "genome_features.npy",
+    "tfidf_vectorizer.pkl",
+    "movie_id_to_idx.json",
+]
+REDUCED_ARTIFACTS = ["reduced_features.npy", "svd_components.npy"]
+ANN_ARTIFACTS = [CENTROIDS_FILE, LIST_OFFSETS_FILE, LIST_INDICES_FILE]
+QUANTIZED_ARTIFACTS = [CODES_FILE, SCALES_FILE]
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate ML artifacts for the recommendation system.")
+    parser.add_argument(
+        "--reduced-dims",
+        type=int,
+        default=None,
+        help="Reduce the combined features to this many dims (e.g. 64-256) with TruncatedSVD",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Rebuild every stage, ignoring the manifest",
+    )
+    return parser.parse_args(argv)
+
 
+def files(directory: Path, names: list[str]) -> dict[str, Path]:
+    return {name: directory / name for name in names}
 
-def main():
-    """Generate all required ML artifacts."""
+
+def log_recall_report(ann_index: IVFIndex):
+    logger.info("Recall@10 vs. latency against the exact engine:")
+    for row in recall_report(ann_index, k=10):
+        probes = "-" if row["probes"] is None else row["probes"]
+        logger.info(
+            "  %-5s probes=%-3s recall=%.3f latency=%.3f ms/query",
+            row["engine"],
+            probes,
+            row["recall"],
+            row["latency_ms"],
+        )
+
+
+def main(argv: list[str] | None = None):
+    """Generate all required ML artifacts, skipping stages whose inputs did not change."""
+    args = parse_args(argv)
     logger.info("Movie Recommendation System - ML Data Setup")
 
     raw_data_path = Path("app/static/movies")
@@ -41,6 +102,12 @@ def main():
         return 1
 
     try:
+        processed_data_path.mkdir(parents=True, exist_ok=True)
+        manifest = ArtifactManifest(processed_data_path)
+        features_file = "combined_features.npy" if args.reduced_dims is None else "reduced_features.npy"
+        features_input = files(processed_data_path, [features_file])
+        features_hash_before = manifest.hash_files(features_input)
+
         logger.info("-" * 40)
         logger.info("Step 1: Preprocessing data and creating feature matrices...")
         logger.info("  Input: %s", raw_data_path)
@@ -51,25 +118,99 @@ def main():
             output_dir=str(processed_data_path),
             genre_weight=0.3,  # 30% weight for genre features
             genome_weight=0.7,  # 70% weight for genome tag features
+            reduced_dims=args.reduced_dims,
         )
 
-        preprocessor.run_preprocessing()
-        logger.info("Feature matrices created successfully")
+        raw_inputs = {f.name: f for f in required_files}
+        feature_outputs = files(
+            processed_data_path, FEATURE_ARTIFACTS + (REDUCED_ARTIFACTS if args.reduced_dims is not None else [])
+        )
+
+        appended = None
+        if not args.full and manifest.is_current("features", raw_inputs, preprocessor.params, feature_outputs):
+            appended = 0
+            logger.info("Inputs and parameters unchanged, skipping")
+        else:
+            # Appending is only valid when movies.csv alone changed; new genome scores or tags alter existing rows
+            previous = manifest.get("features")
+            if (
+                not args.full
+                and previous is not None
+                and previous["params"] == preprocessor.params
+                and manifest.changed_inputs("features", raw_inputs) == {"movies.csv"}
+                and manifest.outputs_intact("features", feature_outputs)
+            ):
+                appended = preprocessor.append_new_movies()
+
+            if appended is None:
+                preprocessor.run_preprocessing()
+                logger.info("Feature matrices created successfully")
+
+            manifest.record("features", raw_inputs, preprocessor.params, feature_outputs)
+
+        n_movies = len(load_array(processed_data_path / features_file, ndim=2))
+        # Downstream artifacts can be extended in place only if they were built from the pre-append features
+        can_extend = bool(appended) and not args.full
+
+        logger.info("-" * 40)
+        logger.info("Step 2: Computing similarity matrix from %s...", features_file)
+        similarity_outputs = files(processed_data_path, ["similarity_matrix.npy"])
+        previous = manifest.get("similarity")
+
+        if not args.full and manifest.is_current("similarity", features_input, {}, similarity_outputs):
+            logger.info("Features unchanged, skipping")
+        else:
+            if (
+                can_extend
+                and previous is not None
+                and previous["inputs"] == features_hash_before
+                and manifest.outputs_intact("similarity", similarity_outputs)
+            ):
+                logger.info("Extending similarity matrix with %d new movies", appended)
+                extend_similarity(processed_data_path, n_movies - appended, features_file)
+            else:
+                compute_and_save_similarity(processed_data_path, features_file)
+            manifest.record("similarity", features_input, {}, similarity_outputs)
+            logger.info("Similarity matrix computed successfully")
 
         logger.info("-" * 40)
-        logger.info("Step 2: Computing similarity matrix...")
-        compute_and_save_similarity(processed_data_path)
-        logger.info("Similarity matrix computed successfully")
-
-        required_artifacts = [
-            "movies_clean.csv",
-            "combined_features.npy",
-            "tfidf_vectorizer.pkl",
-            "movie_id_to_idx.json",
-            "similarity_matrix.npy",
-        ]
-
-        logger.info("Verifying artifacts...")
+        logger.info("Step 3: Building approximate nearest-neighbor index...")
+        ann_outputs = files(processed_data_path, ANN_ARTIFACTS)
+        previous = manifest.get("ann_index")
+
+        if not args.full and manifest.is_current("ann_index", features_input, {}, ann_outputs):
+            logger.info("Features unchanged, skipping")
+        else:
+            features = load_array(processed_data_path / features_file, ndim=2)
+            if (
+                can_extend
+                and previous is not None
+                and previous["inputs"] == features_hash_before
+                and manifest.outputs_intact("ann_index", ann_outputs)
+            ):
+                logger.info("Assigning %d new movies to the existing clusters", appended)
+                ann_index = IVFIndex.from_centroids(np.load(processed_data_path / CENTROIDS_FILE), features)
+            else:
+                ann_index = IVFIndex.build(features)
+            ann_index.save(processed_data_path)
+            manifest.record("ann_index", features_input, {}, ann_outputs)
+            logger.info("ANN index built with %d clusters", ann_index.n_clusters)
+            log_recall_report(ann_index)
+
+        logger.info("-" * 40)
+        logger.info("Step 4: Quantizing features to int8...")
+        quantized_outputs = files(processed_data_path, QUANTIZED_ARTIFACTS)
+
+        if not args.full and manifest.is_current("quantization", features_input, {}, quantized_outputs):
+            logger.info("Features unchanged, skipping")
+        else:
+            agreement = quantize_and_save(processed_data_path, features_file)
+            manifest.record("quantization", features_input, {}, quantized_outputs)
+            logger.info("int8 top-10 ranking agreement with float32: %.2f%%", agreement * 100)
+
+        required_artifacts = [*feature_outputs, *similarity_outputs, *ann_outputs, *quantized_outputs]
+
+        logger.info("Verifying artifacts (version %s)...", manifest.version)
         all_exist = True
         for artifact in required_artifacts:
             artifact_path = processed_data_path / artifact
@@ -31,7 +31,7 @@ def test_repositories(test_data_dir):
     """Create test repositories using temporary files."""
     users_file = test_data_dir / "users.csv"
     ratings_file = test_data_dir / "ratings.json"
-    recommendations_file = test_data_dir / "recommendations.json"
+    recommendations_file = test_data_dir / "recommendations.db"
     penalties_file = test_data_dir / "penalties.json"
     watchlist_file = test_data_dir / "watchlist.json"
     user_insights_file = test_data_dir / "user_insights.json"
@@ -56,6 +56,9 @@ def override_app_resources(test_repositories):
     for repo_name, repo_instance in test_repositories.items():
         if repo_instance is not None:
             setattr(mock_resources, repo_name, repo_instance)
+            # Publish the test repositories' changes to the app's subscribers
+            if hasattr(repo_instance, "event_bus"):
+                repo_instance.event_bus = mock_resources.event_bus
 
     def mock_get_resources():
         return mock_resources
@@ -2,6 +2,7 @@
 Integration tests for admin API endpoints.
 """
 
+import json
 from datetime import UTC, datetime
 
 import jwt
@@ -296,3 +297,88 @@ def test_user_can_access_after_penalty_resolved(client, admin_token, regular_use
         json={"movie_id": 101, "rating": 4.5},
     )
     assert response.status_code == 201
+
+
+def test_reload_recommender_starts_background_reload(client, admin_token, mocker):
+    reload = mocker.patch("app.core.resources.SingletonResources.reload_recommender", return_value=True)
+
+    response = client.post("/admin/recommender/reload", headers={"Authorization": f"Bearer {admin_token}"})
+
+    assert response.status_code == 202
+    assert response.json()["message"] == "Recommender reload started"
+    assert "available_version" in response.json()
+    reload.assert_called_once()
+
+
+def test_reload_recommender_conflict_while_reloading(client, admin_token, mocker):
+    mocker.patch("app.core.resources.SingletonResources.reload_recommender", return_value=False)
+
+    response = client.post("/admin/recommender/reload", headers={"Authorization": f"Bearer {admin_token}"})
+
+    assert response.status_code == 409
+
+
+def test_reload_recommender_forbidden_for_regular_user(client, regular_user_token):
+    response = client.post("/admin/recommender/reload", headers={"Authorization": f"Bearer {regular_user_token}"})
+
+    assert response.status_code == 403
+
+
+def test_precompute_recommendations_starts_background_job(client, admin_token, mocker):
+    start = mocker.patch("app.services.precompute_service.start_precompute", return_value=True)
+
+    response = client.post("/admin/recommendations/precompute", headers={"Authorization": f"Bearer {admin_token}"})
+
+    assert response.status_code == 202
+    start.assert_called_once()
+
+
+def test_precompute_recommendations_conflict_while_running(client, admin_token, mocker):
+    mocker.patch("app.services.precompute_service.start_precompute", return_value=False)
+
+    response = client.post("/admin/recommendations/precompute", headers={"Authorization": f"Bearer {admin_token}"})
+
+    assert response.status_code == 409
+
+
+def test_precompute_status(client, admin_token):
+    response = client.get("/admin/recommendations/precompute", headers={"Authorization": f"Bearer {admin_token}"})
+
+    assert response.status_code == 200
+    assert "state" in response.json()
+
+
+def test_batch_recommendations_streams_ndjson(client, admin_token, mocker):
+    stream = mocker.patch(
+        "app.services.batch_service.stream_recommendations",
+        return_value=iter(['{"user_id": "u1", "recommendations": []}\n', '{"user_id": "u2", "recommendations": []}\n']),
+    )
+
+    response = client.post(
+        "/admin/recommendations/batch",
+        headers={"Authorization": f"Bearer {admin_token}"},
+        json={"user_ids": ["u1", "u2"], "limit": 5},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["user_id"] for line in response.text.splitlines()] == ["u1", "u2"]
+    assert stream.call_args.args[1:] == (["u1", "u2"], 5)
+
+
+def test_batch_recommendations_requires_user_ids(client, admin_token):
+    response = client.post(
+        "/admin/recommendations/batch", headers={"Authorization": f"Bearer {admin_token}"}, json={"user_ids": []}
+    )
+
+    assert response.status_code == 422
+
+
+def test_batch_recommendations_forbidden_for_regular_user(client, regular_user_token):
+    response = client.post(
+        "/admin/recommendations/batch",
+        headers={"Authorization": f"Bearer {regular_user_token}"},
+        json={"user_ids": ["u1"]},
+    )
+
+    assert response.status_code == 403
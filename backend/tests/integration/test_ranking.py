@@ -1,7 +1,9 @@
-import json
-from datetime import UTC, datetime, timedelta, timezone
-from unittest.mock import MagicMock, mock_open, patch
+from unittest.mock import MagicMock
 
+import pandas as pd
+
+from app.core.events import RATING_CREATED
+from app.core.rating_stats import RatingStats
 from app.services import ranking_service
 
 MOCK_RATINGS = [
@@ -20,67 +22,76 @@ def mock_get_by_id(movie_id):
     return None
 
 
-def test_calculate_weighted_rating_logic():
+def make_resources(ratings):
     mock_resources = MagicMock()
     mock_resources.movies_repo.get_by_id.side_effect = mock_get_by_id
+    mock_resources.rating_stats = RatingStats(lambda: ratings)
+    return mock_resources
 
-    ranking_service._popular_cache = {"last_updated": None, "data": []}
-
-    with patch("app.services.ranking_service.Path") as mock_path:
-        mock_path_instance = mock_path.return_value
-        mock_path_instance.exists.return_value = True
-        mock_path_instance.open = mock_open(read_data=json.dumps(MOCK_RATINGS))
 
-        result = ranking_service.get_popular_movies(mock_resources)
+def test_calculate_weighted_rating_logic():
+    mock_resources = make_resources(MOCK_RATINGS)
+    ranking_service._popular_cache = {"version": None, "data": []}
 
-        assert len(result) > 0
-        assert result[0]["movie_id"] == 1
-        assert result[0]["score"] > result[1]["score"]
+    result = ranking_service.get_popular_movies(mock_resources)
 
-        assert result[0]["title"] == "Test Toy Story"
-        assert result[0]["tmdb_id"] == 12345
+    assert len(result) > 0
+    assert result[0]["movie_id"] == 1
+    assert result[0]["score"] > result[1]["score"]
 
+    assert result[0]["title"] == "Test Toy Story"
+    assert result[0]["tmdb_id"] == 12345
 
-def test_get_popular_movies_no_file():
-    mock_resources = MagicMock()
-    ranking_service._popular_cache = {"last_updated": None, "data": []}
 
-    with patch("app.services.ranking_service.Path") as mock_patch:
-        mock_path_instance = mock_patch.return_value
-        mock_path_instance.exists.return_value = False
+def test_get_popular_movies_no_ratings():
+    mock_resources = make_resources([])
+    ranking_service._popular_cache = {"version": None, "data": []}
 
-        result = ranking_service.get_popular_movies(mock_resources)
-        assert result == []
+    result = ranking_service.get_popular_movies(mock_resources)
+    assert result == []
 
 
 def test_get_popular_movies_cached():
-    mock_resources = MagicMock()
+    mock_resources = make_resources(MOCK_RATINGS)
 
     mock_data = [{"movie_id": 99, "title": "Cached Movie"}]
     ranking_service._popular_cache = {
-        "last_updated": datetime.now(UTC),
+        "version": mock_resources.rating_stats.version,
         "data": mock_data,
     }
 
-    with patch("app.services.ranking_service.UPDATE_FREQUENCY_HOURS", 24):
-        result = ranking_service.get_popular_movies(mock_resources)
+    result = ranking_service.get_popular_movies(mock_resources)
 
-        assert result == mock_data
-        assert result[0]["title"] == "Cached Movie"
+    assert result == mock_data
+    assert result[0]["title"] == "Cached Movie"
 
 
-def test_get_popular_movies_cache_expired():
-    mock_resources = MagicMock()
-    mock_resources.movies_repo.get_by_id.side_effect = mock_get_by_id
+def test_get_popular_movies_recomputed_after_rating_change():
+    mock_resources = make_resources(MOCK_RATINGS)
+    ranking_service._popular_cache = {"version": None, "data": []}
+    first = ranking_service.get_popular_movies(mock_resources)
+    assert ranking_service.get_popular_movies(mock_resources) is first
+
+    mock_resources.rating_stats.handle(RATING_CREATED, {"movie_id": 2, "rating": 2.0})
+    result = ranking_service.get_popular_movies(mock_resources)
+
+    assert result is not first
+    assert result[0]["title"] == "Test Toy Story"
+    assert {r["movie_id"]: r["vote_count"] for r in result} == {1: 3, 2: 2}
 
-    old_time = datetime.now(UTC) - timedelta(hours=25)
-    ranking_service._popular_cache = {"last_updated": old_time, "data": [{"movie_id": 99, "title": "Old Data"}]}
 
-    with patch("app.services.ranking_service.Path") as mock_patch:
-        mock_path_instance = mock_patch.return_value
-        mock_path_instance.exists.return_value = True
-        mock_path_instance.open = mock_open(read_data=json.dumps(MOCK_RATINGS))
+def test_bayesian_ranking_per_genre():
+    ratings = [*MOCK_RATINGS, {"movie_id": 3, "rating": 4.0}]
+    mock_resources = make_resources(ratings)
+    mock_resources.movies_repo.movies_df = pd.DataFrame(
+        {"movie_id": [1, 2, 3], "genres": [["Animation"], ["Adventure", "Animation"], ["Adventure"]]}
+    )
 
-        result = ranking_service.get_popular_movies(mock_resources)
+    overall = [m_id for m_id, _ in ranking_service.get_bayesian_ranking(mock_resources)]
+    adventure = [m_id for m_id, _ in ranking_service.get_bayesian_ranking(mock_resources, ["adventure"])]
+    merged = list(ranking_service.get_bayesian_ranking(mock_resources, ["Adventure", "Animation"]))
 
-        assert result[0]["title"] == "Test Toy Story"
+    assert overall == [1, 3, 2]
+    assert adventure == [3, 2]
+    assert [m_id for m_id, _ in merged] == overall
+    assert [score for _, score in merged] == sorted((score for _, score in merged), reverse=True)
@@ -0,0 +1,153 @@
+"""
+Integration tests for recommendation API endpoints.
+"""
+
+from datetime import UTC, datetime
+
+import jwt
+import pytest
+
+from app.core.config import settings
+from app.schemas.recommendation import RecommendationList
+
+
+@pytest.fixture
+def user_token(client, clean_test_data):
+    """Register a user and return an auth token."""
+    client.post(
+        "/auth/register",
+        json={"username": "recsuser", "email": "recs@example.com", "password": "RecsPass123!"},
+    )
+    payload = {"sub": "recsuser", "exp": datetime.now(UTC).timestamp() + 3600}
+    return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def test_my_recommendations_pass_filters(client, user_token, mocker):
+    service = mocker.patch(
+        "app.services.recommendations_service.get_recommendations",
+        return_value=RecommendationList(user_id="x", recommendations=[]),
+    )
+
+    response = client.get(
+        "/recommendations/me?genres=Drama&genres=Comedy&year_min=1990&year_max=1999&exclude_watchlist=true",
+        headers={"Authorization": f"Bearer {user_token}"},
+    )
+
+    assert response.status_code == 200
+    filters = service.call_args.kwargs["filters"]
+    assert filters.genres == ["Drama", "Comedy"]
+    assert (filters.year_min, filters.year_max) == (1990, 1999)
+    assert filters.exclude_watchlist
+    assert filters.diversity is None
+    assert filters.user_id == service.call_args.kwargs["user_id"]
+
+
+def test_inverted_year_range_rejected(client, user_token):
+    response = client.get(
+        "/recommendations/me?year_min=2000&year_max=1990", headers={"Authorization": f"Bearer {user_token}"}
+    )
+
+    assert response.status_code == 422
+
+
+def test_similar_movies_filters_without_login(client, mocker):
+    service = mocker.patch("app.services.recommendations_service.get_similar_movies", return_value=[])
+
+    response = client.get("/recommendations/similar/1?genres=Drama")
+
+    assert response.status_code == 200
+    assert service.call_args.kwargs["filters"].genres == ["Drama"]
+    assert service.call_args.kwargs["filters"].user_id is None
+
+
+def test_similar_movies_exclude_rated_requires_login(client):
+    response = client.get("/recommendations/similar/1?exclude_rated=true")
+
+    assert response.status_code == 401
+
+
+def test_similar_movies_with_stale_token(client, mocker):
+    service = mocker.patch("app.services.recommendations_service.get_similar_movies", return_value=[])
+    expired = jwt.encode(
+        {"sub": "recsuser", "exp": datetime.now(UTC).timestamp() - 60},
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+    )
+    headers = {"Authorization": f"Bearer {expired}"}
+
+    # A logged-out client still sending its stored token is served anonymously
+    assert client.get("/recommendations/similar/1", headers=headers).status_code == 200
+    assert service.call_args.kwargs["filters"].user_id is None
+    assert client.get("/recommendations/similar/1?exclude_rated=true", headers=headers).status_code == 401
+
+
+def test_similar_movies_exclude_rated_for_logged_in_user(client, user_token, mocker):
+    service = mocker.patch("app.services.recommendations_service.get_similar_movies", return_value=[])
+
+    response = client.get(
+        "/recommendations/similar/1?exclude_rated=true", headers={"Authorization": f"Bearer {user_token}"}
+    )
+
+    assert response.status_code == 200
+    assert service.call_args.kwargs["filters"].user_id is not None
+
+
+def test_similar_movies_genre_weight_without_feature_blocks(client, mocker):
+    mocker.patch(
+        "app.services.recommendations_service.get_similar_movies",
+        side_effect=ValueError("genre_weight needs the genre and genome feature blocks"),
+    )
+
+    response = client.get("/recommendations/similar/1?genre_weight=0.5")
+
+    assert response.status_code == 400
+    assert "feature blocks" in response.json()["detail"]
+
+
+def test_session_recommendations_without_login(client, mocker):
+    service = mocker.patch(
+        "app.services.recommendations_service.get_session_recommendations",
+        return_value={"session_key": "abc", "recommendations": [{"movie_id": 3, "similarity_score": 0.5}]},
+    )
+
+    response = client.post(
+        "/recommendations/session", json={"movies": [{"movie_id": 1}, {"movie_id": 2, "weight": 4.5}], "limit": 5}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["recommendations"] == [{"movie_id": 3, "similarity_score": 0.5}]
+    assert service.call_args.args[1] == [(1, 1.0), (2, 4.5)]
+    assert service.call_args.kwargs["limit"] == 5
+
+
+def test_session_recommendations_validate_input(client):
+    assert client.post("/recommendations/session", json={"movies": []}).status_code == 422
+    assert client.post("/recommendations/session", json={"movies": [{"movie_id": 1, "weight": 0}]}).status_code == 422
+
+
+def test_similarity_matrix_endpoint(client, mocker):
+    service = mocker.patch(
+        "app.services.recommendations_service.get_similarity_matrix",
+        return_value={"movie_ids": [1, 2], "shape": [2, 2], "data": "AACAPwAAgD4AAIA+AACAPw=="},
+    )
+
+    response = client.post("/recommendations/similarity-matrix", json={"movie_ids": [1, 2], "genre_weight": 0.5})
+
+    assert response.status_code == 200
+    assert response.json()["dtype"] == "float32"
+    assert service.call_args.args[1] == [1, 2]
+    assert service.call_args.kwargs["genre_weight"] == 0.5
+
+
+def test_similarity_matrix_needs_two_to_two_hundred_movies(client):
+    assert client.post("/recommendations/similarity-matrix", json={"movie_ids": [1]}).status_code == 422
+    too_many = {"movie_ids": list(range(201))}
+    assert client.post("/recommendations/similarity-matrix", json=too_many).status_code == 422
+
+
+def test_similar_movies_diversity_param(client, mocker):
+    service = mocker.patch("app.services.recommendations_service.get_similar_movies", return_value=[])
+
+    assert client.get("/recommendations/similar/1?diversity=0.3").status_code == 200
+    assert service.call_args.kwargs["filters"].diversity == 0.3
+    assert client.get("/recommendations/similar/1?diversity=2").status_code == 422
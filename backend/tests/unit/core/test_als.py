@@ -0,0 +1,97 @@
+"""Unit tests for the implicit ALS recommender."""
+
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+from app.ml.als import ITEM_FACTORS_FILE, ImplicitALS
+
+
+@pytest.fixture
+def ratings():
+    # Users 0-3 rate movies 0-3, users 4-7 rate movies 4-7; each user skips one movie of their group
+    matrix = np.zeros((8, 8), dtype=np.float32)
+    for user in range(8):
+        group = range(4) if user < 4 else range(4, 8)
+        for movie in group:
+            if movie % 4 != user % 4:
+                matrix[user, movie] = 4.0 + (movie % 2)
+    return sparse.csr_matrix(matrix)
+
+
+@pytest.fixture
+def model(ratings):
+    model = ImplicitALS(factors=4, regularization=0.01, alpha=2.0, iterations=10)
+    model.fit(ratings, [f"user{i}" for i in range(8)])
+    return model
+
+
+def test_fit_reports_each_iteration(ratings):
+    model = ImplicitALS(factors=4, iterations=3)
+
+    seconds = model.fit(ratings, [f"user{i}" for i in range(8)])
+
+    assert len(seconds) == 3
+    assert model.user_factors.shape == (8, 4)
+    assert model.item_factors.shape == (8, 4)
+    assert model.trained_at is not None
+
+
+def test_unrated_movie_of_own_group_ranks_highest(model):
+    for user in range(8):
+        scores = model.scores(model.user_factors[user])
+        scores[[m for m in range(8) if m % 4 != user % 4 and (m < 4) == (user < 4)]] = -np.inf
+        own_group_movie = (0 if user < 4 else 4) + user % 4
+        assert int(np.argmax(scores)) == own_group_movie
+
+
+def test_fold_in_matches_group_of_ratings(model):
+    vector = model.fold_in(np.array([4, 5]), np.array([5.0, 5.0]))
+
+    scores = model.scores(vector)
+    assert scores[4:].mean() > scores[:4].mean()
+
+
+def test_user_vector_folds_in_after_new_ratings(model):
+    trained = model.user_vector("user0", np.array([1]), np.array([5.0]))
+    assert np.array_equal(trained, model.user_factors[0])
+
+    later = model.trained_at + timedelta(minutes=1)
+    folded = model.user_vector("user0", np.array([5, 6]), np.array([5.0, 5.0]), updated_at=later)
+    assert model.scores(folded)[4:].mean() > model.scores(folded)[:4].mean()
+
+    unknown = model.user_vector("new-user", np.array([], dtype=np.intp), np.array([]))
+    assert not unknown.any()
+
+
+def test_save_and_load_round_trip(tmp_path, model):
+    model.save(tmp_path)
+
+    loaded = ImplicitALS.load(tmp_path, n_movies=8)
+
+    assert isinstance(loaded.item_factors, np.memmap)
+    assert np.allclose(loaded.user_factors, model.user_factors)
+    assert loaded.user_ids == model.user_ids
+    assert loaded.trained_at == model.trained_at
+
+
+def test_load_rejects_wrong_catalog_size(tmp_path, model):
+    model.save(tmp_path)
+
+    with pytest.raises(ValueError, match=ITEM_FACTORS_FILE):
+        ImplicitALS.load(tmp_path, n_movies=9)
+
+
+def test_load_requires_metadata(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ImplicitALS.load(tmp_path, n_movies=8)
+
+
+def test_trained_at_compares_with_rating_timestamps(model):
+    before = datetime.now(UTC) - timedelta(days=1)
+
+    vector = model.user_vector("user4", np.array([0]), np.array([5.0]), updated_at=before)
+
+    assert np.array_equal(vector, model.user_factors[4])
@@ -0,0 +1,94 @@
+"""Unit tests for the IVF approximate nearest-neighbor index."""
+
+import numpy as np
+import pytest
+
+from app.ml.ann_index import IVFIndex, recall_report
+
+
+@pytest.fixture
+def features():
+    rng = np.random.default_rng(42)
+    centers = rng.normal(size=(8, 16))
+    data = np.repeat(centers, 50, axis=0) + rng.normal(scale=0.1, size=(400, 16))
+    return (data / np.linalg.norm(data, axis=1, keepdims=True)).astype(np.float32)
+
+
+def test_build_indexes_every_movie_once(features):
+    index = IVFIndex.build(features, n_clusters=8)
+
+    assert index.n_clusters == 8
+    assert index.list_offsets[-1] == len(features)
+    assert sorted(index.list_indices.tolist()) == list(range(len(features)))
+    assert np.allclose(np.linalg.norm(index.centroids, axis=1), 1.0)
+
+
+def test_search_with_all_probes_matches_exact(features):
+    index = IVFIndex.build(features, n_clusters=8)
+    queries = features[:3]
+
+    top_idx, top_scores = index.search(queries, n=5, probes=8, query_idx=np.arange(3))
+
+    exact = queries @ features.T
+    exact[np.arange(3), np.arange(3)] = -np.inf
+    expected = np.argsort(-exact, axis=1)[:, :5]
+    assert np.array_equal(top_idx, expected)
+    assert np.all(np.diff(top_scores, axis=1) <= 0)
+
+
+def test_search_respects_exclusions(features):
+    index = IVFIndex.build(features, n_clusters=8)
+    exclude = np.zeros(len(features), dtype=bool)
+    exclude[:100] = True
+
+    top_idx, _ = index.search(features[:1], n=10, probes=8, exclude=exclude)
+
+    assert np.all(top_idx >= 100)
+
+
+def test_search_pads_missing_results(features):
+    index = IVFIndex.build(features[:4], n_clusters=2)
+
+    top_idx, top_scores = index.search(features[:1], n=10, probes=2)
+
+    assert top_idx.shape == (1, 10)
+    assert np.all(top_idx[0, 4:] == -1)
+    assert np.all(np.isneginf(top_scores[0, 4:]))
+
+
+def test_save_and_load_round_trip(tmp_path, features):
+    index = IVFIndex.build(features, n_clusters=8)
+    index.save(tmp_path)
+
+    loaded = IVFIndex.load(tmp_path, features)
+
+    assert isinstance(loaded.centroids, np.memmap)
+    assert np.array_equal(loaded.list_indices, index.list_indices)
+
+
+def test_load_rejects_inconsistent_index(tmp_path, features):
+    IVFIndex.build(features, n_clusters=8).save(tmp_path)
+
+    with pytest.raises(ValueError, match="expected 10 rows"):
+        IVFIndex.load(tmp_path, features[:10])
+
+
+def test_recall_report_improves_with_probes(features):
+    index = IVFIndex.build(features, n_clusters=8)
+
+    report = recall_report(index, k=10, probes_options=(1, 8), n_queries=20)
+
+    assert report[0]["engine"] == "exact"
+    assert report[-1]["recall"] == 1.0
+    assert report[1]["recall"] <= report[-1]["recall"]
+    assert all(row["latency_ms"] >= 0 for row in report)
+
+
+def test_from_centroids_indexes_appended_movies(features):
+    index = IVFIndex.build(features[:300], n_clusters=8)
+
+    extended = IVFIndex.from_centroids(index.centroids, features)
+
+    assert np.array_equal(extended.centroids, index.centroids)
+    assert extended.list_offsets[-1] == len(features)
+    assert sorted(extended.list_indices.tolist()) == list(range(len(features)))
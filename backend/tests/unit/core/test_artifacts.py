@@ -0,0 +1,90 @@
+"""Unit tests for ML artifact loading and writing helpers."""
+
+import json
+
+import numpy as np
+import pytest
+
+from app.ml.artifacts import atomic_write, load_array, mapped_nbytes, read_npy_header, resident_nbytes, save_array
+
+
+def test_read_npy_header(tmp_path):
+    path = tmp_path / "a.npy"
+    np.save(path, np.zeros((3, 2), dtype=np.float32))
+
+    shape, dtype = read_npy_header(path)
+
+    assert shape == (3, 2)
+    assert dtype == np.float32
+
+
+def test_read_npy_header_rejects_non_npy(tmp_path):
+    path = tmp_path / "a.npy"
+    path.write_bytes(b"not a numpy file at all")
+
+    with pytest.raises(ValueError, match="not a valid"):
+        read_npy_header(path)
+
+
+def test_load_array_is_read_only_memmap(tmp_path):
+    path = tmp_path / "a.npy"
+    np.save(path, np.arange(6, dtype=np.float32).reshape(2, 3))
+
+    arr = load_array(path, ndim=2, rows=2)
+
+    assert isinstance(arr, np.memmap)
+    assert not arr.flags.writeable
+    assert arr[1, 2] == 5.0
+
+
+def test_load_array_validates_header(tmp_path):
+    path = tmp_path / "a.npy"
+    np.save(path, np.arange(6, dtype=np.int64))
+
+    with pytest.raises(ValueError, match="dimensions"):
+        load_array(path, ndim=2)
+    with pytest.raises(ValueError, match="dtype"):
+        load_array(path, kind="f")
+
+
+def test_load_array_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_array(tmp_path / "missing.npy")
+
+
+def test_mapped_and_resident_nbytes(tmp_path):
+    path = tmp_path / "a.npy"
+    np.save(path, np.zeros(10, dtype=np.float32))
+    mapped = load_array(path)
+    private = np.zeros(4, dtype=np.float64)
+
+    assert mapped_nbytes(mapped, private, None) == 40
+    assert resident_nbytes(mapped, private, None) == 32
+
+
+def test_save_array_keeps_mapped_readers_on_the_old_file(tmp_path):
+    path = tmp_path / "a.npy"
+    save_array(path, np.arange(4096, dtype=np.float32))
+    mapped = load_array(path)
+
+    save_array(path, np.zeros(10, dtype=np.float32))
+
+    # Truncating the file in place would make this read fault with SIGBUS
+    assert mapped.sum() == np.arange(4096).sum()
+    assert np.array_equal(np.load(path), np.zeros(10))
+    assert [p.name for p in tmp_path.iterdir()] == ["a.npy"]
+
+
+def test_atomic_write_leaves_file_untouched_on_error(tmp_path):
+    path = tmp_path / "a.json"
+    path.write_text("old")
+
+    def write_unserializable():
+        with atomic_write(path, "w") as f:
+            json.dump({"a": 1, "b": object()}, f)
+
+    with pytest.raises(TypeError):
+        write_unserializable()
+
+    assert path.read_text() == "old"
+    assert [p.name for p in tmp_path.iterdir()] == ["a.json"]
@@ -0,0 +1,60 @@
+"""Unit tests for the background job runner."""
+
+import threading
+
+from app.core.background import BackgroundRunner
+
+
+def test_runs_submitted_job():
+    runner = BackgroundRunner(max_workers=1)
+    done = threading.Event()
+
+    assert runner.submit("job", done.set)
+    runner.shutdown()
+
+    assert done.is_set()
+    assert not runner.is_pending("job")
+
+
+def test_deduplicates_jobs_in_flight():
+    runner = BackgroundRunner(max_workers=2)
+    release = threading.Event()
+    calls = []
+
+    def job(name):
+        release.wait()
+        calls.append(name)
+
+    assert runner.submit("user1", job, "first")
+    assert not runner.submit("user1", job, "second")
+    assert runner.submit("user2", job, "other")
+    assert runner.is_pending("user1")
+
+    release.set()
+    runner.wait("user1")
+    assert not runner.is_pending("user1")
+    assert runner.submit("user1", job, "third")
+    runner.shutdown()
+
+    assert sorted(calls) == ["first", "other", "third"]
+
+
+def test_failed_job_is_logged_and_released(caplog):
+    runner = BackgroundRunner(max_workers=1)
+
+    def fail():
+        raise ValueError("boom")
+
+    runner.submit("job", fail)
+    runner.wait("job")
+    runner.shutdown()
+
+    assert not runner.is_pending("job")
+    assert "Background job 'job' failed" in caplog.text
+
+
+def test_rejects_jobs_after_shutdown():
+    runner = BackgroundRunner(max_workers=1)
+    runner.shutdown()
+
+    assert not runner.submit("job", print)
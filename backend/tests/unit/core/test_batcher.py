@@ -0,0 +1,158 @@
+"""Unit tests for the recommendation micro-batcher."""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml.batcher import BatchingRecommender, MicroBatcher
+from app.ml.recommender import MovieRecommender
+
+
+@pytest.fixture
+def recommender(tmp_path):
+    rng = np.random.default_rng(0)
+    movie_ids = list(range(1, 21))
+    pd.DataFrame({"movie_id": movie_ids, "title": [f"Movie {i}" for i in movie_ids], "genres": ["Drama"] * 20}).to_csv(
+        tmp_path / "movies_clean.csv", index=False
+    )
+
+    features = rng.random((20, 8)).astype(np.float32)
+    features /= np.linalg.norm(features, axis=1, keepdims=True)
+    np.save(tmp_path / "combined_features.npy", features)
+    np.save(tmp_path / "similarity_matrix.npy", features @ features.T)
+    with Path.open(tmp_path / "movie_id_to_idx.json", "w") as f:
+        json.dump({mid: i for i, mid in enumerate(movie_ids)}, f)
+
+    return MovieRecommender(data_dir=str(tmp_path))
+
+
+def run_concurrently(func, args):
+    with ThreadPoolExecutor(max_workers=len(args)) as pool:
+        return list(pool.map(func, args))
+
+
+def test_concurrent_requests_are_batched():
+    batch_sizes = []
+
+    def handler(requests):
+        batch_sizes.append(len(requests))
+        return [r * 2 for r in requests]
+
+    batcher = MicroBatcher(handler, window_ms=200)
+    try:
+        results = run_concurrently(batcher.submit, list(range(8)))
+    finally:
+        batcher.close()
+
+    assert results == [r * 2 for r in range(8)]
+    assert sum(batch_sizes) == 8
+    assert len(batch_sizes) < 8
+
+
+def test_batch_size_is_capped():
+    batch_sizes = []
+    release = threading.Event()
+
+    def handler(requests):
+        release.wait()
+        batch_sizes.append(len(requests))
+        return requests
+
+    batcher = MicroBatcher(handler, window_ms=200, max_batch=3)
+    with ThreadPoolExecutor(max_workers=7) as pool:
+        futures = [pool.submit(batcher.submit, i) for i in range(7)]
+        release.set()
+        assert [f.result() for f in futures] == list(range(7))
+    batcher.close()
+
+    assert max(batch_sizes) <= 3
+
+
+def test_handler_errors_are_raised_in_callers():
+    def handler(_requests):
+        raise ValueError("bad batch")
+
+    batcher = MicroBatcher(handler, window_ms=1)
+    try:
+        with pytest.raises(ValueError, match="bad batch"):
+            batcher.submit(1)
+    finally:
+        batcher.close()
+
+
+def test_submit_after_close_runs_inline():
+    batcher = MicroBatcher(lambda requests: [r + 1 for r in requests], window_ms=1)
+    batcher.close()
+
+    assert batcher.submit(1) == 2
+
+
+def test_window_must_be_positive():
+    with pytest.raises(ValueError, match="window"):
+        MicroBatcher(list, window_ms=0)
+
+
+def test_batched_similar_matches_recommender(recommender):
+    batching = BatchingRecommender(recommender, window_ms=50)
+    try:
+        results = run_concurrently(lambda mid: batching.get_similar_by_id(mid, n=mid % 4 + 1), [1, 2, 3, 3, 7])
+    finally:
+        batching.close()
+
+    for mid, recs in zip([1, 2, 3, 3, 7], results, strict=True):
+        assert recs == recommender.get_similar_by_id(mid, n=mid % 4 + 1)
+
+
+def test_batched_profiles_match_recommender(recommender):
+    profiles = [({1: 1.0, 2: 0.5}, [3]), ({4: 1.0}, None), ({999: 1.0}, None)]
+    batching = BatchingRecommender(recommender, window_ms=50)
+    try:
+        results = run_concurrently(lambda p: batching.recommend_for_profile(p[0], n=5, exclude=p[1]), profiles)
+    finally:
+        batching.close()
+
+    # Stacked products may round differently from one-by-one products in the last float bits
+    for (seeds, exclude), recs in zip(profiles, results, strict=True):
+        expected = recommender.recommend_for_profile(seeds, n=5, exclude=exclude)
+        assert [mid for mid, _ in recs] == [mid for mid, _ in expected]
+        assert [score for _, score in recs] == pytest.approx([score for _, score in expected], rel=1e-5)
+
+
+def test_batched_seed_scores_match_recommender(recommender):
+    profiles = [{1: 1.0, 2: 0.5}, {4: -0.5}, {999: 1.0}]
+    batching = BatchingRecommender(recommender, window_ms=50)
+    try:
+        results = run_concurrently(batching.seed_scores, profiles)
+    finally:
+        batching.close()
+
+    for seeds, scores in zip(profiles, results, strict=True):
+        assert scores.shape == (20,)
+        assert np.allclose(scores, recommender.seed_scores(seeds), atol=1e-6)
+        assert scores.base is None or scores.base.shape == (20,)
+
+
+def test_batching_recommender_errors_stay_per_group(recommender):
+    batching = BatchingRecommender(recommender, window_ms=50)
+    try:
+        with pytest.raises(ValueError, match="not found"):
+            batching.get_similar_by_id(999)
+        with pytest.raises(ValueError, match="CF weight"):
+            batching.recommend_for_profile({1: 1.0}, cf_weight=2.0)
+        assert len(batching.get_similar_by_id(1, n=3)) == 3
+    finally:
+        batching.close()
+
+
+def test_batching_recommender_forwards_other_attributes(recommender):
+    batching = BatchingRecommender(recommender, window_ms=1)
+    try:
+        assert batching.version == recommender.version
+        assert batching.movie_id_to_idx is recommender.movie_id_to_idx
+    finally:
+        batching.close()
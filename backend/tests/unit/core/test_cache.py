@@ -0,0 +1,43 @@
+"""Unit tests for the LRU cache."""
+
+import pytest
+
+from app.core.cache import LRUCache
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+
+    cache.put("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_pop_and_clear():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+
+    assert cache.pop("a") == 1
+    assert cache.pop("a", "missing") == "missing"
+    cache.put("b", 2)
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_zero_size_cache_stores_nothing():
+    cache = LRUCache(maxsize=0)
+    cache.put("a", 1)
+
+    assert not cache.enabled
+    assert cache.get("a") is None
+
+
+def test_negative_size_rejected():
+    with pytest.raises(ValueError, match="negative"):
+        LRUCache(maxsize=-1)
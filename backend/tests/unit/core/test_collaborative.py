@@ -0,0 +1,85 @@
+"""Unit tests for item-item collaborative filtering."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml.collaborative import (
+    NEIGHBOR_IDX_FILE,
+    NEIGHBOR_SIM_FILE,
+    build_and_save,
+    build_rating_matrix,
+    item_neighbors,
+    profile_scores,
+    read_ratings_csv,
+)
+
+
+@pytest.fixture
+def ratings():
+    # Users who like movie 10 also like movie 20; movie 30 is liked by the others
+    return pd.DataFrame(
+        {
+            "user_id": ["a", "a", "a", "b", "b", "b", "c", "c", "c", "d", "d"],
+            "movie_id": [10, 20, 30, 10, 20, 30, 10, 20, 30, 30, 99],
+            "rating": [5.0, 5.0, 1.0, 4.0, 5.0, 2.0, 1.0, 1.0, 5.0, 4.0, 3.0],
+        }
+    )
+
+
+@pytest.fixture
+def movie_id_to_idx():
+    return {10: 0, 20: 1, 30: 2, 40: 3}
+
+
+def test_rating_matrix_is_mean_centered(ratings, movie_id_to_idx):
+    matrix = build_rating_matrix([ratings[:5], ratings[5:]], movie_id_to_idx)
+
+    assert matrix.shape == (4, 4)
+    assert matrix.dtype == np.float32
+    assert np.allclose(matrix.toarray()[0], [5 - 11 / 3, 5 - 11 / 3, 1 - 11 / 3, 0])
+    # Ratings of unknown movies (99) are skipped
+    assert matrix.nnz == 10
+
+
+def test_item_neighbors_rank_co_liked_movies(ratings, movie_id_to_idx):
+    matrix = build_rating_matrix([ratings], movie_id_to_idx)
+
+    neighbor_idx, neighbor_sim = item_neighbors(matrix, k=2, block_size=2)
+
+    assert neighbor_idx.shape == (4, 2)
+    assert neighbor_idx[0, 0] == 1
+    assert neighbor_idx[1, 0] == 0
+    assert neighbor_sim[0, 0] == pytest.approx(neighbor_sim[1, 0])
+    assert 0 < neighbor_sim[0, 0] <= 1
+    # Movie 30 is disliked by the users who like 10 and 20, and movie 40 has no ratings
+    assert np.all(neighbor_idx[2:] == -1)
+    assert np.all(neighbor_sim[2:] == 0)
+
+
+def test_build_and_save_writes_artifacts(tmp_path, ratings, movie_id_to_idx):
+    covered = build_and_save(tmp_path, [ratings], movie_id_to_idx, k=2)
+
+    assert covered == 2
+    assert np.load(tmp_path / NEIGHBOR_IDX_FILE).dtype == np.int32
+    assert np.load(tmp_path / NEIGHBOR_SIM_FILE).shape == (4, 2)
+
+
+def test_profile_scores_scatter_weighted_neighbors():
+    neighbor_idx = np.array([[1, 2], [0, -1], [-1, -1]], dtype=np.int32)
+    neighbor_sim = np.array([[0.5, 0.25], [0.5, 0.0], [0.0, 0.0]], dtype=np.float32)
+
+    scores = profile_scores(neighbor_idx, neighbor_sim, np.array([0, 1]), np.array([0.5, 0.5]), 3)
+
+    assert scores.tolist() == pytest.approx([0.25, 0.25, 0.125])
+
+
+def test_read_ratings_csv_streams_chunks(tmp_path):
+    path = tmp_path / "ratings.csv"
+    path.write_text("user_id,movie_id,rating,timestamp\n1,10,4.0,0\n1,20,3.5,0\n2,10,5.0,0\n")
+
+    chunks = list(read_ratings_csv(path, chunksize=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert list(chunks[0].columns) == ["user_id", "movie_id", "rating"]
+    assert chunks[0]["user_id"].dtype == np.int32
@@ -8,12 +8,14 @@ import pytest
 from fastapi import HTTPException
 from jwt.exceptions import InvalidTokenError
 
+from app.core.active_penalties import ActivePenalties
 from app.core.config import settings
 from app.core.dependencies import (
     decode_token_payload,
     get_current_active_user,
     get_current_admin_user,
     get_current_user,
+    get_optional_current_user,
 )
 
 
@@ -41,6 +43,7 @@ def mock_resources(mock_users_repo, mock_penalties_repo):
     resources = Mock()
     resources.users_repo = mock_users_repo
     resources.penalties_repo = mock_penalties_repo
+    resources.active_penalties = ActivePenalties(mock_penalties_repo.get_active_by_user, maxsize=0)
     return resources
 
 
@@ -109,6 +112,26 @@ async def test_get_current_user_user_deleted(mock_resources, valid_token):
     assert exc_info.value.status_code == 401
 
 
+@pytest.mark.asyncio
+async def test_get_optional_current_user_with_valid_token(mock_resources, valid_token):
+    user = await get_optional_current_user(token=valid_token, resources=mock_resources)
+
+    assert user["id"] == "user123"
+
+
+@pytest.mark.asyncio
+async def test_get_optional_current_user_treats_bad_token_as_anonymous(mock_resources):
+    expired = jwt.encode(
+        {"sub": "testuser", "exp": datetime.now(UTC) - timedelta(hours=1)},
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+    )
+
+    assert await get_optional_current_user(token=None, resources=mock_resources) is None
+    assert await get_optional_current_user(token="invalid_token", resources=mock_resources) is None
+    assert await get_optional_current_user(token=expired, resources=mock_resources) is None
+
+
 @pytest.mark.asyncio
 async def test_get_current_active_user_success(mock_resources):
     current_user = {"id": "user123", "username": "testuser", "role": "user"}
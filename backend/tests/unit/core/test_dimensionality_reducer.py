@@ -0,0 +1,58 @@
+"""Unit tests for SVD dimensionality reduction of movie features."""
+
+import numpy as np
+import pytest
+
+from app.ml.data_preprocessor import MovieDataPreprocessor
+from app.ml.feature_engineering.dimensionality_reducer import ranking_overlap, reduce_features
+
+
+@pytest.fixture
+def combined_matrix():
+    rng = np.random.default_rng(0)
+    latent = rng.normal(size=(120, 6))
+    mixing = rng.normal(size=(6, 40))
+    matrix = latent @ mixing + rng.normal(scale=0.01, size=(120, 40))
+    return (matrix / np.linalg.norm(matrix, axis=1, keepdims=True)).astype(np.float32)
+
+
+def test_reduce_features_shape_and_normalization(combined_matrix):
+    reduced, svd = reduce_features(combined_matrix, n_components=8)
+
+    assert reduced.shape == (120, 8)
+    assert reduced.dtype == np.float32
+    assert np.allclose(np.linalg.norm(reduced, axis=1), 1.0, atol=1e-5)
+    assert svd.components_.shape == (8, 40)
+    assert svd.explained_variance_ratio_.sum() > 0.95
+
+
+def test_reduce_features_caps_components(combined_matrix):
+    reduced, _ = reduce_features(combined_matrix[:, :5], n_components=64)
+
+    assert reduced.shape[1] == 4
+
+
+def test_ranking_overlap_identical_is_one(combined_matrix):
+    assert ranking_overlap(combined_matrix, combined_matrix, k=5) == 1.0
+
+
+def test_ranking_overlap_preserved_for_low_rank_data(combined_matrix):
+    reduced, _ = reduce_features(combined_matrix, n_components=8)
+
+    assert ranking_overlap(combined_matrix, reduced, k=5) > 0.8
+
+
+def test_preprocessor_saves_reduced_features(tmp_path, combined_matrix):
+    preprocessor = MovieDataPreprocessor(output_dir=str(tmp_path), reduced_dims=8)
+
+    report = preprocessor.reduce_dimensions(combined_matrix)
+
+    assert report["n_components"] == 8
+    assert 0 < report["explained_variance"] <= 1
+    assert np.load(tmp_path / "reduced_features.npy").shape == (120, 8)
+    assert np.load(tmp_path / "svd_components.npy").shape == (8, 40)
+
+
+def test_preprocessor_rejects_invalid_reduced_dims(tmp_path):
+    with pytest.raises(ValueError, match="Reduced dims must be positive"):
+        MovieDataPreprocessor(output_dir=str(tmp_path), reduced_dims=0)
@@ -0,0 +1,66 @@
+"""Unit tests for MMR re-ranking."""
+
+import numpy as np
+import pytest
+
+from app.ml.diversity import mmr_rerank
+
+
+@pytest.fixture
+def candidates():
+    # 0 and 1 are near-duplicates (e.g. a movie and its sequel); 2 is less relevant but different
+    relevance = np.array([0.9, 0.88, 0.7, 0.5])
+    similarity = np.array(
+        [
+            [1.0, 0.98, 0.1, 0.2],
+            [0.98, 1.0, 0.1, 0.2],
+            [0.1, 0.1, 1.0, 0.3],
+            [0.2, 0.2, 0.3, 1.0],
+        ]
+    )
+    return relevance, similarity
+
+
+def test_zero_diversity_keeps_relevance_order(candidates):
+    relevance, similarity = candidates
+
+    assert mmr_rerank(relevance, similarity, 4, 0.0).tolist() == [0, 1, 2, 3]
+
+
+def test_diversity_demotes_near_duplicates(candidates):
+    relevance, similarity = candidates
+
+    assert mmr_rerank(relevance, similarity, 4, 0.5).tolist() == [0, 2, 1, 3]
+
+
+def test_selects_at_most_all_candidates(candidates):
+    relevance, similarity = candidates
+
+    assert sorted(mmr_rerank(relevance, similarity, 10, 0.3).tolist()) == [0, 1, 2, 3]
+    assert mmr_rerank(relevance[:0], similarity[:0, :0], 5, 0.3).tolist() == []
+
+
+def test_matches_naive_mmr_on_random_pool():
+    rng = np.random.default_rng(5)
+    features = rng.normal(size=(200, 16))
+    features /= np.linalg.norm(features, axis=1, keepdims=True)
+    similarity = features @ features.T
+    relevance = rng.random(200)
+
+    selected = mmr_rerank(relevance, similarity, 20, 0.4)
+
+    scaled = (relevance - relevance.min()) / np.ptp(relevance)
+    expected = [int(np.argmax(scaled))]
+    while len(expected) < 20:
+        rest = [i for i in range(200) if i not in expected]
+        expected.append(max(rest, key=lambda i: 0.6 * scaled[i] - 0.4 * max(similarity[i, j] for j in expected)))
+    assert selected.tolist() == expected
+
+
+def test_rejects_invalid_arguments(candidates):
+    relevance, similarity = candidates
+
+    with pytest.raises(ValueError, match="between 0 and 1"):
+        mmr_rerank(relevance, similarity, 2, 1.5)
+    with pytest.raises(ValueError, match="does not match"):
+        mmr_rerank(relevance, similarity[:3], 2, 0.5)
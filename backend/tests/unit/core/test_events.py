@@ -0,0 +1,41 @@
+"""Unit tests for the change event bus."""
+
+from unittest.mock import Mock
+
+from app.core.events import RATING_CREATED, RATING_EVENTS, WATCHLIST_ADDED, EventBus
+
+
+def test_publish_calls_subscribers_of_the_event():
+    bus = EventBus()
+    rating_handler, watchlist_handler = Mock(), Mock()
+    bus.subscribe(RATING_EVENTS, rating_handler)
+    bus.subscribe(WATCHLIST_ADDED, watchlist_handler)
+
+    bus.publish(RATING_CREATED, {"user_id": "u1", "movie_id": 1})
+
+    rating_handler.assert_called_once_with(RATING_CREATED, {"user_id": "u1", "movie_id": 1})
+    watchlist_handler.assert_not_called()
+
+
+def test_failing_handler_does_not_stop_others(caplog):
+    bus = EventBus()
+    failing = Mock(side_effect=ValueError("boom"))
+    other = Mock()
+    bus.subscribe(RATING_CREATED, failing)
+    bus.subscribe(RATING_CREATED, other)
+
+    bus.publish(RATING_CREATED, {"movie_id": 1})
+
+    other.assert_called_once()
+    assert "failed for rating_created event" in caplog.text
+
+
+def test_unsubscribe_stops_delivery():
+    bus = EventBus()
+    handler = Mock()
+    bus.subscribe(RATING_CREATED, handler)
+    bus.unsubscribe(RATING_CREATED, handler)
+
+    bus.publish(RATING_CREATED)
+
+    handler.assert_not_called()
@@ -1,7 +1,12 @@
+import numpy as np
 import pandas as pd
 import pytest
 
-from app.ml.feature_engineering.genome_processor import create_genome_features
+from app.ml.feature_engineering.genome_processor import (
+    GENOME_SCORE_DTYPES,
+    create_genome_features,
+    read_genome_scores,
+)
 
 
 def test_genome_duplicates(mocker):
@@ -21,3 +26,52 @@ def test_genome_duplicates(mocker):
     assert result[0][0] == pytest.approx(0.9)
 
     assert result[1][0] == pytest.approx(0.4)
+
+
+def test_genome_matches_pivot_table():
+    rng = np.random.default_rng(0)
+    genome_df = pd.DataFrame(
+        {
+            "movie_id": np.repeat([10, 20, 30, 40], 5),
+            "tag_id": np.tile([5, 1, 3, 2, 4], 4),
+            "relevance": rng.random(20),
+        }
+    )
+    movies_df = pd.DataFrame({"movie_id": [30, 10, 99, 40]})
+
+    result = create_genome_features(movies_df, genome_df)
+
+    expected = (
+        genome_df.pivot_table(index="movie_id", columns="tag_id", values="relevance", fill_value=0.0)
+        .reindex(movies_df["movie_id"], fill_value=0.0)
+        .to_numpy(dtype=np.float32)
+    )
+    assert result.dtype == np.float32
+    assert np.allclose(result, expected)
+
+
+def test_genome_chunks_keep_first_duplicate_and_tag_order():
+    movies_df = pd.DataFrame({"movie_id": [100, 101]})
+    chunks = [
+        pd.DataFrame({"movie_id": [100, 101], "tag_id": [2, 1], "relevance": [0.2, 0.5]}),
+        pd.DataFrame({"movie_id": [101, 100, 102], "tag_id": [1, 7, 1], "relevance": [0.9, 0.3, 0.6]}),
+    ]
+
+    result = create_genome_features(movies_df, iter(chunks), tag_ids=[2, 1])
+
+    assert result.tolist() == [[pytest.approx(0.2), 0.0], [0.0, pytest.approx(0.5)]]
+
+
+def test_genome_chunks_require_tag_ids():
+    with pytest.raises(ValueError, match="tag_ids are required"):
+        create_genome_features(pd.DataFrame({"movie_id": [1]}), iter([]))
+
+
+def test_read_genome_scores_uses_compact_dtypes(tmp_path):
+    path = tmp_path / "genome-scores.csv"
+    path.write_text("movie_id,tag_id,relevance\n1,1,0.5\n1,2,0.25\n2,1,0.75\n")
+
+    chunks = list(read_genome_scores(path, chunksize=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert chunks[0].dtypes.to_dict() == GENOME_SCORE_DTYPES
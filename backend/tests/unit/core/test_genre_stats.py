@@ -0,0 +1,50 @@
+"""Unit tests for incrementally maintained per-genre rating aggregates."""
+
+from unittest.mock import Mock
+
+from app.core.events import RATING_CREATED, RATING_DELETED, RATING_UPDATED, RATINGS_RESET
+from app.core.genre_stats import GenreStats
+
+MOVIE_GENRES = {1: ["Action", "Sci-Fi"], 2: ["Drama"], 3: [""]}
+
+
+def test_aggregates_are_loaded_once_and_updated_incrementally():
+    load = Mock(return_value=[{"user_id": "u1", "movie_id": 1, "rating": 4.0}])
+    stats = GenreStats(load, lambda: MOVIE_GENRES)
+    assert stats.snapshot() == ({"Action": {"u1": (4.0, 1)}, "Sci-Fi": {"u1": (4.0, 1)}}, {"u1": 1})
+
+    stats.handle(RATING_CREATED, {"user_id": "u2", "movie_id": 2, "rating": 3.0})
+    stats.handle(RATING_UPDATED, {"user_id": "u1", "movie_id": 1, "rating": 5.0, "previous_rating": 4.0})
+    genres, user_counts = stats.snapshot()
+    assert genres["Action"] == {"u1": (5.0, 1)}
+    assert genres["Drama"] == {"u2": (3.0, 1)}
+    assert user_counts == {"u1": 1, "u2": 1}
+
+    stats.handle(RATING_DELETED, {"user_id": "u2", "movie_id": 2, "rating": 3.0})
+    genres, user_counts = stats.snapshot()
+    assert "Drama" not in genres
+    assert user_counts == {"u1": 1}
+
+    load.assert_called_once()
+
+
+def test_movies_without_genres_are_left_out():
+    stats = GenreStats(
+        lambda: [{"user_id": "u1", "movie_id": 3, "rating": 4.0}, {"user_id": "u1", "movie_id": 99, "rating": 2.0}],
+        lambda: MOVIE_GENRES,
+    )
+
+    assert stats.snapshot() == ({}, {})
+
+
+def test_reset_reloads_and_changes_version():
+    ratings = [{"user_id": "u1", "movie_id": 1, "rating": 4.0}]
+    stats = GenreStats(lambda: ratings, lambda: MOVIE_GENRES)
+    stats.snapshot()
+    version = stats.version
+
+    ratings[:] = [{"user_id": "u2", "movie_id": 2, "rating": 1.0}]
+    stats.handle(RATINGS_RESET, {})
+
+    assert stats.version != version
+    assert stats.snapshot() == ({"Drama": {"u2": (1.0, 1)}}, {"u2": 1})
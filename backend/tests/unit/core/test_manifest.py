@@ -0,0 +1,154 @@
+"""Unit tests for the ML artifact manifest and incremental pipeline steps."""
+
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml.manifest import MANIFEST_FILE, ArtifactManifest
+from app.ml.similarity_matrix import compute_and_save_similarity, extend_similarity
+
+
+@pytest.fixture
+def stage_files(tmp_path):
+    source = tmp_path / "input.csv"
+    source.write_text("movie_id\n1\n")
+    output = tmp_path / "output.npy"
+    np.save(output, np.ones(3))
+    return {"input.csv": source}, {"output.npy": output}
+
+
+def test_recorded_stage_is_current(tmp_path, stage_files):
+    inputs, outputs = stage_files
+    manifest = ArtifactManifest(tmp_path)
+
+    assert not manifest.is_current("stage", inputs, {"k": 1}, outputs)
+    manifest.record("stage", inputs, {"k": 1}, outputs)
+
+    reloaded = ArtifactManifest(tmp_path)
+    assert (tmp_path / MANIFEST_FILE).exists()
+    assert reloaded.is_current("stage", inputs, {"k": 1}, outputs)
+    assert reloaded.version == manifest.version
+
+
+def test_changed_params_or_input_invalidate_stage(tmp_path, stage_files):
+    inputs, outputs = stage_files
+    manifest = ArtifactManifest(tmp_path)
+    manifest.record("stage", inputs, {"k": 1}, outputs)
+
+    assert not manifest.is_current("stage", inputs, {"k": 2}, outputs)
+
+    inputs["input.csv"].write_text("movie_id\n1\n2\n")
+    assert not manifest.is_current("stage", inputs, {"k": 1}, outputs)
+
+
+def test_modified_output_invalidates_stage(tmp_path, stage_files):
+    inputs, outputs = stage_files
+    manifest = ArtifactManifest(tmp_path)
+    manifest.record("stage", inputs, {}, outputs)
+
+    np.save(outputs["output.npy"], np.zeros(3))
+
+    assert not manifest.outputs_intact("stage", outputs)
+    assert not manifest.is_current("stage", inputs, {}, outputs)
+
+
+def test_unreadable_manifest_is_ignored(tmp_path):
+    (tmp_path / MANIFEST_FILE).write_text("{not json")
+
+    assert ArtifactManifest(tmp_path).get("stage") is None
+
+
+def test_extend_similarity_matches_full_recompute(tmp_path):
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(12, 5)).astype(np.float32)
+    features /= np.linalg.norm(features, axis=1, keepdims=True)
+
+    np.save(tmp_path / "combined_features.npy", features[:9])
+    compute_and_save_similarity(tmp_path)
+    np.save(tmp_path / "combined_features.npy", features)
+    extend_similarity(tmp_path, n_existing=9)
+
+    extended = np.load(tmp_path / "similarity_matrix.npy")
+    assert extended.shape == (12, 12)
+    assert np.allclose(extended, features @ features.T, atol=1e-6)
+    assert not (tmp_path / "similarity_matrix.tmp.npy").exists()
+
+
+def test_extend_similarity_rejects_mismatched_matrix(tmp_path):
+    np.save(tmp_path / "combined_features.npy", np.eye(4, dtype=np.float32))
+    np.save(tmp_path / "similarity_matrix.npy", np.eye(2, dtype=np.float32))
+
+    with pytest.raises(ValueError, match="Expected a 3x3"):
+        extend_similarity(tmp_path, n_existing=3)
+
+
+def test_changed_inputs_lists_only_modified_files(tmp_path, stage_files):
+    inputs, outputs = stage_files
+    manifest = ArtifactManifest(tmp_path)
+    assert manifest.changed_inputs("stage", inputs) is None
+
+    manifest.record("stage", inputs, {}, outputs)
+    assert manifest.changed_inputs("stage", inputs) == set()
+
+    inputs["input.csv"].write_text("movie_id\n1\n2\n")
+    assert manifest.changed_inputs("stage", inputs) == {"input.csv"}
+
+
+@pytest.fixture
+def setup_script():
+    path = Path(__file__).parents[3] / "scripts" / "setup_ml_data.py"
+    spec = importlib.util.spec_from_file_location("setup_ml_data", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def write_raw_data(raw_dir: Path, relevance_shift: float = 0.0):
+    raw_dir.mkdir(parents=True, exist_ok=True)
+    genres = ["Action|Comedy", "Drama", "Comedy|Romance", "Action|Thriller", "Drama|Romance", "Animation|Comedy"]
+    pd.DataFrame(
+        {"movie_id": range(1, 13), "title": [f"Movie {i}" for i in range(1, 13)], "genres": genres * 2}
+    ).to_csv(raw_dir / "movies.csv", index=False)
+    pd.DataFrame({"tag_id": range(1, 5), "tag": ["funny", "dark", "romantic", "fast"]}).to_csv(
+        raw_dir / "genome-tags.csv", index=False
+    )
+    rng = np.random.default_rng(0)
+    rows = [(m, t, rng.random()) for m in range(1, 13) for t in range(1, 5)]
+    scores = pd.DataFrame(rows, columns=["movie_id", "tag_id", "relevance"])
+    scores["relevance"] = (scores["relevance"] + relevance_shift * scores["tag_id"]) % 1
+    scores.to_csv(raw_dir / "genome-scores.csv", index=False)
+
+
+def test_changed_genome_scores_rebuild_features(tmp_path, monkeypatch, setup_script):
+    monkeypatch.chdir(tmp_path)
+    raw_dir = tmp_path / "app" / "static" / "movies"
+    write_raw_data(raw_dir)
+    assert setup_script.main([]) == 0
+
+    write_raw_data(raw_dir, relevance_shift=0.3)
+    assert setup_script.main([]) == 0
+    incremental = np.load(tmp_path / "data" / "ml" / "combined_features.npy")
+
+    assert setup_script.main(["--full"]) == 0
+    rebuilt = np.load(tmp_path / "data" / "ml" / "combined_features.npy")
+    assert np.allclose(incremental, rebuilt)
+    assert np.allclose(np.load(tmp_path / "data" / "ml" / "similarity_matrix.npy"), rebuilt @ rebuilt.T, atol=1e-5)
+
+
+def test_edited_movie_rows_rebuild_features(tmp_path, monkeypatch, setup_script):
+    monkeypatch.chdir(tmp_path)
+    raw_dir = tmp_path / "app" / "static" / "movies"
+    write_raw_data(raw_dir)
+    assert setup_script.main([]) == 0
+
+    movies = pd.read_csv(raw_dir / "movies.csv")
+    movies.loc[0, "genres"] = "Horror"
+    movies.to_csv(raw_dir / "movies.csv", index=False)
+    assert setup_script.main([]) == 0
+
+    movies_clean = pd.read_csv(tmp_path / "data" / "ml" / "movies_clean.csv")
+    assert movies_clean.loc[0, "genres"] == "Horror"
+    assert len(movies_clean) == len(movies)
@@ -0,0 +1,130 @@
+"""Unit tests for incrementally updated user profile scores."""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml.profile_state import CANDIDATE_COUNT, ProfileState
+from app.ml.recommender import MovieRecommender
+
+
+@pytest.fixture
+def recommender(tmp_path):
+    rng = np.random.default_rng(1)
+    movie_ids = list(range(1, 31))
+    pd.DataFrame({"movie_id": movie_ids, "title": [f"Movie {i}" for i in movie_ids], "genres": ["Drama"] * 30}).to_csv(
+        tmp_path / "movies_clean.csv", index=False
+    )
+
+    features = rng.random((30, 8)).astype(np.float32)
+    features /= np.linalg.norm(features, axis=1, keepdims=True)
+    np.save(tmp_path / "combined_features.npy", features)
+    np.save(tmp_path / "similarity_matrix.npy", features @ features.T)
+    with Path.open(tmp_path / "movie_id_to_idx.json", "w") as f:
+        json.dump({mid: i for i, mid in enumerate(movie_ids)}, f)
+
+    return MovieRecommender(data_dir=str(tmp_path))
+
+
+def assert_same_ranking(actual, expected):
+    assert [mid for mid, _ in actual] == [mid for mid, _ in expected]
+    assert [score for _, score in actual] == pytest.approx([score for _, score in expected], rel=1e-4)
+
+
+def test_state_matches_full_profile_scoring(recommender):
+    seeds = {1: 1.0, 2: 0.8}
+    state = ProfileState(recommender, seeds, rated={1, 2, 3})
+
+    assert_same_ranking(state.recommend(recommender, 5), recommender.recommend_for_profile(seeds, 5, exclude={3}))
+
+
+def test_update_folds_in_one_movie(recommender):
+    state = ProfileState(recommender, {1: 1.0, 2: 0.8}, rated={1, 2})
+    state.recommend(recommender, 5)
+
+    state.update(recommender, 10, 0.9)  # New seed
+    state.update(recommender, 2, 0.0)  # Rating lowered below the seed threshold
+    state.update(recommender, 11, 0.0)  # Rated but not a seed
+
+    expected = recommender.recommend_for_profile({1: 1.0, 10: 0.9}, 5, exclude={2, 11})
+    assert_same_ranking(state.recommend(recommender, 5), expected)
+
+
+def test_unrated_movie_can_be_recommended_again(recommender):
+    state = ProfileState(recommender, {1: 1.0}, rated={1, 5})
+
+    state.update(recommender, 5, 0.0, rated=False)
+
+    assert 5 in {mid for mid, _ in state.recommend(recommender, 29)}
+
+
+def test_state_without_seeds_recommends_nothing(recommender):
+    state = ProfileState(recommender, {1: 1.0}, rated={1})
+    state.update(recommender, 1, 0.0)
+
+    assert state.recommend(recommender, 5) == []
+
+
+def test_matches_version_and_weights(recommender):
+    state = ProfileState(recommender, {1: 1.0}, rated={1}, cf_weight=0.0)
+
+    assert state.matches(recommender.version, None, 0.0)
+    assert not state.matches("other", None, 0.0)
+    assert not state.matches(recommender.version, 0.5, 0.0)
+
+
+def test_random_updates_match_full_profile_scoring(recommender, mocker):
+    # Few candidates, so updates both stay within the bound and fall back to rebuilds
+    mocker.patch("app.ml.profile_state.CANDIDATE_COUNT", 3)
+    rng = np.random.default_rng(7)
+    seeds = {1: 1.0, 2: 0.8}
+    rated = {1, 2}
+    state = ProfileState(recommender, seeds, rated=rated)
+    state.recommend(recommender, 10)
+
+    for _ in range(40):
+        movie_id = int(rng.integers(1, 31))
+        weight = float(rng.choice([0.0, 0.8, 0.9, 1.0]))
+        # Deleting a rating (rated=False) also drops its seed weight
+        is_rated = weight > 0 or bool(rng.random() < 0.7)
+        state.update(recommender, movie_id, weight, rated=is_rated)
+        if weight > 0:
+            seeds[movie_id] = weight
+        else:
+            seeds.pop(movie_id, None)
+        (rated.add if is_rated else rated.discard)(movie_id)
+        if not seeds:
+            continue
+
+        expected = recommender.recommend_for_profile(seeds, 10, exclude=rated)
+        assert_same_ranking(state.recommend(recommender, 10), expected)
+
+
+def test_keeps_only_top_candidates(recommender, mocker):
+    mocker.patch("app.ml.profile_state.CANDIDATE_COUNT", 5)
+    state = ProfileState(recommender, {1: 1.0}, rated={1})
+    state.recommend(recommender, 3)
+    assert len(state._candidate_idx) == 8
+    seed_scores = mocker.spy(recommender, "seed_scores")
+
+    state.update(recommender, 2, 0.0)  # Rated but not a seed: no row is scored and nothing is rebuilt
+
+    assert_same_ranking(state.recommend(recommender, 3), recommender.recommend_for_profile({1: 1.0}, 3, exclude={1, 2}))
+    seed_scores.assert_not_called()
+
+
+def test_small_candidate_set_stays_exact(recommender, mocker):
+    mocker.patch("app.ml.profile_state.CANDIDATE_COUNT", 2)
+    seeds = {1: 1.0}
+    state = ProfileState(recommender, seeds, rated={1})
+    state.recommend(recommender, 3)
+
+    for movie_id in range(2, 12):
+        state.update(recommender, movie_id, 0.8)
+        seeds[movie_id] = 0.8
+        expected = recommender.recommend_for_profile(seeds, 3, exclude=set(seeds))
+        assert_same_ranking(state.recommend(recommender, 3), expected)
+    assert len(state._candidate_idx) <= 5
@@ -0,0 +1,71 @@
+"""Unit tests for int8 feature quantization."""
+
+import numpy as np
+import pytest
+
+from app.ml.quantization import (
+    dequantize,
+    int8_scores,
+    quantize,
+    quantize_and_save,
+    quantized_scores,
+    ranking_agreement,
+)
+
+
+@pytest.fixture
+def features():
+    rng = np.random.default_rng(7)
+    matrix = rng.normal(size=(300, 32))
+    return (matrix / np.linalg.norm(matrix, axis=1, keepdims=True)).astype(np.float32)
+
+
+def test_quantize_round_trip_error_is_small(features):
+    codes, scales = quantize(features)
+
+    assert codes.dtype == np.int8
+    assert scales.dtype == np.float32
+    assert codes.nbytes * 4 == features.nbytes
+    assert np.abs(codes * scales[:, None] - features).max() <= scales.max() / 2 + 1e-6
+
+
+def test_quantize_handles_zero_vector():
+    codes, scales = quantize(np.zeros((1, 4)))
+
+    assert np.all(codes == 0)
+    assert scales[0] == 1.0
+
+
+def test_int8_scores_approximate_float_dot_products(features):
+    codes, scales = quantize(features)
+
+    approx = int8_scores(codes[:5], scales[:5], codes, scales)
+    exact = features[:5] @ features.T
+
+    assert approx.shape == (5, 300)
+    assert np.abs(approx - exact).max() < 0.02
+
+
+def test_quantized_scores_match_dequantized_dot_products(features):
+    codes, scales = quantize(features)
+
+    scores = quantized_scores(features[:3], codes, scales)
+
+    assert scores.dtype == np.float32
+    assert scores == pytest.approx(features[:3] @ dequantize(codes, scales).T, abs=1e-5)
+
+
+def test_ranking_agreement_is_high(features):
+    codes, scales = quantize(features)
+
+    assert ranking_agreement(features, codes, scales, k=10, n_queries=50) > 0.8
+
+
+def test_quantize_and_save_writes_artifacts(tmp_path, features):
+    np.save(tmp_path / "combined_features.npy", features)
+
+    agreement = quantize_and_save(tmp_path)
+
+    assert 0.8 < agreement <= 1.0
+    assert np.load(tmp_path / "quantized_codes.npy").dtype == np.int8
+    assert np.load(tmp_path / "quantized_scales.npy").shape == (300,)
@@ -0,0 +1,45 @@
+"""Unit tests for incrementally maintained rating aggregates."""
+
+from unittest.mock import Mock
+
+from app.core.events import RATING_CREATED, RATING_DELETED, RATING_UPDATED, RATINGS_RESET
+from app.core.rating_stats import RatingStats
+
+
+def test_aggregates_are_loaded_once_and_updated_incrementally():
+    load = Mock(return_value=[{"movie_id": 1, "rating": 4.0}, {"movie_id": 1, "rating": 3.0}])
+    stats = RatingStats(load)
+    assert stats.average(1) == 3.5
+
+    stats.handle(RATING_CREATED, {"movie_id": 1, "rating": 5.0})
+    assert stats.average(1) == 4.0
+    stats.handle(RATING_UPDATED, {"movie_id": 1, "rating": 2.0, "previous_rating": 5.0})
+    assert stats.average(1) == 3.0
+    stats.handle(RATING_DELETED, {"movie_id": 1, "rating": 2.0})
+    assert stats.movie_stats() == {1: (7.0, 2)}
+
+    load.assert_called_once()
+
+
+def test_movie_without_ratings_has_no_average():
+    stats = RatingStats(lambda: [{"movie_id": 1, "rating": 4.0}])
+    assert stats.average(1) == 4.0
+    stats.handle(RATING_DELETED, {"movie_id": 1, "rating": 4.0})
+
+    assert stats.average(1) is None
+    assert stats.average(2) is None
+    assert stats.movie_stats() == {}
+
+
+def test_reset_reloads_and_changes_version():
+    ratings = [{"movie_id": 1, "rating": 4.0}]
+    stats = RatingStats(lambda: ratings)
+    assert stats.average(1) == 4.0
+    version = stats.version
+
+    ratings[:] = [{"movie_id": 2, "rating": 1.0}]
+    stats.handle(RATINGS_RESET, {})
+
+    assert stats.version != version
+    assert stats.average(1) is None
+    assert stats.average(2) == 1.0
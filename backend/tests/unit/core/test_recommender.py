@@ -2,13 +2,17 @@
 
 import json
 import re
+from datetime import UTC, datetime
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 import pytest
 
-from app.ml.recommender import MovieRecommender
+from app.ml.als import ImplicitALS
+from app.ml.ann_index import IVFIndex
+from app.ml.quantization import quantize
+from app.ml.recommender import MovieRecommender, top_n
 
 
 @pytest.fixture
@@ -204,3 +208,378 @@ def test_similarity_matrix_diagonal_ones(mock_data_files):
     matrix = recommender.similarity_matrix
 
     assert np.allclose(np.diag(matrix), 1.0)
+
+
+def test_similarity_matrix_is_memory_mapped(mock_data_files):
+    recommender = MovieRecommender(data_dir=str(mock_data_files))
+
+    assert isinstance(recommender.similarity_matrix, np.memmap)
+    assert not recommender.similarity_matrix.flags.writeable
+
+
+def test_similarity_matrix_wrong_row_count_rejected(mock_data_files):
+    np.save(mock_data_files / "similarity_matrix.npy", np.eye(3))
+
+    with pytest.raises(ValueError, match="expected 5 rows"):
+        MovieRecommender(data_dir=str(mock_data_files))
+
+
+def test_similarity_matrix_not_square_rejected(mock_data_files):
+    np.save(mock_data_files / "similarity_matrix.npy", np.ones((5, 4)))
+
+    with pytest.raises(ValueError, match="must be square"):
+        MovieRecommender(data_dir=str(mock_data_files))
+
+
+def test_get_similar_by_ids_batches_queries(mock_data_files):
+    recommender = MovieRecommender(data_dir=str(mock_data_files))
+
+    result = recommender.get_similar_by_ids([1, 3], n=2)
+
+    assert set(result) == {1, 3}
+    assert result[1] == recommender.get_similar_by_id(1, n=2)
+    assert [mid for mid, _ in result[3]] == [4, 1]
+
+
+def test_get_similar_by_ids_applies_exclusions(mock_data_files):
+    recommender = MovieRecommender(data_dir=str(mock_data_files))
+
+    result = recommender.get_similar_by_ids([1, 2], n=10, exclude={1, 4})
+
+    assert [mid for mid, _ in result[1]] == [2, 5, 3]
+    assert [mid for mid, _ in result[2]] == [5, 3]
+
+
+def test_get_similar_by_ids_skips_unknown_movies(mock_data_files):
+    recommender = MovieRecommender(data_dir=str(mock_data_files))
+
+    result = recommender.get_similar_by_ids([999, 2], n=1)
+
+    assert list(result) == [2]
+
+
+@pytest.fixture
+def dated_data_files(mock_data_files):
+    movies = pd.read_csv(mock_data_files / "movies_clean.csv")
+    movies["title"] = ["Movie 1 (1995)", "Movie 2 (2001)", "Movie 3", "Movie 4 (2010)", "Movie 5 (1988)"]
+    movies.to_csv(mock_data_files / "movies_clean.csv", index=False)
+    return mock_data_files
+
+
+def test_filter_mask_by_genres_and_years(dated_data_files):
+    recommender = MovieRecommender(data_dir=str(dated_data_files))
+
+    def kept(mask):
+        return recommender.movie_ids[~mask].tolist()
+
+    assert kept(recommender.filter_mask()) == [1, 2, 3, 4, 5]
+    assert kept(recommender.filter_mask(genres=["sci-fi", "Drama"])) == [1, 3, 5]
+    assert kept(recommender.filter_mask(year_min=1990)) == [1, 2, 4]
+    assert kept(recommender.filter_mask(year_max=2005)) == [1, 2, 5]
+    assert kept(recommender.filter_mask(genres=["Action"], year_max=2005)) == [1]
+    assert kept(recommender.filter_mask(genres=["Western"])) == []
+
+
+def test_filter_mask_rejects_inverted_year_range(dated_data_files):
+    recommender = MovieRecommender(data_dir=str(dated_data_files))
+
+    with pytest.raises(ValueError, match="year_min"):
+        recommender.filter_mask(year_min=2000, year_max=1990)
+
+
+def test_filtered_recommendations_return_full_count(dated_data_files):
+    recommender = MovieRecommender(data_dir=str(dated_data_files))
+    mask = recommender.filter_mask(year_min=1990) | recommender.exclusion_mask([2])
+
+    assert [mid for mid, _ in recommender.recommend_for_profile({1: 1.0}, n=5, exclude=mask)] == [4]
+    assert [mid for mid, _ in recommender.get_similar_by_ids([3], n=2, exclude=mask)[3]] == [4, 1]
+
+
+def test_similarity_submatrix_slices_artifact(mock_data_files):
+    recommender = MovieRecommender(data_dir=str(mock_data_files))
+
+    ids, matrix = recommender.similarity_submatrix([4, 1, 999, 4, 3])
+
+    similarity = np.load(mock_data_files / "similarity_matrix.npy")
+    assert ids == [4, 1, 3]
+    assert matrix.dtype == np.float32
+    assert matrix == pytest.approx(similarity[np.ix_([3, 0, 2], [3, 0, 2])])
+
+
+def test_similarity_submatrix_from_features(ann_data_files):
+    recommender = MovieRecommender(data_dir=str(ann_data_files), engine="ann")
+
+    ids, matrix = recommender.similarity_submatrix([1, 4, 5])
+
+    features = np.load(ann_data_files / "combined_features.npy")[[0, 3, 4]]
+    assert ids == [1, 4, 5]
+    assert matrix == pytest.approx(features @ features.T)
+
+
+def test_top_n_orders_best_first():
+    scores = np.array([[0.1, 0.9, 0.5, -np.inf], [0.3, 0.2, 0.8, 0.4]])
+
+    indices, values = top_n(scores, 3)
+
+    assert indices.tolist() == [[1, 2, 0], [2, 3, 0]]
+    assert values[1].tolist() == [0.8, 0.4, 0.3]
+
+
+@pytest.fixture
+def ann_data_files(mock_data_files):
+    features = np.eye(5, 4, dtype=np.float32)
+    features[3] = features[0] * 0.9 + features[1] * 0.1
+    features[4] = features[2] * 0.2 + [0, 0, 0, 1]
+    features /= np.linalg.norm(features, axis=1, keepdims=True)
+    np.save(mock_data_files / "combined_features.npy", features)
+    IVFIndex.build(features, n_clusters=2).save(mock_data_files)
+    (mock_data_files / "similarity_matrix.npy").unlink()
+    return mock_data_files
+
+
+def test_unknown_engine_rejected(mock_data_files):
+    with pytest.raises(ValueError, match="Unknown recommender engine"):
+        MovieRecommender(data_dir=str(mock_data_files), engine="magic")
+
+
+def test_ann_engine_does_not_need_similarity_matrix(ann_data_files):
+    recommender = MovieRecommender(data_dir=str(ann_data_files), engine="ann", ann_probes=2)
+
+    similar = recommender.get_similar_by_id(1, n=2)
+
+    assert recommender.similarity_matrix is None
+    assert similar[0][0] == 4
+    assert 1 not in [mid for mid, _ in similar]
+
+
+def test_ann_engine_fills_filtered_results_by_exact_scan(ann_data_files):
+    recommender = MovieRecommender(data_dir=str(ann_data_files), engine="ann", ann_probes=1)
+    mask = recommender.exclusion_mask([4, 2])
+
+    similar = recommender.get_similar_by_ids([1], n=2, exclude=mask)[1]
+
+    assert sorted(mid for mid, _ in similar) == [3, 5]
+
+
+def test_ann_engine_requires_index(ann_data_files):
+    (ann_data_files / "ann_centroids.npy").unlink()
+
+    with pytest.raises(FileNotFoundError, match="ann_centroids"):
+        MovieRecommender(data_dir=str(ann_data_files), engine="ann")
+
+
+def test_unknown_feature_set_rejected(mock_data_files):
+    with pytest.raises(ValueError, match="Unknown feature set"):
+        MovieRecommender(data_dir=str(mock_data_files), feature_set="tiny")
+
+
+def test_reduced_feature_set_loads_reduced_features(mock_data_files):
+    np.save(mock_data_files / "reduced_features.npy", np.eye(5, 2, dtype=np.float32))
+
+    recommender = MovieRecommender(data_dir=str(mock_data_files), feature_set="reduced")
+
+    assert recommender.features.shape == (5, 2)
+
+
+def test_int8_engine_matches_exact_ranking(ann_data_files):
+    features = np.load(ann_data_files / "combined_features.npy")
+    codes, scales = quantize(features)
+    np.save(ann_data_files / "quantized_codes.npy", codes)
+    np.save(ann_data_files / "quantized_scales.npy", scales)
+
+    recommender = MovieRecommender(data_dir=str(ann_data_files), engine="int8")
+
+    similar = recommender.get_similar_by_id(1, n=2)
+    assert recommender.quantized_codes.dtype == np.int8
+    assert similar[0][0] == 4
+    assert similar[0][1] == pytest.approx(float(features[0] @ features[3]), abs=0.02)
+
+
+def test_int8_engine_scores_profiles_without_float_features(ann_data_files):
+    features = np.load(ann_data_files / "combined_features.npy")
+    codes, scales = quantize(features)
+    np.save(ann_data_files / "quantized_codes.npy", codes)
+    np.save(ann_data_files / "quantized_scales.npy", scales)
+
+    recommender = MovieRecommender(data_dir=str(ann_data_files), engine="int8")
+    ranked = recommender.recommend_for_profile({1: 1.0, 3: 0.5}, n=3)
+
+    assert recommender.features is None
+    expected = (features[0] + 0.5 * features[2]) / 1.5 @ features.T
+    assert dict(ranked) == pytest.approx({mid: float(expected[mid - 1]) for mid in (2, 4, 5)}, abs=0.02)
+
+
+def test_recommender_records_artifact_version(mock_data_files):
+    recommender = MovieRecommender(data_dir=str(mock_data_files))
+
+    assert len(recommender.version) == 12
+    recommender.validate()
+
+
+def test_validate_rejects_artifacts_without_movies(mock_data_files):
+    recommender = MovieRecommender(data_dir=str(mock_data_files))
+    recommender.movie_ids = np.full_like(recommender.movie_ids, -1)
+
+    with pytest.raises(ValueError, match="do not contain any movies"):
+        recommender.validate()
+
+
+@pytest.fixture
+def block_data_files(mock_data_files):
+    rng = np.random.default_rng(3)
+    for name, dims in (("genre_features.npy", 3), ("genome_features.npy", 6)):
+        block = rng.random((5, dims)).astype(np.float32)
+        np.save(mock_data_files / name, block / np.linalg.norm(block, axis=1, keepdims=True))
+    return mock_data_files
+
+
+def test_genre_weight_blends_block_similarities(block_data_files):
+    recommender = MovieRecommender(data_dir=str(block_data_files))
+    genre = np.load(block_data_files / "genre_features.npy")
+    genome = np.load(block_data_files / "genome_features.npy")
+
+    recs = recommender.get_similar_by_id(1, n=4, genre_weight=0.25)
+
+    expected = 0.25 * (genre @ genre[0]) + 0.75 * (genome @ genome[0])
+    expected_ids = [int(i) + 1 for i in np.argsort(-expected) if i != 0]
+    assert [mid for mid, _ in recs] == expected_ids
+    assert recs[0][1] == pytest.approx(expected[expected_ids[0] - 1], rel=1e-5)
+
+
+def test_genre_weight_extremes_rank_by_one_block(block_data_files):
+    recommender = MovieRecommender(data_dir=str(block_data_files))
+    genre = np.load(block_data_files / "genre_features.npy")
+
+    recs = recommender.get_similar_by_id(1, n=4, genre_weight=1.0)
+
+    assert [score for _, score in recs] == pytest.approx(sorted((genre @ genre[0])[1:], reverse=True), rel=1e-5)
+
+
+def test_genre_weight_requires_blocks(mock_data_files):
+    recommender = MovieRecommender(data_dir=str(mock_data_files))
+
+    with pytest.raises(ValueError, match="Reweighting requires"):
+        recommender.get_similar_by_ids([1], genre_weight=0.5)
+
+
+def test_genre_weight_must_be_in_range(block_data_files):
+    recommender = MovieRecommender(data_dir=str(block_data_files))
+
+    with pytest.raises(ValueError, match="between 0 and 1"):
+        recommender.get_similar_by_ids([1], genre_weight=1.5)
+
+
+def test_recommend_for_profile_sums_similarity_rows(mock_data_files):
+    recommender = MovieRecommender(data_dir=str(mock_data_files))
+
+    recs = recommender.recommend_for_profile({1: 1.0, 2: 0.5}, n=3)
+
+    # Weighted mean of rows 0 and 1 of the similarity matrix, seeds excluded
+    assert [mid for mid, _ in recs] == [4, 5, 3]
+    assert recs[0][1] == pytest.approx((0.9 + 0.5 * 0.6) / 1.5)
+
+
+def test_recommend_for_profile_uses_features_when_loaded(block_data_files):
+    features = np.load(block_data_files / "genome_features.npy")
+    np.save(block_data_files / "combined_features.npy", features)
+    recommender = MovieRecommender(data_dir=str(block_data_files))
+
+    recs = recommender.recommend_for_profile({1: 0.8, 3: 0.4}, n=5, exclude=[5])
+
+    expected = (0.8 * features @ features[0] + 0.4 * features @ features[2]) / 1.2
+    assert [mid for mid, _ in recs] == [int(i) + 1 for i in np.argsort(-expected) if i not in (0, 2, 4)]
+    assert dict(recs)[2] == pytest.approx(expected[1], rel=1e-5)
+
+
+def test_recommend_for_profile_ignores_unknown_seeds(mock_data_files):
+    recommender = MovieRecommender(data_dir=str(mock_data_files))
+
+    assert recommender.recommend_for_profile({999: 1.0}) == []
+
+
+def test_recommend_for_profile_blends_collaborative_scores(mock_data_files):
+    np.save(mock_data_files / "cf_neighbor_idx.npy", np.array([[2, -1]] + [[-1, -1]] * 4, dtype=np.int32))
+    np.save(mock_data_files / "cf_neighbor_sim.npy", np.array([[1.0, 0.0]] + [[0.0, 0.0]] * 4, dtype=np.float32))
+    recommender = MovieRecommender(data_dir=str(mock_data_files))
+
+    content_only = recommender.recommend_for_profile({1: 1.0}, n=1)
+    blended = recommender.recommend_for_profile({1: 1.0}, n=1, cf_weight=0.5)
+
+    assert recommender.has_collaborative
+    assert content_only == [(4, pytest.approx(0.9))]
+    # Movie 3: 0.5 * 0.3 content + 0.5 * 1.0 CF beats movie 4: 0.5 * 0.9
+    assert blended == [(3, pytest.approx(0.65))]
+
+
+def test_cf_weight_requires_neighbors(mock_data_files):
+    recommender = MovieRecommender(data_dir=str(mock_data_files))
+
+    assert not recommender.has_collaborative
+    with pytest.raises(ValueError, match="CF blending requires"):
+        recommender.recommend_for_profile({1: 1.0}, cf_weight=0.5)
+
+
+def test_recommend_for_user_scores_with_als_factors(mock_data_files):
+    model = ImplicitALS(factors=2)
+    model.user_factors = np.array([[1.0, 0.0]], dtype=np.float32)
+    model.item_factors = np.array([[0.9, 0], [0.1, 0], [0.5, 0], [0.8, 0], [0.2, 1]], dtype=np.float32)
+    model.user_ids = ["alice"]
+    model.trained_at = datetime.now(UTC)
+    model.save(mock_data_files)
+    recommender = MovieRecommender(data_dir=str(mock_data_files))
+
+    recs = recommender.recommend_for_user("alice", {1: 5.0}, n=2)
+
+    assert recommender.has_als
+    assert recs == [(4, pytest.approx(0.8)), (3, pytest.approx(0.5))]
+
+
+def test_recommend_for_user_requires_als(mock_data_files):
+    recommender = MovieRecommender(data_dir=str(mock_data_files))
+
+    assert not recommender.has_als
+    with pytest.raises(ValueError, match="train_als"):
+        recommender.recommend_for_user("alice", {1: 5.0})
+
+
+def test_recommend_for_profiles_matches_single_profiles(block_data_files):
+    features = np.load(block_data_files / "genome_features.npy")
+    np.save(block_data_files / "combined_features.npy", features)
+    recommender = MovieRecommender(data_dir=str(block_data_files))
+    profiles = [{1: 0.8, 3: 0.4}, {999: 1.0}, {2: 1.0}]
+    excludes = [[5], None, [4]]
+
+    batched = recommender.recommend_for_profiles(profiles, n=3, excludes=excludes)
+
+    assert batched[1] == []
+    for profile, exclude, recs in zip(profiles, excludes, batched, strict=True):
+        expected = recommender.recommend_for_profile(profile, n=3, exclude=exclude)
+        assert [mid for mid, _ in recs] == [mid for mid, _ in expected]
+        assert [score for _, score in recs] == pytest.approx([score for _, score in expected], rel=1e-5)
+
+
+def test_rank_profiles_returns_arrays(mock_data_files):
+    recommender = MovieRecommender(data_dir=str(mock_data_files))
+    profiles = [{1: 1.0}, {999: 1.0}]
+
+    ranked = recommender.rank_profiles(profiles, n=3, excludes=[[2], None])
+
+    movie_ids, scores = ranked[0]
+    expected = recommender.recommend_for_profile({1: 1.0}, n=3, exclude=[2])
+    assert movie_ids.tolist() == [mid for mid, _ in expected]
+    assert scores.tolist() == [score for _, score in expected]
+    assert len(ranked[1][0]) == len(ranked[1][1]) == 0
+
+
+def test_seed_scores_are_unnormalized_profile_scores(mock_data_files):
+    recommender = MovieRecommender(data_dir=str(mock_data_files))
+
+    scores = recommender.seed_scores({1: 1.0, 2: 0.5, 999: 1.0})
+    removed = scores + recommender.seed_scores({2: -0.5})
+
+    similarity = np.load(mock_data_files / "similarity_matrix.npy")
+    assert scores == pytest.approx(similarity[0] + 0.5 * similarity[1])
+    assert removed == pytest.approx(similarity[0])
+    assert recommender.top_movies(scores / 1.5, 2, exclude=[1, 2]) == recommender.recommend_for_profile(
+        {1: 1.0, 2: 0.5}, n=2
+    )
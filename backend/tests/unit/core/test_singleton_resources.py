@@ -6,6 +6,7 @@ from unittest.mock import Mock, patch
 import pytest
 
 from app.core.resources import SingletonResources
+from app.ml.batcher import BatchingRecommender
 
 
 @pytest.fixture(autouse=True)
@@ -138,3 +139,114 @@ def test_recommender_lazy_initialization():
         mock_recommender_class.assert_not_called()
         _ = resources.recommender
         mock_recommender_class.assert_called_once()
+
+
+@pytest.fixture
+def patched_repositories():
+    with (
+        patch("app.core.resources.UsersRepository"),
+        patch("app.core.resources.MoviesRepository"),
+        patch("app.core.resources.RatingsRepository"),
+        patch("app.core.resources.WatchlistRepository"),
+        patch("app.core.resources.RecommendationsRepository"),
+        patch("app.core.resources.PenaltiesRepository"),
+        patch("app.core.resources.PasswordHasher"),
+    ):
+        yield
+
+
+def test_reload_swaps_in_validated_recommender(patched_repositories):
+    old, new = Mock(version="v1"), Mock(version="v2")
+    with patch("app.core.resources.MovieRecommender", side_effect=[old, new]):
+        resources = SingletonResources()
+        assert resources.recommender_version == "v1"
+
+        assert resources.reload_recommender(wait=True)
+
+    new.validate.assert_called_once()
+    assert resources.recommender is new
+    assert resources.recommender_status()["last_error"] is None
+
+
+def test_failed_reload_keeps_current_recommender(patched_repositories):
+    old, broken = Mock(version="v1"), Mock(version="v2")
+    broken.validate.side_effect = ValueError("Recommender artifacts do not contain any movies.")
+    with patch("app.core.resources.MovieRecommender", side_effect=[old, broken]):
+        resources = SingletonResources()
+        _ = resources.recommender
+
+        resources.reload_recommender(wait=True)
+
+    assert resources.recommender is old
+    assert "do not contain any movies" in resources.recommender_status()["last_error"]
+
+
+def test_reload_rejected_while_in_progress(patched_repositories):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_load(**_kwargs):
+        started.set()
+        release.wait()
+        return Mock(version="v2")
+
+    with patch("app.core.resources.MovieRecommender", side_effect=slow_load):
+        resources = SingletonResources()
+        assert resources.reload_recommender()
+        started.wait()
+
+        assert not resources.reload_recommender()
+        assert resources.recommender_status()["reloading"]
+
+        release.set()
+        resources.cleanup()
+
+    assert resources.recommender.version == "v2"
+
+
+def test_batch_window_wraps_recommender_and_reload_closes_it(patched_repositories):
+    old, new = Mock(version="v1"), Mock(version="v2")
+    with (
+        patch("app.core.resources.MovieRecommender", side_effect=[old, new]),
+        patch("app.core.resources.settings.RECOMMENDER_BATCH_WINDOW_MS", 2.0),
+    ):
+        resources = SingletonResources()
+        batching = resources.recommender
+        assert isinstance(batching, BatchingRecommender)
+        assert batching.recommender is old
+        assert resources.recommender_version == "v1"
+
+        resources.reload_recommender(wait=True)
+
+    assert resources.recommender.recommender is new
+    assert batching._batcher._closed
+    resources.cleanup()
+    assert resources.recommender._batcher._closed
+
+
+def test_rating_events_invalidate_user_caches_and_stats(patched_repositories):
+    with patch("app.core.resources.UserInsightsRepository"):
+        resources = SingletonResources()
+    resources.ratings_repo = Mock(get_all=Mock(return_value=[{"movie_id": 1, "rating": 4.0}]))
+    assert resources.rating_stats.average(1) == 4.0
+
+    resources.event_bus.publish("rating_created", {"user_id": "u1", "movie_id": 1, "rating": 2.0})
+    resources.event_bus.publish("watchlist_removed", {"user_id": "u2", "movie_id": 5})
+
+    assert resources.rating_stats.average(1) == 3.0
+    # Watchlist changes only affect insights; the watchlist filter is applied to recommendations per request
+    assert [c.args for c in resources.recommendations_repo.mark_stale.call_args_list] == [("u1",)]
+    assert [c.args for c in resources.user_insights_repo.clear_for_user.call_args_list] == [("u1",), ("u2",)]
+
+
+def test_penalty_events_drop_cached_active_penalties(patched_repositories):
+    with patch("app.core.resources.UserInsightsRepository"):
+        resources = SingletonResources()
+    resources.penalties_repo = Mock(get_active_by_user=Mock(return_value=[]))
+    assert resources.active_penalties.get("u1") == []
+    assert resources.active_penalties.get("u1") == []
+    resources.penalties_repo.get_active_by_user.assert_called_once_with("u1")
+
+    resources.penalties_repo.get_active_by_user.return_value = [{"id": "p1", "reason": "spam"}]
+    resources.event_bus.publish("penalty_changed", {"id": "p1", "user_id": "u1"})
+
+    assert resources.active_penalties.get("u1") == [{"id": "p1", "reason": "spam"}]
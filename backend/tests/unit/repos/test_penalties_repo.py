@@ -227,3 +227,19 @@ def test_penalty_persistence(tmp_path):
     fetched = repo2.get_by_id(created["id"])
 
     assert fetched == created
+
+
+def test_changes_are_published(tmp_path, mocker):
+    bus = mocker.Mock()
+    repo = PenaltiesRepository(penalties_file=tmp_path / "penalties.json", event_bus=bus)
+
+    penalty = repo.create({"user_id": "u1", "reason": "spam", "issued_by": "admin"})
+    repo.update(penalty["id"], {"description": "Repeated spam"})
+    repo.resolve(penalty["id"])
+    repo.delete(penalty["id"])
+
+    assert [c.args[0] for c in bus.publish.call_args_list] == ["penalty_changed"] * 4
+    assert bus.publish.call_args_list[2].args[1]["status"] == "resolved"
+
+    repo.save_data([])
+    assert bus.publish.call_args.args == ("penalty_changed", {})
@@ -86,6 +86,45 @@ def test_update(repo):
     assert updated["user_id"] == "u1"
 
 
+def test_user_version_changes_with_ratings(repo):
+    assert repo.get_user_version("u1") == "0:"
+    created = repo.create({"user_id": "u1", "movie_id": 1, "rating": 4.0})
+    after_create = repo.get_user_version("u1")
+
+    repo.create({"user_id": "u2", "movie_id": 1, "rating": 2.0})
+    assert repo.get_user_version("u1") == after_create
+
+    repo.update(created["id"], {"rating": 5.0})
+    after_update = repo.get_user_version("u1")
+    assert after_update != after_create
+
+    repo.delete(created["id"])
+    assert repo.get_user_version("u1") == "0:"
+
+
+def test_user_version_lookups_do_not_reread_ratings(repo, mocker):
+    repo.create({"user_id": "u1", "movie_id": 1, "rating": 4.0})
+    repo.get_user_version("u1")
+    read = mocker.spy(repo, "_read")
+
+    for _ in range(3):
+        repo.get_user_version("u1")
+    created = repo.create({"user_id": "u1", "movie_id": 2, "rating": 3.0})
+
+    assert repo.get_user_version("u1") == f"2:{created['timestamp']}"
+    # Only create() itself reads the file (ratings and next ID)
+    assert read.call_count == 2
+
+
+def test_user_version_follows_writes_from_elsewhere(repo):
+    repo.create({"user_id": "u1", "movie_id": 1, "rating": 4.0})
+    assert repo.get_user_version("u1").startswith("1:")
+
+    RatingsRepository(ratings_file=str(repo.ratings_file)).create({"user_id": "u1", "movie_id": 2, "rating": 3.0})
+
+    assert repo.get_user_version("u1").startswith("2:")
+
+
 def test_update_returns_none(repo):
     assert repo.update(999, {"rating": 5.0}) is None
 
@@ -115,3 +154,28 @@ def test_id_increments(repo):
 
     assert r1["id"] == 1
     assert r2["id"] == 2
+
+
+def test_changes_are_published(tmp_path, mocker):
+    bus = mocker.Mock()
+    repo = RatingsRepository(ratings_file=tmp_path / "ratings.json", event_bus=bus)
+
+    created = repo.create({"user_id": "u1", "movie_id": 1, "rating": 3.0})
+    repo.update(created["id"], {"rating": 4.5})
+    repo.delete(created["id"])
+    repo.save_data([])
+
+    events = [c.args[0] for c in bus.publish.call_args_list]
+    assert events == ["rating_created", "rating_updated", "rating_deleted", "ratings_reset"]
+    updated_payload = bus.publish.call_args_list[1].args[1]
+    assert updated_payload["rating"] == 4.5
+    assert updated_payload["previous_rating"] == 3.0
+    assert bus.publish.call_args_list[2].args[1]["movie_id"] == 1
+
+
+def test_failed_delete_publishes_nothing(tmp_path, mocker):
+    bus = mocker.Mock()
+    repo = RatingsRepository(ratings_file=tmp_path / "ratings.json", event_bus=bus)
+
+    assert not repo.delete(999)
+    bus.publish.assert_not_called()
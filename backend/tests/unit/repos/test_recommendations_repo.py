@@ -1,136 +1,173 @@
 """Unit tests for recommendations repository."""
 
+import sqlite3
 from datetime import UTC, datetime, timedelta
 
 import pytest
 
-from app.repositories.recommendations_repo import RecommendationsRepository
+from app.repositories.recommendations_repo import RecommendationsRepository, is_fresh_entry
 
 
 @pytest.fixture
-def repo(mocker):
-    mock_path = mocker.MagicMock()
-    mock_path.exists.return_value = True
-    mock_path.parent.mkdir = mocker.Mock()
-    mock_path.write_text = mocker.Mock()
-    mocker.patch("app.repositories.recommendations_repo.Path", return_value=mock_path)
+def repo(tmp_path):
+    repo = RecommendationsRepository(recommendations_file=str(tmp_path / "recommendations.db"))
+    yield repo
+    repo.close()
 
-    repo = RecommendationsRepository()
 
-    mocker.patch.object(repo, "_read", return_value={})
-    mocker.patch.object(repo, "_write")
-    return repo
+def _set_timestamp(repo, user_id, timestamp):
+    repo._conn.execute("UPDATE recommendations SET timestamp = ? WHERE user_id = ?", (timestamp, user_id))
 
 
-def test_ensure_file_created_if_missing(mocker):
-    mock_path = mocker.MagicMock()
-    mock_path.exists.return_value = False
-    mock_path.parent.mkdir = mocker.Mock()
-    mock_path.write_text = mocker.Mock()
-    mocker.patch("app.repositories.recommendations_repo.Path", return_value=mock_path)
+def test_database_created_if_missing(tmp_path):
+    db_file = tmp_path / "nested" / "recommendations.db"
 
-    repo = RecommendationsRepository()
-    mock_path.write_text.assert_called_once_with("{}", encoding="utf-8")
-    mock_path.parent.mkdir.assert_called_once()
+    repo = RecommendationsRepository(recommendations_file=str(db_file))
+    repo.close()
 
+    assert db_file.exists()
 
-def test_save_for_user(repo):
+
+def test_save_and_get_for_user(repo):
     recs = [{"movie_id": 42, "similarity_score": 0.99}]
     repo.save_for_user("alice", recs)
 
-    written = repo._write.call_args[0][0]
-    assert "alice" in written
-    assert "timestamp" in written["alice"]
-    assert written["alice"]["recommendations"][0]["movie_id"] == 42
-
-
-def test_get_for_user(mocker):
-    repo = RecommendationsRepository()
-    mocker.patch.object(
-        repo,
-        "_read",
-        return_value={
-            "bob": {
-                "timestamp": datetime.now(UTC).isoformat(),
-                "recommendations": [{"movie_id": 7, "similarity_score": 0.8}],
-            },
-        },
-    )
-
-    result = repo.get_for_user("bob")
-    assert result is not None
-    assert result["recommendations"][0]["movie_id"] == 7
-
-
-def test_get_for_nonexistent_user(mocker):
-    repo = RecommendationsRepository()
-    mocker.patch.object(repo, "_read", return_value={})
+    cached = repo.get_for_user("alice")
+    assert cached["recommendations"] == recs
+    assert isinstance(datetime.fromisoformat(cached["timestamp"]), datetime)
+    assert cached["stale"] is False
+
+
+def test_save_for_user_records_versions(repo):
+    repo.save_for_user("alice", [], artifact_version="abc123", variant="a", ratings_version="2:t")
+
+    cached = repo.get_for_user("alice")
+    assert cached["artifact_version"] == "abc123"
+    assert cached["variant"] == "a"
+    assert cached["ratings_version"] == "2:t"
+
+
+def test_recommendations_stored_as_packed_arrays(repo):
+    recs = [{"movie_id": i, "similarity_score": 1 / (i + 1)} for i in range(1000)]
+    repo.save_for_user("alice", recs)
+
+    movie_ids, scores = repo._conn.execute(
+        "SELECT movie_ids, scores FROM recommendations WHERE user_id = ?", ("alice",)
+    ).fetchone()
+    assert len(movie_ids) + len(scores) == 12 * len(recs)
+    assert repo.get_for_user("alice")["recommendations"] == recs
+
+
+def test_get_for_nonexistent_user(repo):
     assert repo.get_for_user("ghost") is None
 
 
-def test_clear_for_user(mocker):
-    repo = RecommendationsRepository()
-    mocker.patch.object(repo, "_read", return_value={"u1": {}, "u2": {}})
-    mock_write = mocker.patch.object(repo, "_write")
+def test_overwrites_existing_user(repo):
+    repo.save_for_user("x", [{"movie_id": 9, "similarity_score": 0.1}])
+    recs = [
+        {"movie_id": 1, "similarity_score": 0.5},
+        {"movie_id": 2, "similarity_score": 0.4},
+    ]
+    repo.save_for_user("x", recs)
+
+    assert repo.get_for_user("x")["recommendations"] == recs
+
+
+def test_clear_for_user(repo):
+    repo.save_for_user("u1", [])
+    repo.save_for_user("u2", [])
 
     repo.clear_for_user("u1")
-    result = mock_write.call_args[0][0]
-    assert "u1" not in result
-    assert "u2" in result
+    repo.clear_for_user("ghost")
 
+    assert repo.get_for_user("u1") is None
+    assert repo.get_for_user("u2") is not None
 
-def test_is_fresh_true(mocker):
-    repo = RecommendationsRepository()
-    now = datetime.now(UTC)
-    mocker.patch.object(repo, "get_for_user", return_value={"timestamp": now.isoformat()})
+
+def test_is_fresh_true(repo):
+    repo.save_for_user("u", [])
     assert repo.is_fresh("u", max_age_hours=24)
 
 
-def test_is_fresh_false_for_old(mocker):
-    repo = RecommendationsRepository()
-    old = datetime.now(UTC) - timedelta(hours=25)
-    mocker.patch.object(repo, "get_for_user", return_value={"timestamp": old.isoformat()})
+def test_is_fresh_false_for_old(repo):
+    repo.save_for_user("u", [])
+    _set_timestamp(repo, "u", (datetime.now(UTC) - timedelta(hours=25)).isoformat())
     assert not repo.is_fresh("u", max_age_hours=24)
 
 
-def test_is_fresh_false_for_missing_user(mocker):
-    repo = RecommendationsRepository()
-    mocker.patch.object(repo, "get_for_user", return_value=None)
+def test_is_fresh_false_for_missing_user(repo):
     assert not repo.is_fresh("u")
 
 
-def test_is_fresh_false_for_invalid_timestamp(mocker):
-    repo = RecommendationsRepository()
-    mocker.patch.object(repo, "get_for_user", return_value={"timestamp": "nonsense"})
+def test_is_fresh_false_for_invalid_timestamp(repo):
+    repo.save_for_user("u", [])
+    _set_timestamp(repo, "u", "nonsense")
     assert not repo.is_fresh("u")
 
 
-def test_overwrites_existing_user(repo):
-    repo._read.return_value = {"x": {"recommendations": []}}
-    recs = [
-        {"movie_id": 1, "similarity_score": 0.5},
-        {"movie_id": 2, "similarity_score": 0.4},
-    ]
-    repo.save_for_user("x", recs)
+def test_mark_stale_makes_cache_not_fresh(repo):
+    repo.save_for_user("alice", [{"movie_id": 1, "similarity_score": 0.9}])
+    assert repo.is_fresh("alice")
+
+    repo.mark_stale("alice")
+    repo.mark_stale("bob")  # No cache: nothing to mark
+
+    assert not repo.is_fresh("alice")
+    assert repo.get_for_user("alice")["recommendations"] == [{"movie_id": 1, "similarity_score": 0.9}]
+    assert repo.get_for_user("alice")["stale"] is True
+    assert repo.get_for_user("bob") is None
+
+    repo.save_for_user("alice", [])
+    assert repo.is_fresh("alice")
+
+
+def test_save_data_replaces_everything(repo):
+    repo.save_for_user("old", [])
+
+    repo.save_data({"new": {"recommendations": [{"movie_id": 3, "similarity_score": 0.3}], "variant": "b"}})
+
+    assert repo.get_for_user("old") is None
+    cached = repo.get_for_user("new")
+    assert cached["recommendations"] == [{"movie_id": 3, "similarity_score": 0.3}]
+    assert cached["variant"] == "b"
+    assert repo.is_fresh("new")
+
+
+def test_persists_across_instances(tmp_path):
+    db_file = str(tmp_path / "recommendations.db")
+    first = RecommendationsRepository(recommendations_file=db_file)
+    first.save_for_user("alice", [{"movie_id": 7, "similarity_score": 0.8}])
+    first.close()
+
+    second = RecommendationsRepository(recommendations_file=db_file)
+    try:
+        assert second.get_for_user("alice")["recommendations"] == [{"movie_id": 7, "similarity_score": 0.8}]
+    finally:
+        second.close()
+
+
+def test_corrupted_database_raises_os_error(tmp_path):
+    db_file = tmp_path / "recommendations.db"
+    db_file.write_bytes(b"not a database" * 100)
 
-    written = repo._write.call_args[0][0]
-    assert len(written["x"]["recommendations"]) == 2
-    assert written["x"]["recommendations"][0]["movie_id"] == 1
+    with pytest.raises(OSError, match="Failed to open recommendations database"):
+        RecommendationsRepository(recommendations_file=str(db_file))
 
 
-def test_handles_corrupted_json(mocker):
-    repo = RecommendationsRepository()
-    mocker.patch.object(repo, "_read", side_effect=OSError("bad json"))
+def test_database_errors_are_raised_as_os_error(repo):
+    repo._conn.close()
 
-    with pytest.raises(OSError, match="bad json"):
+    with pytest.raises(OSError, match="Recommendations database error") as exc_info:
         repo.get_for_user("x")
+    assert isinstance(exc_info.value.__cause__, sqlite3.Error)
 
 
-def test_timestamp_format(repo):
-    recs = [{"movie_id": 99, "similarity_score": 0.7}]
-    repo.save_for_user("tim", recs)
+def test_is_fresh_entry_checks_the_row_already_read(repo):
+    repo.save_for_user("alice", [{"movie_id": 1, "similarity_score": 0.5}])
+    cached = repo.get_for_user("alice")
+    assert is_fresh_entry(cached)
 
-    saved = repo._write.call_args[0][0]
-    ts = saved["tim"]["timestamp"]
-    parsed = datetime.fromisoformat(ts)
-    assert isinstance(parsed, datetime)
+    repo.mark_stale("alice")
+    assert not is_fresh_entry(repo.get_for_user("alice"))
+    assert not is_fresh_entry({**cached, "timestamp": "2000-01-01T00:00:00+00:00"})
+    assert not is_fresh_entry({**cached, "timestamp": "not a date"})
@@ -201,3 +201,17 @@ def test_exists_after_remove(mock_repo):
 
     repo.remove("user1", 1)
     assert repo.exists("user1", 1) is False
+
+
+def test_changes_are_published(mock_repo, mocker):
+    repo, _ = mock_repo
+    repo.event_bus = mocker.Mock()
+
+    repo.add("user1", 10)
+    repo.add("user1", 10)  # Already present: no event
+    repo.remove("user1", 10)
+    repo.remove("user1", 10)  # Already removed: no event
+
+    calls = repo.event_bus.publish.call_args_list
+    assert [c.args[0] for c in calls] == ["watchlist_added", "watchlist_removed"]
+    assert calls[1].args[1] == {"user_id": "user1", "movie_id": 10}
@@ -0,0 +1,98 @@
+"""Unit tests for batch recommendations."""
+
+import json
+from pathlib import Path
+from unittest.mock import Mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml.recommender import MovieRecommender
+from app.schemas.recommendation import RecommendationItem
+from app.services import batch_service
+
+
+@pytest.fixture
+def recommender(tmp_path):
+    rng = np.random.default_rng(5)
+    movie_ids = list(range(1, 31))
+    pd.DataFrame({"movie_id": movie_ids, "title": [f"Movie {i}" for i in movie_ids], "genres": ["Drama"] * 30}).to_csv(
+        tmp_path / "movies_clean.csv", index=False
+    )
+
+    features = rng.random((30, 8)).astype(np.float32)
+    features /= np.linalg.norm(features, axis=1, keepdims=True)
+    np.save(tmp_path / "combined_features.npy", features)
+    np.save(tmp_path / "similarity_matrix.npy", features @ features.T)
+    with Path.open(tmp_path / "movie_id_to_idx.json", "w") as f:
+        json.dump({mid: i for i, mid in enumerate(movie_ids)}, f)
+
+    return MovieRecommender(data_dir=str(tmp_path))
+
+
+@pytest.fixture
+def mock_resources(mocker, recommender):
+    mocker.patch.object(batch_service.settings, "RECOMMENDER_WEIGHT_VARIANTS", {})
+    resources = Mock()
+    resources.recommender = recommender
+    resources.users_repo.get_all.return_value = [{"id": "u1"}, {"id": "u2"}, {"id": "new"}]
+    resources.ratings_repo.get_all.return_value = [
+        {"user_id": "u1", "movie_id": 1, "rating": 5.0, "timestamp": "2025-01-01T00:00:00+00:00"},
+        {"user_id": "u1", "movie_id": 2, "rating": 2.0, "timestamp": "2025-01-02T00:00:00+00:00"},
+        {"user_id": "u2", "movie_id": 3, "rating": 4.5, "timestamp": "2025-01-01T00:00:00+00:00"},
+        {"user_id": "other", "movie_id": 4, "rating": 5.0, "timestamp": "2025-01-01T00:00:00+00:00"},
+    ]
+    return resources
+
+
+def read_lines(chunks):
+    return [json.loads(line) for line in "".join(chunks).splitlines()]
+
+
+def test_build_jobs_groups_ratings_by_user(mock_resources):
+    jobs, versions = batch_service.build_jobs(mock_resources.ratings_repo.get_all(), ["u1"])
+
+    assert [job["user_id"] for job in jobs] == ["u1"]
+    assert jobs[0]["seed_weights"] == {1: 1.0}
+    assert jobs[0]["rated"] == {1, 2}
+    assert versions == {"u1": "2:2025-01-02T00:00:00+00:00"}
+
+
+def test_stream_matches_single_user_recommendations(mock_resources, recommender):
+    lines = read_lines(batch_service.stream_recommendations(mock_resources, ["u2", "u1"], limit=5))
+
+    assert [line["user_id"] for line in lines] == ["u2", "u1"]
+    expected = recommender.recommend_for_profile({1: 1.0}, n=5, exclude={1, 2})
+    assert [r["movie_id"] for r in lines[1]["recommendations"]] == [mid for mid, _ in expected]
+    assert [r["similarity_score"] for r in lines[1]["recommendations"]] == [round(s, 4) for _, s in expected]
+
+
+def test_stream_reads_ratings_once_and_drops_duplicates(mock_resources):
+    lines = read_lines(batch_service.stream_recommendations(mock_resources, ["u1", "u1", "u2"]))
+
+    assert [line["user_id"] for line in lines] == ["u1", "u2"]
+    mock_resources.ratings_repo.get_all.assert_called_once()
+    mock_resources.ratings_repo.get_by_user.assert_not_called()
+
+
+def test_stream_reports_unknown_users_and_falls_back_for_new_users(mocker, mock_resources):
+    fallback = mocker.patch(
+        "app.services.batch_service.get_fallback_recommendations",
+        return_value=[RecommendationItem(movie_id=9, similarity_score=0.5)],
+    )
+
+    lines = read_lines(batch_service.stream_recommendations(mock_resources, ["ghost", "new", "u1"], limit=3))
+
+    assert lines[0] == {"user_id": "ghost", "error": "User not found"}
+    assert lines[1]["recommendations"] == [{"movie_id": 9, "similarity_score": 0.5}]
+    assert len(lines[2]["recommendations"]) == 3
+    fallback.assert_called_once_with(mock_resources, 3)
+
+
+def test_stream_yields_one_chunk_at_a_time(mocker, mock_resources):
+    mocker.patch.object(batch_service, "SCORING_CHUNK", 1)
+
+    chunks = list(batch_service.stream_recommendations(mock_resources, ["u1", "u2"]))
+
+    assert len(chunks) == 2
@@ -2,6 +2,8 @@
 
 from unittest.mock import Mock
 
+from app.core.events import RATING_CREATED
+from app.core.genre_stats import GenreStats
 from app.services.global_insights_service import (
     _calculate_popularity_score,
     get_global_genre_leaderboard,
@@ -34,25 +36,25 @@ def test_calculate_popularity_score_data_retrieval():
     assert 63 <= score2 <= 65
 
 
-def test_get_global_genre_leaderboard_general():
-    """Test general case with multiple users and genres."""
+def make_resources(user_ids, ratings, movie_genres):
     resources = Mock()
-    resources.users_repo.get_all.return_value = [{"id": "user1"}, {"id": "user2"}]
-
-    def get_ratings(user_id):
-        if user_id == "user1":
-            return [{"movie_id": 1, "rating": 5.0}, {"movie_id": 2, "rating": 4.0}]
-        if user_id == "user2":
-            return [{"movie_id": 1, "rating": 4.5}, {"movie_id": 3, "rating": 3.0}]
-        return []
+    resources.users_repo.get_all.return_value = [{"id": user_id} for user_id in user_ids]
+    resources.genre_stats = GenreStats(lambda: ratings, lambda: movie_genres)
+    return resources
 
-    resources.ratings_repo.get_by_user.side_effect = get_ratings
 
-    def get_movie(movie_id):
-        movies = {1: {"genres": ["Action", "Sci-Fi"]}, 2: {"genres": ["Action"]}, 3: {"genres": ["Drama"]}}
-        return movies.get(movie_id)
-
-    resources.movies_repo.get_by_id.side_effect = get_movie
+def test_get_global_genre_leaderboard_general():
+    """Test general case with multiple users and genres."""
+    resources = make_resources(
+        ["user1", "user2"],
+        [
+            {"user_id": "user1", "movie_id": 1, "rating": 5.0},
+            {"user_id": "user1", "movie_id": 2, "rating": 4.0},
+            {"user_id": "user2", "movie_id": 1, "rating": 4.5},
+            {"user_id": "user2", "movie_id": 3, "rating": 3.0},
+        ],
+        {1: ["Action", "Sci-Fi"], 2: ["Action"], 3: ["Drama"]},
+    )
 
     result = get_global_genre_leaderboard(resources)
 
@@ -66,8 +68,7 @@ def test_get_global_genre_leaderboard_general():
 
 def test_get_global_genre_leaderboard_no_users():
     """Test edge case with no users."""
-    resources = Mock()
-    resources.users_repo.get_all.return_value = []
+    resources = make_resources([], [], {})
 
     result = get_global_genre_leaderboard(resources)
 
@@ -78,24 +79,15 @@ def test_get_global_genre_leaderboard_no_users():
 
 def test_get_global_genre_leaderboard_missing_movie_data():
     """Test edge case with missing or invalid movie data."""
-    resources = Mock()
-    resources.users_repo.get_all.return_value = [{"id": "user1"}]
-    resources.ratings_repo.get_by_user.return_value = [
-        {"movie_id": 1, "rating": 5.0},
-        {"movie_id": 2, "rating": 4.0},
-        {"movie_id": 3, "rating": 3.0},
-    ]
-
-    def get_movie(movie_id):
-        if movie_id == 1:
-            return None
-        if movie_id == 2:
-            return {"genres": []}
-        if movie_id == 3:
-            return {"genres": ["Action", "", None]}
-        return None
-
-    resources.movies_repo.get_by_id.side_effect = get_movie
+    resources = make_resources(
+        ["user1"],
+        [
+            {"user_id": "user1", "movie_id": 1, "rating": 5.0},
+            {"user_id": "user1", "movie_id": 2, "rating": 4.0},
+            {"user_id": "user1", "movie_id": 3, "rating": 3.0},
+        ],
+        {2: [], 3: ["Action", "", None]},
+    )
 
     result = get_global_genre_leaderboard(resources)
 
@@ -106,31 +98,22 @@ def test_get_global_genre_leaderboard_missing_movie_data():
 
 
 def test_get_global_genre_leaderboard_data_retrieval():
-    """Test that leaderboard correctly retrieves and processes all data."""
-    resources = Mock()
-    resources.users_repo.get_all.return_value = [{"id": "user1"}, {"id": "user2"}, {"id": "user3"}]
-
-    def get_ratings(user_id):
-        if user_id == "user1":
-            return [{"movie_id": 1, "rating": 5.0}, {"movie_id": 2, "rating": 4.0}]
-        if user_id == "user2":
-            return [{"movie_id": 1, "rating": 4.5}]
-        if user_id == "user3":
-            return [{"movie_id": 3, "rating": 3.0}]
-        return []
-
-    resources.ratings_repo.get_by_user.side_effect = get_ratings
-
-    def get_movie(movie_id):
-        movies = {1: {"genres": ["Action"]}, 2: {"genres": ["Comedy"]}, 3: {"genres": ["Drama"]}}
-        return movies.get(movie_id)
-
-    resources.movies_repo.get_by_id.side_effect = get_movie
+    """Test that leaderboard correctly aggregates all users' ratings, skipping users that no longer exist."""
+    resources = make_resources(
+        ["user1", "user2", "user3"],
+        [
+            {"user_id": "user1", "movie_id": 1, "rating": 5.0},
+            {"user_id": "user1", "movie_id": 2, "rating": 4.0},
+            {"user_id": "user2", "movie_id": 1, "rating": 4.5},
+            {"user_id": "user3", "movie_id": 3, "rating": 3.0},
+            {"user_id": "deleted", "movie_id": 1, "rating": 1.0},
+        ],
+        {1: ["Action"], 2: ["Comedy"], 3: ["Drama"]},
+    )
 
     result = get_global_genre_leaderboard(resources)
 
     assert resources.users_repo.get_all.call_count == 1
-    assert resources.ratings_repo.get_by_user.call_count == 3
     assert result.total_users == 3
     assert result.total_ratings == 4
 
@@ -138,3 +121,19 @@ def test_get_global_genre_leaderboard_data_retrieval():
     assert action_genre.total_ratings == 2
     assert action_genre.user_count == 2
     assert action_genre.average_rating == 4.75
+
+
+def test_get_global_genre_leaderboard_is_cached_until_ratings_change():
+    """Test that the leaderboard is served from the cache until a rating event."""
+    resources = make_resources(
+        ["user1", "user2"], [{"user_id": "user1", "movie_id": 1, "rating": 5.0}], {1: ["Action"], 2: ["Drama"]}
+    )
+
+    first = get_global_genre_leaderboard(resources)
+    assert get_global_genre_leaderboard(resources) is first
+
+    resources.genre_stats.handle(RATING_CREATED, {"user_id": "user2", "movie_id": 2, "rating": 4.0})
+    result = get_global_genre_leaderboard(resources)
+
+    assert result.total_ratings == 2
+    assert {g.genre for g in result.genres} == {"Action", "Drama"}
@@ -42,7 +42,7 @@ def sample_movies():
 def test_get_movies_with_pagination(mock_resources, sample_movies):
     mock_resources.movies_repo.get_movies.return_value = (sample_movies, 3)
     mock_resources.movies_repo.movies_df = pd.DataFrame(sample_movies)
-    mock_resources.movies_repo.get_average_rating.return_value = 4.5
+    mock_resources.rating_stats.average.return_value = 4.5
 
     result = movies_service.get_movies(mock_resources, page=1, page_size=30)
 
@@ -57,7 +57,7 @@ def test_get_movies_with_pagination(mock_resources, sample_movies):
 def test_get_movies_calculates_total_pages(mock_resources, sample_movies):
     mock_resources.movies_repo.get_movies.return_value = (sample_movies[:2], 30)
     mock_resources.movies_repo.movies_df = pd.DataFrame(sample_movies * 10)  # 30 movies
-    mock_resources.movies_repo.get_average_rating.return_value = 4.0
+    mock_resources.rating_stats.average.return_value = 4.0
 
     result = movies_service.get_movies(mock_resources, page=1, page_size=10)
 
@@ -72,7 +72,7 @@ def test_get_movies_adds_average_ratings(mock_resources, sample_movies):
     def mock_get_rating(movie_id):
         return 4.5 if movie_id == 1 else 3.0
 
-    mock_resources.movies_repo.get_average_rating.side_effect = mock_get_rating
+    mock_resources.rating_stats.average.side_effect = mock_get_rating
 
     result = movies_service.get_movies(mock_resources, page=1, page_size=30)
 
@@ -87,7 +87,7 @@ def test_get_movie_by_id_success(mock_resources):
         "genres": ["Animation", "Children", "Comedy"],
     }
     mock_resources.movies_repo.get_by_id.return_value = movie_data
-    mock_resources.movies_repo.get_average_rating.return_value = 4.5
+    mock_resources.rating_stats.average.return_value = 4.5
 
     result = movies_service.get_movie_by_id(mock_resources, 1)
 
@@ -114,7 +114,7 @@ def test_get_movie_by_id_invalid_id(mock_resources):
 
 def test_get_movies_with_query(mock_resources, sample_movies):
     mock_resources.movies_repo.get_movies.return_value = ([sample_movies[0]], 1)
-    mock_resources.movies_repo.get_average_rating.return_value = 4.5
+    mock_resources.rating_stats.average.return_value = 4.5
 
     result = movies_service.get_movies(mock_resources, query="Toy Story", page_size=20)
 
@@ -126,7 +126,7 @@ def test_get_movies_with_query(mock_resources, sample_movies):
 def test_get_movies_with_genre(mock_resources, sample_movies):
     comedy_movies = [m for m in sample_movies if "Comedy" in m["genres"]]
     mock_resources.movies_repo.get_movies.return_value = (comedy_movies, 2)
-    mock_resources.movies_repo.get_average_rating.return_value = 4.0
+    mock_resources.rating_stats.average.return_value = 4.0
 
     result = movies_service.get_movies(mock_resources, genre="Comedy", page_size=20)
 
@@ -172,7 +172,7 @@ def test_get_movies_empty_result(mock_resources):
 def test_get_movies_with_different_page_sizes(mock_resources, sample_movies):
     mock_resources.movies_repo.get_movies.return_value = (sample_movies[:2], 60)
     mock_resources.movies_repo.movies_df = pd.DataFrame(sample_movies * 20)  # 60 movies
-    mock_resources.movies_repo.get_average_rating.return_value = 4.0
+    mock_resources.rating_stats.average.return_value = 4.0
 
     result = movies_service.get_movies(mock_resources, page=2, page_size=20)
 
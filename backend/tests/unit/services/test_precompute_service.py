@@ -0,0 +1,148 @@
+"""Unit tests for the batch recommendation precompute."""
+
+import json
+from pathlib import Path
+from unittest.mock import Mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml.recommender import MovieRecommender
+from app.repositories.recommendations_repo import RecommendationsRepository
+from app.services import precompute_service
+
+
+@pytest.fixture
+def ml_dir(tmp_path):
+    data_dir = tmp_path / "ml"
+    data_dir.mkdir()
+    rng = np.random.default_rng(3)
+    movie_ids = list(range(1, 31))
+    pd.DataFrame({"movie_id": movie_ids, "title": [f"Movie {i}" for i in movie_ids], "genres": ["Drama"] * 30}).to_csv(
+        data_dir / "movies_clean.csv", index=False
+    )
+
+    features = rng.random((30, 8)).astype(np.float32)
+    features /= np.linalg.norm(features, axis=1, keepdims=True)
+    np.save(data_dir / "combined_features.npy", features)
+    np.save(data_dir / "similarity_matrix.npy", features @ features.T)
+    with Path.open(data_dir / "movie_id_to_idx.json", "w") as f:
+        json.dump({mid: i for i, mid in enumerate(movie_ids)}, f)
+    return data_dir
+
+
+@pytest.fixture
+def recommendations_repo(tmp_path):
+    repo = RecommendationsRepository(recommendations_file=str(tmp_path / "recommendations.db"))
+    yield repo
+    repo.close()
+
+
+@pytest.fixture
+def ratings_repo():
+    ratings = [
+        {"user_id": f"u{user}", "movie_id": movie_id, "rating": rating, "timestamp": f"2025-01-0{user}T00:00:00+00:00"}
+        for user in range(1, 6)
+        for movie_id, rating in ((user, 5.0), (user + 10, 4.0), (user + 20, 1.0))
+    ]
+    repo = Mock()
+    repo.get_all.return_value = ratings
+    return repo
+
+
+@pytest.fixture(autouse=True)
+def precompute_settings(mocker, ml_dir):
+    mocker.patch.object(precompute_service.settings, "ML_DIR", ml_dir)
+    mocker.patch.object(precompute_service.settings, "RECOMMENDATIONS_CACHE_DEPTH", 10)
+    mocker.patch.object(precompute_service.settings, "RECOMMENDER_WEIGHT_VARIANTS", {})
+
+
+def expected_recommendations(ml_dir, user):
+    recommender = MovieRecommender(data_dir=str(ml_dir))
+    ranked = recommender.recommend_for_profile({user: 1.0, user + 10: 0.8}, n=10, exclude={user, user + 10, user + 20})
+    return [mid for mid, _ in ranked]
+
+
+def test_precompute_caches_every_user(ml_dir, ratings_repo, recommendations_repo):
+    summary = precompute_service.precompute_recommendations(
+        ratings_repo, recommendations_repo, workers=1, partition_size=2
+    )
+
+    assert summary["users"] == 5
+    assert [p["users"] for p in summary["partitions"]] == [2, 2, 1]
+    for user in range(1, 6):
+        cached = recommendations_repo.get_for_user(f"u{user}")
+        assert [r["movie_id"] for r in cached["recommendations"]] == expected_recommendations(ml_dir, user)
+        assert cached["artifact_version"] == MovieRecommender(data_dir=str(ml_dir)).version
+        assert cached["ratings_version"] == f"3:2025-01-0{user}T00:00:00+00:00"
+        assert recommendations_repo.is_fresh(f"u{user}")
+
+
+def test_precompute_in_process_pool_matches_in_process(ml_dir, ratings_repo, recommendations_repo):
+    precompute_service.precompute_recommendations(ratings_repo, recommendations_repo, workers=2, partition_size=2)
+
+    for user in range(1, 6):
+        cached = recommendations_repo.get_for_user(f"u{user}")
+        assert [r["movie_id"] for r in cached["recommendations"]] == expected_recommendations(ml_dir, user)
+
+
+def test_precompute_reports_progress(ratings_repo, recommendations_repo):
+    precompute_service.precompute_recommendations(ratings_repo, recommendations_repo, workers=1, partition_size=3)
+
+    status = precompute_service.get_precompute_status()
+    assert status["state"] == "finished"
+    assert status["users_done"] == status["users_total"] == 5
+    assert status["partitions_total"] == 2
+    assert {"partition", "users", "score_seconds", "write_seconds"} <= set(status["partitions"][0])
+    assert status["users_per_second"] > 0
+
+
+def test_precompute_records_failure(ratings_repo):
+    recommendations_repo = Mock()
+    recommendations_repo.save_many.side_effect = OSError("disk full")
+
+    with pytest.raises(OSError, match="disk full"):
+        precompute_service.precompute_recommendations(ratings_repo, recommendations_repo, workers=1)
+
+    status = precompute_service.get_precompute_status()
+    assert status["state"] == "failed"
+    assert status["error"] == "disk full"
+
+
+def test_precompute_rejects_invalid_partition_size(ratings_repo, recommendations_repo):
+    with pytest.raises(ValueError, match="must be positive"):
+        precompute_service.precompute_recommendations(ratings_repo, recommendations_repo, partition_size=-1)
+
+
+def test_start_precompute_runs_one_job_at_a_time():
+    resources = Mock()
+    resources.batch_jobs.submit.return_value = False
+
+    assert not precompute_service.start_precompute(resources)
+    assert resources.batch_jobs.submit.call_args.args[0] == precompute_service.PRECOMPUTE_JOB
+    # The stale-cache refresh workers stay free while a precompute runs
+    resources.background.submit.assert_not_called()
+
+
+def test_start_precompute_scores_with_serving_recommender(mocker):
+    resources = Mock()
+    precompute = mocker.patch.object(precompute_service, "precompute_recommendations")
+    resources.batch_jobs.submit.side_effect = lambda _key, func, *args: func(*args) or True
+
+    assert precompute_service.start_precompute(resources)
+    precompute.assert_called_once_with(
+        resources.ratings_repo, resources.recommendations_repo, workers=1, recommender=resources.recommender
+    )
+
+
+def test_precompute_skips_partitions_scored_with_other_artifacts(mocker, ratings_repo, recommendations_repo):
+    # The artifacts on disk when the job started differ from those the pool workers load
+    mocker.patch.object(precompute_service, "artifact_version", return_value="newer")
+
+    summary = precompute_service.precompute_recommendations(
+        ratings_repo, recommendations_repo, workers=2, partition_size=2
+    )
+
+    assert summary["users_skipped"] == 5
+    assert all(recommendations_repo.get_for_user(f"u{user}") is None for user in range(1, 6))
@@ -1,12 +1,26 @@
 """Unit tests for recommendations service."""
 
+import base64
+import threading
+from datetime import UTC, datetime
 from unittest.mock import MagicMock, Mock, patch
 
+import numpy as np
+import pandas as pd
 import pytest
 
-from app.schemas.recommendation import RecommendationItem
+from app.core.cache import LRUCache
+from app.core.events import EventBus
+from app.core.rating_stats import RatingStats
+from app.repositories.ratings_repo import RatingsRepository
+from app.schemas.recommendation import RecommendationFilters, RecommendationItem, RecommendationList
 from app.services import recommendations_service
 
+FRESH = datetime.now(UTC).isoformat()
+
+# Movie 1: three 5s, movie 2: one 1, movie 3: one 4 and one 5 (mean vote 25 / 6, Bayesian m = 1)
+RATINGS = [{"movie_id": m, "rating": r} for m, r in ((1, 5.0), (1, 5.0), (1, 5.0), (2, 1.0), (3, 4.0), (3, 5.0))]
+
 
 @pytest.fixture
 def mock_resources():
@@ -16,6 +30,11 @@ def mock_resources():
     mock_recommender = Mock()
     mock_recommender.get_similar_by_id.return_value = []
     resources.recommender = mock_recommender
+    resources.recommender_version = "v1"
+    resources.recommendations_repo.get_for_user.return_value = None
+    resources.ratings_repo.get_by_user.return_value = []
+    resources.ratings_repo.get_user_version.return_value = "2:2025-01-01T00:00:00+00:00"
+    resources.profile_states = LRUCache(0)
 
     return resources
 
@@ -26,9 +45,12 @@ def test_returns_cached_recommendations_when_fresh(mock_resources):
             {"movie_id": 100, "similarity_score": 0.95},
             {"movie_id": 101, "similarity_score": 0.90},
         ],
+        "artifact_version": "v1",
+        "ratings_version": "2:2025-01-01T00:00:00+00:00",
+        "timestamp": FRESH,
+        "stale": False,
     }
     mock_resources.recommendations_repo.get_for_user.return_value = cached_data
-    mock_resources.recommendations_repo.is_fresh.return_value = True
 
     result = recommendations_service.get_recommendations(mock_resources, "user123", limit=10)
 
@@ -37,7 +59,83 @@ def test_returns_cached_recommendations_when_fresh(mock_resources):
     assert result.recommendations[0].movie_id == 100
     mock_resources.recommender.get_similar_by_id.assert_not_called()
     mock_resources.recommendations_repo.get_for_user.assert_called_once_with("user123")
-    mock_resources.recommendations_repo.is_fresh.assert_called_once()
+    mock_resources.recommendations_repo.is_fresh.assert_not_called()
+
+
+def test_serves_stale_cache_and_refreshes_in_background(mocker, mock_resources):
+    mock_resources.recommendations_repo.get_for_user.return_value = {
+        "recommendations": [
+            {"movie_id": 100, "similarity_score": 0.95},
+            {"movie_id": 101, "similarity_score": 0.90},
+            {"movie_id": 102, "similarity_score": 0.85},
+        ],
+        "artifact_version": "v1",
+        "timestamp": FRESH,
+        "stale": True,
+    }
+    mock_resources.ratings_repo.get_by_user.return_value = [{"movie_id": 101, "rating": 4.0}]
+    mocker.patch.object(recommendations_service.settings, "RECOMMENDATIONS_CACHE_DEPTH", 50)
+    mock_generate = mocker.patch("app.services.recommendations_service.generate_recommendations")
+
+    result = recommendations_service.get_recommendations(mock_resources, "user123", limit=2)
+
+    # Movies rated since the list was cached are dropped from the stale list
+    assert [r.movie_id for r in result.recommendations] == [100, 102]
+    mock_generate.assert_not_called()
+    mock_resources.background.submit.assert_called_once_with(
+        ("recommendations", "user123"),
+        recommendations_service._regenerate_recommendations,
+        mock_resources,
+        "user123",
+        50,
+    )
+
+
+def test_regenerates_when_ratings_changed_since_caching(mock_resources):
+    mock_resources.recommendations_repo.get_for_user.return_value = {
+        "recommendations": [{"movie_id": 100, "similarity_score": 0.95}],
+        "artifact_version": "v1",
+        "ratings_version": "1:2024-12-31T00:00:00+00:00",
+        "timestamp": FRESH,
+        "stale": False,
+    }
+
+    recommendations_service.get_recommendations(mock_resources, "user123", limit=10)
+
+    mock_resources.background.submit.assert_called_once()
+
+
+def test_serves_cache_for_older_artifacts_while_refreshing(mock_resources):
+    mock_resources.recommendations_repo.get_for_user.return_value = {
+        "recommendations": [{"movie_id": 100, "similarity_score": 0.95}],
+        "artifact_version": "v0",
+        "timestamp": FRESH,
+        "stale": False,
+    }
+
+    result = recommendations_service.get_recommendations(mock_resources, "user123", limit=10)
+
+    assert result.recommendations[0].movie_id == 100
+    mock_resources.background.submit.assert_called_once()
+
+
+def test_regenerate_saves_with_artifact_version(mocker, mock_resources):
+    mock_generate = mocker.patch(
+        "app.services.recommendations_service.generate_recommendations",
+        return_value=[RecommendationItem(movie_id=200, similarity_score=0.88)],
+    )
+
+    result = recommendations_service._regenerate_recommendations(mock_resources, "user123", 10)
+
+    assert result.recommendations[0].movie_id == 200
+    mock_generate.assert_called_once_with(mock_resources, "user123", 10, genre_weight=None)
+    mock_resources.recommendations_repo.save_for_user.assert_called_once_with(
+        "user123",
+        [{"movie_id": 200, "similarity_score": 0.88}],
+        artifact_version="v1",
+        variant=None,
+        ratings_version="2:2025-01-01T00:00:00+00:00",
+    )
 
 
 def test_generates_new_recommendations_when_cache_stale(mocker, mock_resources):
@@ -51,6 +149,7 @@ def test_generates_new_recommendations_when_cache_stale(mocker, mock_resources):
         "title": f"Movie {mid}",
     }
 
+    mocker.patch.object(recommendations_service.settings, "RECOMMENDATIONS_CACHE_DEPTH", 20)
     mock_generate = mocker.patch(
         "app.services.recommendations_service.generate_recommendations",
         return_value=[
@@ -59,14 +158,31 @@ def test_generates_new_recommendations_when_cache_stale(mocker, mock_resources):
         ],
     )
 
-    result = recommendations_service.get_recommendations(mock_resources, "user123", limit=10)
+    result = recommendations_service.get_recommendations(mock_resources, "user123", limit=1)
 
-    assert len(result.recommendations) == 2
-    mock_generate.assert_called_once_with(mock_resources, "user123", 10)
-    mock_resources.recommendations_repo.save_for_user.assert_called_once()
+    # The cache gets the full depth, the caller gets their limit
+    assert [r.movie_id for r in result.recommendations] == [100]
+    mock_generate.assert_called_once_with(mock_resources, "user123", 20, genre_weight=None)
+    assert len(mock_resources.recommendations_repo.save_for_user.call_args.args[1]) == 2
+
+
+def test_force_refresh_schedules_refresh_of_fresh_cache(mocker, mock_resources):
+    mock_resources.recommendations_repo.get_for_user.return_value = {
+        "recommendations": [{"movie_id": 100, "similarity_score": 0.95}],
+        "artifact_version": "v1",
+        "timestamp": FRESH,
+        "stale": False,
+    }
+    mock_generate = mocker.patch("app.services.recommendations_service.generate_recommendations")
+
+    result = recommendations_service.get_recommendations(mock_resources, "user123", limit=10, force_refresh=True)
 
+    assert [r.movie_id for r in result.recommendations] == [100]
+    mock_generate.assert_not_called()
+    mock_resources.background.submit.assert_called_once()
 
-def test_force_refresh_bypasses_cache(mocker, mock_resources):
+
+def test_force_refresh_without_cache_generates_synchronously(mocker, mock_resources):
     mock_generate = mocker.patch(
         "app.services.recommendations_service.generate_recommendations",
         return_value=[RecommendationItem(movie_id=200, similarity_score=0.88)],
@@ -75,99 +191,83 @@ def test_force_refresh_bypasses_cache(mocker, mock_resources):
     result = recommendations_service.get_recommendations(mock_resources, "user123", limit=10, force_refresh=True)
 
     assert len(result.recommendations) == 1
-    mock_resources.recommendations_repo.get_for_user.assert_not_called()
-    mock_generate.assert_called_once_with(mock_resources, "user123", 10)
+    mock_generate.assert_called_once_with(
+        mock_resources, "user123", recommendations_service.settings.RECOMMENDATIONS_CACHE_DEPTH, genre_weight=None
+    )
+    mock_resources.background.submit.assert_not_called()
 
 
 def test_returns_fallback_for_user_with_no_ratings(mock_resources):
     mock_resources.ratings_repo.get_by_user.return_value = []
-    mock_resources.movies_repo.get_all.return_value = [
-        {"movie_id": 1, "title": "Movie 1"},
-        {"movie_id": 2, "title": "Movie 2"},
-    ]
+    mock_resources.rating_stats = RatingStats(lambda: RATINGS)
 
     result = recommendations_service.generate_recommendations(mock_resources, "user123", limit=10)
 
-    assert len(result) == 2
-    assert result[0].similarity_score == 0.5
-    mock_resources.movies_repo.get_all.assert_called_once_with(limit=10)
+    assert [r.movie_id for r in result] == [1, 3, 2]
+    assert result[0].similarity_score == pytest.approx((0.75 * 5.0 + 0.25 * 25 / 6) / 5, abs=1e-4)
+    mock_resources.recommender.recommend_for_profile.assert_not_called()
+
+
+def test_fallback_for_user_with_no_ratings_is_not_cached(mock_resources):
+    mock_resources.ratings_repo.get_user_version.return_value = "0:"
+    mock_resources.rating_stats = RatingStats(list)
 
+    # No ratings anywhere yet: the empty ranking must not be cached for the user
+    assert recommendations_service.get_recommendations(mock_resources, "newuser").recommendations == []
+    mock_resources.recommendations_repo.save_for_user.assert_not_called()
 
-def test_uses_high_rated_movies_as_seeds(mocker, mock_resources):
+    mock_resources.rating_stats = RatingStats(lambda: RATINGS)
+    result = recommendations_service.get_recommendations(mock_resources, "newuser")
+
+    assert [r.movie_id for r in result.recommendations] == [1, 3, 2]
+    mock_resources.recommendations_repo.save_for_user.assert_not_called()
+
+
+def test_uses_high_rated_movies_as_seeds(mock_resources):
     mock_resources.ratings_repo.get_by_user.return_value = [
         {"movie_id": 1, "rating": 4.5},
         {"movie_id": 2, "rating": 4.0},
         {"movie_id": 3, "rating": 3.0},
         {"movie_id": 4, "rating": 5.0},
     ]
-    mock_resources.movies_repo.get_by_id.side_effect = lambda mid: {
-        "movie_id": mid,
-        "title": f"Movie {mid}",
-    }
-
-    mock_get_similar = mocker.patch(
-        "app.services.recommendations_service.get_similar_movies",
-        return_value=[RecommendationItem(movie_id=100, similarity_score=0.9)],
-    )
+    mock_resources.recommender.recommend_for_profile.return_value = [(100, 0.9)]
 
     recommendations_service.generate_recommendations(mock_resources, "user123", limit=10)
 
-    seed_movie_ids = [call.args[1] for call in mock_get_similar.call_args_list]  # Second arg is movie_id
-    assert 1 in seed_movie_ids
-    assert 2 in seed_movie_ids
-    assert 3 not in seed_movie_ids
-    assert 4 in seed_movie_ids
+    mock_resources.recommender.recommend_for_profile.assert_called_once()
+    seed_weights = mock_resources.recommender.recommend_for_profile.call_args.args[0]
+    assert seed_weights == {1: 0.9, 2: 0.8, 4: 1.0}
 
 
-def test_excludes_already_rated_movies(mocker, mock_resources):
+def test_excludes_already_rated_movies(mock_resources):
     mock_resources.ratings_repo.get_by_user.return_value = [
         {"movie_id": 1, "rating": 4.5},
         {"movie_id": 2, "rating": 4.0},
     ]
-    mock_resources.movies_repo.get_by_id.return_value = {
-        "movie_id": 1,
-        "title": "Movie 1",
-    }
-
-    mocker.patch(
-        "app.services.recommendations_service.get_similar_movies",
-        return_value=[
-            RecommendationItem(movie_id=2, similarity_score=0.95),
-            RecommendationItem(movie_id=100, similarity_score=0.90),
-        ],
-    )
+    mock_resources.recommender.recommend_for_profile.return_value = [(100, 0.90)]
 
     result = recommendations_service.generate_recommendations(mock_resources, "user123", limit=10)
+
+    assert mock_resources.recommender.recommend_for_profile.call_args.kwargs["exclude"] == {1, 2}
     movie_ids = [r.movie_id for r in result]
-    assert 2 not in movie_ids
     assert 100 in movie_ids
 
 
-def test_aggregates_scores_from_multiple_seeds(mocker, mock_resources):
+def test_scores_profile_in_one_call(mock_resources):
     mock_resources.ratings_repo.get_by_user.return_value = [
         {"movie_id": 1, "rating": 4.0},
         {"movie_id": 2, "rating": 5.0},
     ]
-    mock_resources.movies_repo.get_by_id.side_effect = lambda mid: {
-        "movie_id": mid,
-        "title": f"Movie {mid}",
-    }
+    mock_resources.recommender.recommend_for_profile.return_value = [(100, 0.85432), (101, 0.5)]
 
-    def mock_similar(resources, movie_id, limit):
-        if movie_id == 1:
-            return [RecommendationItem(movie_id=100, similarity_score=0.8)]
-        if movie_id == 2:
-            return [RecommendationItem(movie_id=100, similarity_score=0.9)]
-        return []
+    result = recommendations_service.generate_recommendations(mock_resources, "user123", limit=2)
 
-    mocker.patch(
-        "app.services.recommendations_service.get_similar_movies",
-        side_effect=mock_similar,
+    mock_resources.recommender.recommend_for_profile.assert_called_once_with(
+        {1: 0.8, 2: 1.0}, n=2, exclude={1, 2}, genre_weight=None, cf_weight=0.0
     )
-
-    result = recommendations_service.generate_recommendations(mock_resources, "user123", limit=10)
-    movie_100 = next(r for r in result if r.movie_id == 100)
-    assert 0.7 < movie_100.similarity_score < 0.9
+    mock_resources.recommender.get_similar_by_ids.assert_not_called()
+    mock_resources.movies_repo.get_by_id.assert_not_called()
+    assert [(r.movie_id, r.similarity_score) for r in result] == [(100, 0.8543), (101, 0.5)]
 
 
 def test_returns_similar_movies_for_valid_movie(mock_resources):
@@ -191,7 +291,7 @@ def test_returns_similar_movies_for_valid_movie(mock_resources):
     assert len(result) == 2
     assert all(isinstance(r, RecommendationItem) for r in result)
 
-    mock_resources.recommender.get_similar_by_id.assert_called_once_with(1, n=2)
+    mock_resources.recommender.get_similar_by_id.assert_called_once_with(1, n=2, genre_weight=None)
 
     assert result[0].movie_id == 2
     assert result[0].similarity_score == 0.92
@@ -214,23 +314,343 @@ def test_clear_cache_calls_repo(mock_resources):
 
 
 def test_fallback_respects_limit(mock_resources):
-    def get_all_mock(limit=None):
-        actual_limit = limit or 0
-        return [{"movie_id": i, "title": f"Movie {i}"} for i in range(actual_limit)]
+    mock_resources.rating_stats = RatingStats(lambda: RATINGS)
+
+    result = recommendations_service.get_fallback_recommendations(mock_resources, limit=2)
+
+    assert [r.movie_id for r in result] == [1, 3]
 
-    mock_resources.movies_repo.get_all.side_effect = get_all_mock
 
-    result = recommendations_service._get_fallback_recommendations(mock_resources, limit=5)
-    assert len(result) == 5
-    mock_resources.movies_repo.get_all.assert_called_once_with(limit=5)
+def test_fallback_applies_filters(mock_resources):
+    mock_resources.rating_stats = RatingStats(lambda: RATINGS)
+    mock_resources.movies_repo.movies_df = pd.DataFrame(
+        {"movie_id": [1, 2, 3], "genres": [["Drama"], ["Drama", "Comedy"], ["Comedy"]]}
+    )
+    mock_resources.recommender.movie_id_to_idx = {1: 0, 2: 1, 3: 2}
+    mock_resources.recommender.filter_mask.return_value = np.array([True, False, False])
+    filters = RecommendationFilters(genres=["comedy"], year_min=2000)
+
+    result = recommendations_service.get_recommendations(mock_resources, "newuser", limit=5, filters=filters)
+
+    assert [r.movie_id for r in result.recommendations] == [3, 2]
+    mock_resources.recommender.filter_mask.assert_called_once_with(["comedy"], 2000, None)
+
+
+def test_refresh_regenerates_synchronously(mocker, mock_resources):
+    regenerate = mocker.patch(
+        "app.services.recommendations_service._regenerate_recommendations",
+        return_value=RecommendationList(
+            user_id="user123",
+            recommendations=[RecommendationItem(movie_id=i, similarity_score=1.0) for i in range(20)],
+            variant="control",
+        ),
+    )
+
+    result = recommendations_service.refresh_recommendations_for_user(mock_resources, "user123", limit=10)
+
+    regenerate.assert_called_once_with(
+        mock_resources, "user123", recommendations_service.settings.RECOMMENDATIONS_CACHE_DEPTH
+    )
+    mock_resources.background.submit.assert_not_called()
+    assert len(result.recommendations) == 10
+    assert result.variant == "control"
 
 
-def test_refresh_calls_get_with_force_refresh(mocker, mock_resources):
-    mock_get = mocker.patch(
-        "app.services.recommendations_service.get_recommendations",
-        return_value=Mock(user_id="user123", recommendations=[]),
+def test_assign_weight_variant_is_stable(mocker):
+    mocker.patch.object(
+        recommendations_service.settings, "RECOMMENDER_WEIGHT_VARIANTS", {"control": 0.3, "genre_heavy": 0.6}
     )
 
-    recommendations_service.refresh_recommendations_for_user(mock_resources, "user123", limit=10)
+    assignments = {recommendations_service.assign_weight_variant(f"user{i}") for i in range(50)}
+
+    assert assignments == {("control", 0.3), ("genre_heavy", 0.6)}
+    assert recommendations_service.assign_weight_variant("user1") == recommendations_service.assign_weight_variant(
+        "user1"
+    )
+
+
+def test_assign_weight_variant_without_variants(mocker):
+    mocker.patch.object(recommendations_service.settings, "RECOMMENDER_WEIGHT_VARIANTS", {})
+
+    assert recommendations_service.assign_weight_variant("user1") == (None, None)
+
+
+def test_recommendations_use_assigned_variant_weight(mocker, mock_resources):
+    mocker.patch.object(recommendations_service.settings, "RECOMMENDER_WEIGHT_VARIANTS", {"genre_heavy": 0.6})
+    mock_resources.ratings_repo.get_by_user.return_value = [{"movie_id": 1, "rating": 5.0}]
+    mock_resources.recommender.recommend_for_profile.return_value = [(100, 0.9)]
+
+    result = recommendations_service.get_recommendations(mock_resources, "user123", force_refresh=True)
+
+    assert result.variant == "genre_heavy"
+    assert mock_resources.recommender.recommend_for_profile.call_args.kwargs["genre_weight"] == 0.6
+    assert mock_resources.recommendations_repo.save_for_user.call_args.kwargs["variant"] == "genre_heavy"
+
+
+def test_blends_collaborative_scores_when_available(mocker, mock_resources):
+    mocker.patch.object(recommendations_service.settings, "CF_BLEND_WEIGHT", 0.4)
+    mock_resources.ratings_repo.get_by_user.return_value = [{"movie_id": 1, "rating": 5.0}]
+    mock_resources.recommender.recommend_for_profile.return_value = []
+
+    mock_resources.recommender.has_collaborative = True
+    recommendations_service.generate_recommendations(mock_resources, "user123")
+    assert mock_resources.recommender.recommend_for_profile.call_args.kwargs["cf_weight"] == 0.4
+
+    mock_resources.recommender.has_collaborative = False
+    recommendations_service.generate_recommendations(mock_resources, "user123")
+    assert mock_resources.recommender.recommend_for_profile.call_args.kwargs["cf_weight"] == 0.0
+
+
+def test_uses_als_engine_when_trained(mocker, mock_resources):
+    mocker.patch.object(recommendations_service.settings, "PERSONALIZED_ENGINE", "als")
+    mock_resources.recommender.has_als = True
+    mock_resources.ratings_repo.get_by_user.return_value = [
+        {"movie_id": 1, "rating": 4.5, "timestamp": "2025-01-02T00:00:00+00:00"},
+        {"movie_id": 2, "rating": 2.0, "timestamp": "2025-01-03T00:00:00+00:00"},
+    ]
+    mock_resources.recommender.recommend_for_user.return_value = [(300, 0.71234)]
+
+    result = recommendations_service.generate_recommendations(mock_resources, "user123", limit=5)
+
+    assert [(r.movie_id, r.similarity_score) for r in result] == [(300, 0.7123)]
+    args = mock_resources.recommender.recommend_for_user.call_args
+    assert args.args == ("user123", {1: 4.5, 2: 2.0})
+    assert args.kwargs["exclude"] == {1, 2}
+    assert args.kwargs["updated_at"].day == 3
+    mock_resources.recommender.recommend_for_profile.assert_not_called()
+
+
+def test_profile_state_is_kept_when_enabled(mock_resources):
+    mock_resources.profile_states = LRUCache(4)
+    mock_resources.ratings_repo.get_by_user.return_value = [{"movie_id": 1, "rating": 5.0}]
+    mock_resources.recommender.version = "v1"
+    mock_resources.recommender.movie_ids = np.array([1, 100, 200])
+    mock_resources.recommender.seed_scores.return_value = np.array([1.0, 0.9, 0.2], dtype=np.float32)
+    mock_resources.recommender.exclusion_mask.return_value = np.array([True, False, True])
+
+    result = recommendations_service.generate_recommendations(mock_resources, "user123", limit=5)
+
+    assert [r.movie_id for r in result] == [100]
+    state = mock_resources.profile_states.get("user123")
+    assert state.seed_weights == {1: 1.0}
+    assert state.rated == {1}
+    mock_resources.recommender.recommend_for_profile.assert_not_called()
+
+
+def test_rating_events_schedule_incremental_updates(mock_resources, tmp_path):
+    mock_resources.event_bus = EventBus()
+    mock_resources.ratings_repo = RatingsRepository(str(tmp_path / "ratings.json"), event_bus=mock_resources.event_bus)
+    mock_resources.profile_states = LRUCache(4)
+    mock_resources.profile_states.put("u1", Mock())
+    recommendations_service.subscribe_to_rating_changes(mock_resources)
+
+    created = mock_resources.ratings_repo.create({"user_id": "u1", "movie_id": 1, "rating": 4.0})
+    mock_resources.ratings_repo.update(created["id"], {"rating": 2.0})
+    mock_resources.ratings_repo.delete(created["id"])
+    mock_resources.ratings_repo.create({"user_id": "u2", "movie_id": 1, "rating": 4.0})
+
+    calls = mock_resources.background.submit.call_args_list
+    assert [c.args[1:] for c in calls] == [
+        (recommendations_service.apply_rating_change, mock_resources, "u1", 1, 4.0, None),
+        (recommendations_service.apply_rating_change, mock_resources, "u1", 1, 2.0, 4.0),
+        (recommendations_service.apply_rating_change, mock_resources, "u1", 1, None, 2.0),
+    ]
+    # Every change gets its own job, so none is dropped while an earlier one runs
+    assert len({c.args[0] for c in calls}) == 3
+
+
+def test_apply_rating_change_updates_cache_incrementally(mock_resources):
+    state = Mock(seed_weights={1: 1.0}, version="v1", limit=10, generation=1, publish_lock=threading.Lock())
+    state.matches.return_value = True
+    state.recommend.return_value = [(100, 0.91234)]
+    mock_resources.profile_states = LRUCache(4)
+    mock_resources.profile_states.put("user123", state)
+
+    assert recommendations_service.apply_rating_change(mock_resources, "user123", 7, 4.5)
+
+    state.update.assert_called_once_with(mock_resources.recommender, 7, 0.9, rated=True)
+    mock_resources.recommendations_repo.save_for_user.assert_called_once_with(
+        "user123",
+        [{"movie_id": 100, "similarity_score": 0.9123}],
+        artifact_version="v1",
+        variant=None,
+        ratings_version="2:2025-01-01T00:00:00+00:00",
+    )
+
+
+def test_apply_rating_change_skips_save_after_later_change(mock_resources):
+    state = Mock(seed_weights={1: 1.0}, version="v1", limit=10, generation=1, publish_lock=threading.Lock())
+    state.matches.return_value = True
+
+    def concurrent_update(_recommender, _n):
+        state.generation += 1
+        return [(100, 0.9)]
+
+    state.recommend.side_effect = concurrent_update
+    mock_resources.profile_states = LRUCache(4)
+    mock_resources.profile_states.put("user123", state)
+
+    assert recommendations_service.apply_rating_change(mock_resources, "user123", 7, 4.5)
+
+    mock_resources.recommendations_repo.save_for_user.assert_not_called()
+
+
+def test_apply_rating_change_drops_state_that_needs_rebuild(mock_resources):
+    state = Mock(seed_weights={1: 1.0})
+    state.matches.return_value = True
+    mock_resources.profile_states = LRUCache(4)
+    mock_resources.profile_states.put("user123", state)
+
+    # Deleting the only highly rated movie switches the user to fallback seeds
+    assert not recommendations_service.apply_rating_change(mock_resources, "user123", 1, None, previous_rating=5.0)
+
+    assert "user123" not in mock_resources.profile_states
+    state.update.assert_not_called()
+    mock_resources.recommendations_repo.save_for_user.assert_not_called()
+    mock_resources.recommendations_repo.mark_stale.assert_called_once_with("user123")
+
+
+def test_apply_rating_change_without_state_does_nothing(mock_resources):
+    assert not recommendations_service.apply_rating_change(mock_resources, "user123", 1, 5.0)
+    mock_resources.recommendations_repo.save_for_user.assert_not_called()
+
+
+def test_filtered_recommendations_bypass_cache_and_mask_scores(mock_resources):
+    mock_resources.ratings_repo.get_by_user.return_value = [{"movie_id": 1, "rating": 5.0}]
+    mock_resources.watchlist_repo.get_by_user.return_value = [{"movie_id": 7}]
+    mock_resources.recommender.filter_mask.return_value = np.array([False, True, False, False])
+    mock_resources.recommender.exclusion_mask.side_effect = lambda ids: np.array([i in ids for i in (1, 2, 3, 7)])
+    mock_resources.recommender.recommend_for_profile.return_value = [(3, 0.75)]
+    filters = RecommendationFilters(genres=["Drama"], year_min=1990, exclude_watchlist=True)
+
+    result = recommendations_service.get_recommendations(mock_resources, "user123", limit=5, filters=filters)
+
+    assert [r.movie_id for r in result.recommendations] == [3]
+    mock_resources.recommender.filter_mask.assert_called_once_with(["Drama"], 1990, None)
+    mask = mock_resources.recommender.recommend_for_profile.call_args.kwargs["exclude"]
+    assert mask.tolist() == [True, True, False, True]
+    mock_resources.watchlist_repo.get_by_user.assert_called_once_with("user123")
+    mock_resources.recommendations_repo.get_for_user.assert_not_called()
+    mock_resources.recommendations_repo.save_for_user.assert_not_called()
+
+
+def test_inactive_filters_use_cache(mock_resources):
+    mock_resources.recommendations_repo.get_for_user.return_value = None
+    mock_resources.ratings_repo.get_by_user.return_value = []
+    mock_resources.rating_stats = RatingStats(list)
+
+    recommendations_service.get_recommendations(mock_resources, "user123", filters=RecommendationFilters())
+
+    mock_resources.recommendations_repo.get_for_user.assert_called_once_with("user123")
+    mock_resources.recommender.filter_mask.assert_not_called()
+
+
+def test_exclude_rated_alone_is_served_from_cache(mock_resources):
+    mock_resources.recommendations_repo.get_for_user.return_value = {
+        "recommendations": [{"movie_id": 100, "similarity_score": 0.95}],
+        "artifact_version": "v1",
+        "ratings_version": "2:2025-01-01T00:00:00+00:00",
+        "timestamp": FRESH,
+        "stale": False,
+    }
+    filters = RecommendationFilters(exclude_rated=True)
+
+    result = recommendations_service.get_recommendations(mock_resources, "user123", filters=filters)
+
+    assert [r.movie_id for r in result.recommendations] == [100]
+    mock_resources.recommender.filter_mask.assert_not_called()
+    mock_resources.ratings_repo.get_by_user.assert_not_called()
+
+
+def test_similar_movies_with_filters_mask_scores(mock_resources):
+    mock_resources.movies_repo.get_by_id.return_value = {"movie_id": 1}
+    mock_resources.ratings_repo.get_by_user.return_value = [{"movie_id": 2, "rating": 3.0}]
+    mock_resources.recommender.filter_mask.return_value = np.array([False, False, False])
+    mock_resources.recommender.exclusion_mask.return_value = np.array([False, True, False])
+    mock_resources.recommender.get_similar_by_ids.return_value = {1: [(3, 0.5)]}
+    filters = RecommendationFilters(year_max=2000, exclude_rated=True, user_id="user123")
+
+    result = recommendations_service.get_similar_movies(mock_resources, 1, limit=3, filters=filters)
+
+    assert [r.movie_id for r in result] == [3]
+    mock_resources.recommender.exclusion_mask.assert_called_once_with({2})
+    call = mock_resources.recommender.get_similar_by_ids.call_args
+    assert call.args == ([1],)
+    assert call.kwargs["exclude"].tolist() == [False, True, False]
+    mock_resources.recommender.get_similar_by_id.assert_not_called()
+
+
+def test_session_recommendations_score_one_profile_and_cache(mock_resources):
+    mock_resources.session_recommendations = LRUCache(8)
+    mock_resources.recommender.recommend_for_profile.return_value = [(10, 0.91234), (11, 0.5)]
+
+    first = recommendations_service.get_session_recommendations(mock_resources, [(2, 3.0), (1, 1.0)], limit=2)
+    again = recommendations_service.get_session_recommendations(mock_resources, [(1, 2.0), (2, 6.0)], limit=2)
+
+    mock_resources.recommender.recommend_for_profile.assert_called_once_with(
+        {1: 0.25, 2: 0.75}, n=2, exclude={1, 2}, cf_weight=0.0
+    )
+    assert [(r.movie_id, r.similarity_score) for r in first.recommendations] == [(10, 0.9123), (11, 0.5)]
+    assert again == first
+
+
+def test_session_key_depends_on_movie_set(mock_resources):
+    same = recommendations_service.normalize_session([(1, 1.0), (2, 1.0), (1, 1.0)])
+    other = recommendations_service.normalize_session([(1, 1.0), (2, 2.0)])
+
+    assert same == {1: 0.666667, 2: 0.333333}
+    assert recommendations_service.session_key(same) != recommendations_service.session_key(other)
+    with pytest.raises(ValueError, match="positive weight"):
+        recommendations_service.normalize_session([(1, 0.0)])
+
+
+def test_similarity_matrix_encodes_float32(mock_resources):
+    matrix = np.array([[1.0, 0.25], [0.25, 1.0]], dtype=np.float32)
+    mock_resources.recommender.similarity_submatrix.return_value = ([3, 1], matrix)
+
+    result = recommendations_service.get_similarity_matrix(mock_resources, [3, 1, 99, 3])
+
+    assert result.movie_ids == [3, 1]
+    assert result.missing_ids == [99]
+    assert result.shape == [2, 2]
+    decoded = np.frombuffer(base64.b64decode(result.data), dtype="<f4").reshape(result.shape)
+    assert decoded.tolist() == matrix.tolist()
+
+
+def test_diversity_reranks_top_of_cached_list(mocker, mock_resources):
+    mocker.patch.object(recommendations_service.settings, "MMR_CANDIDATE_POOL", 3)
+    mock_resources.recommendations_repo.get_for_user.return_value = {
+        "recommendations": [
+            {"movie_id": 100, "similarity_score": 0.95},
+            {"movie_id": 101, "similarity_score": 0.94},
+            {"movie_id": 102, "similarity_score": 0.80},
+            {"movie_id": 103, "similarity_score": 0.10},
+        ],
+        "artifact_version": "v1",
+        "ratings_version": "2:2025-01-01T00:00:00+00:00",
+        "timestamp": FRESH,
+        "stale": False,
+    }
+    similarity = np.array([[1.0, 0.99, 0.1], [0.99, 1.0, 0.1], [0.1, 0.1, 1.0]], dtype=np.float32)
+    mock_resources.recommender.similarity_submatrix.return_value = ([100, 101, 102], similarity)
+
+    result = recommendations_service.get_recommendations(
+        mock_resources, "user123", limit=2, filters=RecommendationFilters(diversity=0.8)
+    )
+
+    assert [(r.movie_id, r.similarity_score) for r in result.recommendations] == [(100, 0.95), (102, 0.8)]
+    mock_resources.recommender.similarity_submatrix.assert_called_once_with([100, 101, 102])
+
+
+def test_similar_movies_rerank_candidate_pool(mocker, mock_resources):
+    mocker.patch.object(recommendations_service.settings, "MMR_CANDIDATE_POOL", 3)
+    mocker.patch.object(recommendations_service.settings, "MMR_DIVERSITY", 0.5)
+    mock_resources.movies_repo.get_by_id.return_value = {"movie_id": 1}
+    mock_resources.recommender.get_similar_by_id.return_value = [(2, 0.9), (3, 0.89), (4, 0.5)]
+    similarity = np.array([[1.0, 0.99, 0.0], [0.99, 1.0, 0.0], [0.0, 0.0, 1.0]], dtype=np.float32)
+    mock_resources.recommender.similarity_submatrix.return_value = ([2, 3, 4], similarity)
+
+    result = recommendations_service.get_similar_movies(mock_resources, 1, limit=2)
 
-    mock_get.assert_called_once_with(mock_resources, "user123", limit=10, force_refresh=True)
+    assert [r.movie_id for r in result] == [2, 4]
+    mock_resources.recommender.get_similar_by_id.assert_called_once_with(1, n=3, genre_weight=None)